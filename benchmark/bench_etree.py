@@ -1,4 +1,4 @@
-import sys, copy
+import sys, copy, os, tempfile, atexit
 from itertools import *
 
 import benchbase
@@ -13,6 +13,23 @@ UTEXT = u"some klingon: \F8D2"
 ############################################################
 
 class BenchMark(benchbase.TreeBenchMark):
+    _xml_files = {}
+
+    def _xml_file(self, root_xml):
+        "Write the serialised tree into a temporary file (only once)"
+        try:
+            return self._xml_files[root_xml]
+        except KeyError:
+            pass
+        handle, filename = tempfile.mkstemp(suffix='.xml')
+        try:
+            os.write(handle, root_xml)
+        finally:
+            os.close(handle)
+        atexit.register(os.remove, filename)
+        self._xml_files[root_xml] = filename
+        return filename
+
     @nochange
     def bench_iter_children(self, root):
         for child in root:
@@ -102,6 +119,19 @@ class BenchMark(benchbase.TreeBenchMark):
         f = BytesIO(root_xml)
         self.etree.parse(f)
 
+    @with_attributes(True, False)
+    @with_text(text=True, utext=True)
+    @serialized
+    def bench_parse_file(self, root_xml):
+        self.etree.parse(self._xml_file(root_xml))
+
+    @with_attributes(True, False)
+    @with_text(text=True, utext=True)
+    @onlylib('lxe')
+    @serialized
+    def bench_parse_file_mmap(self, root_xml):
+        self.etree.parse(self._xml_file(root_xml), mmap=True)
+
     @with_attributes(True, False)
     @with_text(text=True, utext=True)
     @serialized
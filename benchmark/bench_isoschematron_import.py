@@ -0,0 +1,49 @@
+"""
+Measures the time it takes to import lxml.isoschematron, and to create the
+first Schematron validator afterwards, in fresh Python processes.
+
+The pipeline stylesheets and the RelaxNG schema for Schematron schemas are
+compiled on first use, so their cost shows up in the first validator and
+no longer in the import.
+"""
+
+import sys, subprocess
+
+IMPORT_ETREE = "from lxml import etree"
+IMPORT_SCHEMATRON = "from lxml import etree, isoschematron"
+FIRST_VALIDATOR = IMPORT_SCHEMATRON + """
+isoschematron.Schematron(etree.XML(
+    '<schema xmlns="http://purl.oclc.org/dsdl/schematron">'
+    '<pattern><rule context="a"><assert test="b">no b</assert></rule>'
+    '</pattern></schema>'))
+"""
+
+TIMER = """
+import time
+t = time.time()
+%s
+sys.stdout.write('%%f' %% (time.time() - t))
+"""
+
+def run(code, repeat):
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.Popen(
+            [sys.executable, '-c', 'import sys\n' + TIMER % code],
+            stdout=subprocess.PIPE).communicate()[0]
+        timings.append(float(output))
+    return min(timings)
+
+def main(repeat=10):
+    etree_time = run(IMPORT_ETREE, repeat)
+    import_time = run(IMPORT_SCHEMATRON, repeat)
+    validator_time = run(FIRST_VALIDATOR, repeat)
+    print("import lxml.etree:                 %8.2f msec" % (etree_time * 1000))
+    print("import lxml.isoschematron:         %8.2f msec" % (import_time * 1000))
+    print("import and first Schematron():     %8.2f msec" % (validator_time * 1000))
+
+if __name__ == '__main__':
+    repeat = 10
+    if len(sys.argv) > 1:
+        repeat = int(sys.argv[1])
+    main(repeat)
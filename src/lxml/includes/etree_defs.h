@@ -78,6 +78,15 @@
 #endif
 #endif
 
+/* the new buffer protocol is only available in Py2.6+ */
+#if PY_VERSION_HEX < 0x02060000
+#  undef PyObject_CheckBuffer
+#  define PyObject_CheckBuffer(o)            (0)
+/* no bytearray either, but callers check the version before using it */
+#  define PyByteArray_FromStringAndSize(s, len) PyBytes_FromStringAndSize(s, len)
+#  define PyByteArray_AS_STRING(s)           PyBytes_AS_STRING(s)
+#endif
+
 /* PySlice_GetIndicesEx() has wrong signature in Py<=3.1 */
 #if PY_VERSION_HEX >= 0x03020000
 #  define _lx_PySlice_GetIndicesEx(o, l, b, e, s, sl) PySlice_GetIndicesEx(o, l, b, e, s, sl)
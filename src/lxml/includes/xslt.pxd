@@ -1,4 +1,4 @@
-from lxml.includes.tree cimport xmlDoc, xmlNode, xmlDict, xmlChar, const_xmlChar
+from lxml.includes.tree cimport xmlDoc, xmlNode, xmlDict, xmlChar, const_xmlChar, xmlOutputBuffer
 from lxml.includes.xpath cimport xmlXPathContext, xmlXPathFunction
 
 from libc.string cimport const_char
@@ -17,9 +17,22 @@ cdef extern from "libxslt/xsltInternals.h":
         XSLT_STATE_STOPPED  # 2
 
     ctypedef struct xsltDocument:
+        xsltDocument* next
         xmlDoc* doc
 
+    ctypedef struct xsltTemplate:
+        xsltTemplate* next
+        xmlChar* match
+        const_xmlChar* name
+        const_xmlChar* mode
+        int nbCalls
+        unsigned long time
+
     ctypedef struct xsltStylesheet:
+        xsltStylesheet* next
+        xsltStylesheet* imports
+        xsltDocument* docList
+        xsltTemplate* templates
         xmlChar* encoding
         xmlDoc* doc
         int errors
@@ -39,8 +52,6 @@ cdef extern from "libxslt/xsltInternals.h":
 
     ctypedef struct xsltStackElem
 
-    ctypedef struct xsltTemplate
-
     cdef xsltStylesheet* xsltParseStylesheetDoc(xmlDoc* doc) nogil
     cdef void xsltFreeStylesheet(xsltStylesheet* sheet) nogil
 
@@ -97,10 +108,15 @@ cdef extern from "libxslt/transform.h":
                                    xsltStackElem* params) nogil
 
 cdef extern from "libxslt/xsltutils.h":
+    cdef long XSLT_TIMESTAMP_TICS_PER_SEC
+
     cdef int xsltSaveResultToString(xmlChar** doc_txt_ptr,
                                     int* doc_txt_len,
                                     xmlDoc* result,
                                     xsltStylesheet* style) nogil
+    cdef int xsltSaveResultTo(xmlOutputBuffer* buf,
+                              xmlDoc* result,
+                              xsltStylesheet* style) nogil
     
     cdef void xsltSetGenericErrorFunc(
         void* ctxt, void (*handler)(void* ctxt, char* msg, ...)) nogil
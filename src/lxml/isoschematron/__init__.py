@@ -5,6 +5,16 @@ of the pure-xslt 'skeleton' implementation.
 import sys
 import os.path
 from lxml import etree as _etree # due to validator __init__ signature
+try:
+    from hashlib import sha1 as _sha1
+except ImportError:
+    # Python < 2.5
+    from sha import new as _sha1
+try:
+    from threading import Lock as _Lock
+except ImportError:
+    # Python built without threads
+    from dummy_threading import Lock as _Lock
 
 
 # some compat stuff, borrowed from lxml.html
@@ -23,12 +33,17 @@ try:
 except NameError:
     # Python 3
     basestring = str
+try:
+    long
+except NameError:
+    # Python 3
+    long = int
 
 
 __all__ = ['extract_xsd', 'extract_rng', 'iso_dsdl_include',
            'iso_abstract_expand', 'iso_svrl_for_xslt1',
            'svrl_validation_errors', 'schematron_schema_valid',
-           'stylesheet_params', 'Schematron'] 
+           'stylesheet_params', 'clear_validator_cache', 'Schematron'] 
 
 
 # some namespaces
@@ -46,20 +61,40 @@ _xml_schema_root = '{%s}schema' % XML_SCHEMA_NS
 _resources_dir = os.path.join(os.path.dirname(__file__), 'resources')
 
 
+class _LazyResource(object):
+    """Proxy for an XSLT stylesheet or RelaxNG schema from the resources
+    directory.  The resource is parsed and compiled on first use, so that
+    importing this module stays cheap.  All calls and attribute lookups are
+    delegated to the compiled object.
+    """
+    def __init__(self, factory, *path):
+        self._factory = factory
+        self._path = os.path.join(_resources_dir, *path)
+        self._compiled = None
+
+    def _get_compiled(self):
+        compiled = self._compiled
+        if compiled is None:
+            # concurrent first calls may compile twice, which is harmless
+            compiled = self._compiled = self._factory(_etree.parse(self._path))
+        return compiled
+
+    def __call__(self, *args, **kwargs):
+        return self._get_compiled()(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._get_compiled(), name)
+
+
 # the iso-schematron skeleton implementation steps aka xsl transformations
-extract_xsd = _etree.XSLT(_etree.parse(
-    os.path.join(_resources_dir, 'xsl', 'XSD2Schtrn.xsl')))
-extract_rng = _etree.XSLT(_etree.parse(
-    os.path.join(_resources_dir, 'xsl', 'RNG2Schtrn.xsl')))
-iso_dsdl_include = _etree.XSLT(_etree.parse(
-    os.path.join(_resources_dir, 'xsl', 'iso-schematron-xslt1',
-                 'iso_dsdl_include.xsl')))
-iso_abstract_expand = _etree.XSLT(_etree.parse(
-    os.path.join(_resources_dir, 'xsl', 'iso-schematron-xslt1',
-                 'iso_abstract_expand.xsl')))
-iso_svrl_for_xslt1 = _etree.XSLT(_etree.parse(
-    os.path.join(_resources_dir,
-                 'xsl', 'iso-schematron-xslt1', 'iso_svrl_for_xslt1.xsl')))
+extract_xsd = _LazyResource(_etree.XSLT, 'xsl', 'XSD2Schtrn.xsl')
+extract_rng = _LazyResource(_etree.XSLT, 'xsl', 'RNG2Schtrn.xsl')
+iso_dsdl_include = _LazyResource(
+    _etree.XSLT, 'xsl', 'iso-schematron-xslt1', 'iso_dsdl_include.xsl')
+iso_abstract_expand = _LazyResource(
+    _etree.XSLT, 'xsl', 'iso-schematron-xslt1', 'iso_abstract_expand.xsl')
+iso_svrl_for_xslt1 = _LazyResource(
+    _etree.XSLT, 'xsl', 'iso-schematron-xslt1', 'iso_svrl_for_xslt1.xsl')
 
 
 # svrl result accessors
@@ -68,8 +103,8 @@ svrl_validation_errors = _etree.XPath(
 
 
 # RelaxNG validator for schematron schemas
-schematron_schema_valid = _etree.RelaxNG(_etree.parse(
-    os.path.join(_resources_dir, 'rng', 'iso-schematron.rng')))
+schematron_schema_valid = _LazyResource(
+    _etree.RelaxNG, 'rng', 'iso-schematron.rng')
 
 
 def stylesheet_params(**kwargs):
@@ -112,6 +147,82 @@ def _stylesheet_param_dict(paramsDict, kwargsDict):
     return paramsDict
     
 
+# in-process cache of compiled validators, see Schematron(cache=True)
+_VALIDATOR_CACHE_SIZE = 100
+_validator_cache = {}
+_validator_cache_keys = []
+_validator_cache_lock = _Lock()
+
+
+def clear_validator_cache():
+    """Discard all validators in the in-process cache of Schematron."""
+    _validator_cache_lock.acquire()
+    try:
+        del _validator_cache_keys[:]
+        _validator_cache.clear()
+    finally:
+        _validator_cache_lock.release()
+
+
+def _cache_key_params(params):
+    """Return the stylesheet parameters as a sorted tuple for use in a cache
+    key, or None if a parameter value cannot be represented reliably.
+    """
+    items = []
+    for key, value in params.items():
+        if isinstance(value, _etree.XPath):
+            value = ('XPath', value.path)
+        elif value is not None and not isinstance(
+                value, (basestring, int, long, float)):
+            return None
+        items.append((key, value))
+    items.sort()
+    return tuple(items)
+
+
+def _cache_validator(key, entry):
+    _validator_cache_lock.acquire()
+    try:
+        if key in _validator_cache:
+            _validator_cache_keys.remove(key)
+        _validator_cache[key] = entry
+        _validator_cache_keys.append(key)
+        while len(_validator_cache_keys) > _VALIDATOR_CACHE_SIZE:
+            _validator_cache.pop(_validator_cache_keys.pop(0), None)
+    finally:
+        _validator_cache_lock.release()
+
+
+def _read_cached_validator_xslt(filename):
+    try:
+        return _etree.parse(filename)
+    except (IOError, OSError, _etree.XMLSyntaxError):
+        return None
+
+
+def _write_cached_validator_xslt(filename, validator_xslt):
+    """Write the validator XSLT to the cache directory.  The document is
+    written to a temporary file first and then renamed, so that concurrent
+    readers never see a partial file.  Failures are ignored.
+    """
+    import tempfile
+    cache_dir = os.path.dirname(filename)
+    try:
+        handle, temp_filename = tempfile.mkstemp(
+            suffix='.tmp', dir=cache_dir)
+        try:
+            os.write(handle, _etree.tostring(validator_xslt))
+        finally:
+            os.close(handle)
+        try:
+            os.rename(temp_filename, filename)
+        except OSError:
+            # target exists on Windows
+            os.remove(temp_filename)
+    except (IOError, OSError):
+        pass
+
+
 class Schematron(_etree._Validator):
     """An ISO Schematron validator.
 
@@ -143,6 +254,14 @@ class Schematron(_etree._Validator):
     With ``store_report`` set to True (default: False), the resulting validation
     report document gets stored and can be accessed as the ``validation_report``
     property.
+    With ``cache`` set to True, the validator is kept in an in-process cache
+    and reused for schema documents with the same content and the same
+    arguments.  If ``cache_dir`` is given, the validation XSLT is also
+    stored in that directory and read from there when it is available.  The
+    cache key is a hash of the schema document and the arguments.  Documents
+    that the schema includes are not part of the key.  Validators created
+    with ``from_validator_xslt()`` can also use a validation XSLT that was
+    saved from the ``validator_xslt`` property.
 
     Schematron is a less well known, but very powerful schema language.  The main
     idea is to use the capabilities of XPath to put restrictions on the structure
@@ -218,7 +337,7 @@ class Schematron(_etree._Validator):
     def __init__(self, etree=None, file=None, include=True, expand=True,
                  include_params={}, expand_params={}, compile_params={},
                  store_schematron=False, store_xslt=False, store_report=False,
-                 phase=None):
+                 phase=None, cache=False, cache_dir=None):
         super(Schematron, self).__init__()
 
         self._store_report = store_report
@@ -241,6 +360,67 @@ class Schematron(_etree._Validator):
                 "No tree or file given: %s" % sys.exc_info()[1])
         if root is None:
              raise ValueError("Empty tree")
+
+        cache_key = None
+        if cache or cache_dir is not None:
+            cache_key = self._cache_key(
+                root, include, expand, include_params, expand_params,
+                compile_params, phase)
+        entry = None
+        if cache_key is not None:
+            entry = self._lookup_cache(cache_key, cache, cache_dir)
+            if entry is not None and store_schematron and entry[0] is None:
+                # read from the cache directory, no schematron available
+                entry = None
+        if entry is None:
+            schematron, validator_xslt = self._build_validator_xslt(
+                root, include, expand, include_params, expand_params,
+                compile_params, phase)
+            entry = (schematron, validator_xslt, _etree.XSLT(validator_xslt))
+            if cache_key is not None:
+                if cache:
+                    _cache_validator((self.__class__, cache_key), entry)
+                if cache_dir is not None:
+                    _write_cached_validator_xslt(
+                        os.path.join(cache_dir, cache_key + '.xsl'),
+                        validator_xslt)
+        schematron, validator_xslt, self._validator = entry
+        if store_schematron:
+            self._schematron = schematron
+        if store_xslt:
+            self._validator_xslt = validator_xslt
+
+    @classmethod
+    def from_validator_xslt(cls, validator_xslt=None, file=None,
+                            store_xslt=False, store_report=False):
+        """Create a validator from a validation XSLT document that was
+        previously generated by Schematron, e.g. to reload a validator that
+        was saved from the ``validator_xslt`` property.
+
+        Pass an Element or ElementTree, or a filename as keyword argument
+        'file'.  None of the Schematron pipeline steps are executed.
+        """
+        if validator_xslt is None:
+            if file is None:
+                raise ValueError("No tree or file given")
+            validator_xslt = _etree.parse(file)
+        self = cls.__new__(cls)
+        _etree._Validator.__init__(self)
+        self._store_report = store_report
+        self._schematron = None
+        self._validator_xslt = None
+        self._validation_report = None
+        self._validator = _etree.XSLT(validator_xslt)
+        if store_xslt:
+            self._validator_xslt = validator_xslt
+        return self
+
+    def _build_validator_xslt(self, root, include, expand, include_params,
+                              expand_params, compile_params, phase):
+        """Run the Schematron pipeline steps on a schema document.
+        Returns the (included-and-expanded) schematron document tree and the
+        validation XSLT document tree.
+        """
         if root.tag == _schematron_root:
             schematron = root
         else:
@@ -258,16 +438,51 @@ class Schematron(_etree._Validator):
             raise _etree.SchematronParseError(
                 "invalid schematron schema: %s" %
                 schematron_schema_valid.error_log)
-        if store_schematron:
-            self._schematron = schematron
         # add new compile keyword args here if exposing them
         compile_kwargs = {'phase': phase}
         compile_params = _stylesheet_param_dict(compile_params, compile_kwargs)
         validator_xslt = self._compile(schematron, **compile_params)
-        if store_xslt:
-            self._validator_xslt = validator_xslt
-        self._validator = _etree.XSLT(validator_xslt)
-        
+        return schematron, validator_xslt
+
+    def _cache_key(self, root, include, expand, include_params, expand_params,
+                   compile_params, phase):
+        """Return a hash of the schema document, the pipeline arguments and
+        the lxml version, or None if the arguments cannot be used in a cache
+        key.  The version changes whenever the pipeline stylesheets that
+        are shipped with lxml may have changed.
+        """
+        params = [_cache_key_params(include_params),
+                  _cache_key_params(expand_params),
+                  _cache_key_params(compile_params),
+                  _cache_key_params({'phase': phase})]
+        if None in params:
+            return None
+        cls = self.__class__
+        options = repr((_etree.LXML_VERSION, cls.__module__, cls.__name__,
+                        root.getroottree().docinfo.URL,
+                        bool(include), bool(expand), params))
+        digest = _sha1(_etree.tostring(root))
+        digest.update(options.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _lookup_cache(self, cache_key, cache, cache_dir):
+        """Return a cached (schematron, validator_xslt, validator) tuple or
+        None.
+        """
+        if cache:
+            entry = _validator_cache.get((self.__class__, cache_key))
+            if entry is not None:
+                return entry
+        if cache_dir is not None:
+            validator_xslt = _read_cached_validator_xslt(
+                os.path.join(cache_dir, cache_key + '.xsl'))
+            if validator_xslt is not None:
+                entry = (None, validator_xslt, _etree.XSLT(validator_xslt))
+                if cache:
+                    _cache_validator((self.__class__, cache_key), entry)
+                return entry
+        return None
+
     def __call__(self, etree):
         """Validate doc using Schematron.
 
@@ -1,6 +1,7 @@
 # iterparse -- event-driven parsing
 
 DEF __ITERPARSE_CHUNK_SIZE = 32768
+DEF __ITERPARSE_MIN_CHUNK_EVENTS = 16
 
 ctypedef enum _IterparseEventFilter:
     ITERPARSE_FILTER_START     =  1
@@ -121,6 +122,10 @@ cdef class _IterparseContext(_ParserContext):
             self._matcher = _MultiTagMatcher(tag)
 
     cdef int startDocument(self, xmlDoc* c_doc) except -1:
+        # feed parsers can parse more than one document
+        self._root = None
+        del self._node_stack[:]
+        del self._ns_stack[:]
         self._doc = _documentFactory(c_doc, None)
         if self._matcher is not None:
             self._matcher.cacheTags(self._doc, True) # force entry in libxml2 dict
@@ -137,6 +142,10 @@ cdef class _IterparseContext(_ParserContext):
             self._ns_stack.append(ns_count)
         if self._root is None:
             self._root = self._doc.getroot()
+        if not self._event_filter & (ITERPARSE_FILTER_START |
+                                     ITERPARSE_FILTER_END):
+            # only namespace events requested, no need for a proxy
+            return 0
         if self._matcher is None or self._matcher.matches(c_node):
             node = _elementFactory(self._doc, c_node)
             if self._event_filter & ITERPARSE_FILTER_END:
@@ -178,11 +187,50 @@ cdef class _IterparseContext(_ParserContext):
         self._events.append( (event, node) )
         return 0
 
+    cdef object _popEvent(self):
+        u"Return the next collected event and remove it, or None."
+        events = self._events
+        if len(events) <= self._event_index:
+            if self._event_index:
+                del events[:]
+                self._event_index = 0
+            return None
+        item = events[self._event_index]
+        self._event_index += 1
+        return item
+
     cdef void _assureDocGetsFreed(self):
         if self._c_ctxt.myDoc is not NULL and self._doc is None:
             tree.xmlFreeDoc(self._c_ctxt.myDoc)
             self._c_ctxt.myDoc = NULL
 
+    cdef object _handleParseResult(self, _BaseParser parser,
+                                   xmlDoc* result, filename):
+        u"""Check the result of a feed parser run.  The document was already
+        handed out with the events, so it must not get freed here.
+        """
+        cdef xmlparser.xmlParserCtxt* c_ctxt = self._c_ctxt
+        cdef bint well_formed
+        if self._doc is not None and self._doc._c_doc is not c_ctxt.myDoc:
+            # left over from a previous run
+            self._doc = None
+        well_formed = result is not NULL and (
+            parser._parse_options & xmlparser.XML_PARSE_RECOVER or
+            c_ctxt.wellFormed)
+        if well_formed and self._validator is not None:
+            well_formed = self._validator.isvalid()
+        if self._has_raised() or not well_formed:
+            del self._events[:]
+            self._event_index = 0
+            self._assureDocGetsFreed()
+            c_ctxt.myDoc = NULL
+            self._raise_if_stored()
+            _raiseParseError(c_ctxt, filename, self._error_log)
+        if self._doc is None:
+            self._doc = _documentFactory(c_ctxt.myDoc, parser)
+        c_ctxt.myDoc = NULL
+        return self._doc
+
 
 cdef inline void _pushSaxStartDocument(_IterparseContext context,
                                        xmlDoc* c_doc):
@@ -311,8 +359,57 @@ cdef inline xmlNode* _iterparseFindLastNode(xmlparser.xmlParserCtxt* c_ctxt):
     else:
         return c_ctxt.node.next
 
+cdef int _buildIterparseParseOptions(
+        bint attribute_defaults, bint dtd_validation, bint load_dtd,
+        bint no_network, bint remove_blank_text, bint compact,
+        bint resolve_entities, bint strip_cdata, bint huge_tree):
+    cdef int parse_options = _XML_DEFAULT_PARSE_OPTIONS
+    if load_dtd:
+        parse_options = parse_options | xmlparser.XML_PARSE_DTDLOAD
+    if dtd_validation:
+        parse_options = parse_options | (xmlparser.XML_PARSE_DTDVALID |
+                                         xmlparser.XML_PARSE_DTDLOAD)
+    if attribute_defaults:
+        parse_options = parse_options | (xmlparser.XML_PARSE_DTDATTR |
+                                         xmlparser.XML_PARSE_DTDLOAD)
+    if remove_blank_text:
+        parse_options = parse_options | xmlparser.XML_PARSE_NOBLANKS
+    if huge_tree:
+        parse_options = parse_options | xmlparser.XML_PARSE_HUGE
+    if not no_network:
+        parse_options = parse_options ^ xmlparser.XML_PARSE_NONET
+    if not compact:
+        parse_options = parse_options ^ xmlparser.XML_PARSE_COMPACT
+    if not resolve_entities:
+        parse_options = parse_options ^ xmlparser.XML_PARSE_NOENT
+    if not strip_cdata:
+        parse_options = parse_options ^ xmlparser.XML_PARSE_NOCDATA
+    return parse_options
+
+cdef int _discardProcessedNode(_Element element) except -1:
+    u"""Remove the content of an element and its preceding siblings from the
+    tree, freeing them unless they are still referenced from Python.
+    """
+    cdef xmlNode* c_node = element._c_node
+    cdef xmlNode* c_sibling
+    cdef xmlNode* c_prev
+    _removeText(c_node.children)
+    while c_node.children is not NULL:
+        # removes the tail text along with each child
+        _removeNode(element._doc, c_node.children)
+    if c_node.parent is NULL or c_node.parent.type != tree.XML_ELEMENT_NODE:
+        return 0
+    # keep the text of the parent, but remove all siblings and their tails
+    c_sibling = c_node.prev
+    while c_sibling is not NULL:
+        c_prev = c_sibling.prev
+        if _isElement(c_sibling):
+            _removeNode(element._doc, c_sibling)
+        c_sibling = c_prev
+    return 0
+
 cdef class iterparse(_BaseParser):
-    u"""iterparse(self, source, events=("end",), tag=None, attribute_defaults=False, dtd_validation=False, load_dtd=False, no_network=True, remove_blank_text=False, remove_comments=False, remove_pis=False, encoding=None, html=False, huge_tree=False, schema=None)
+    u"""iterparse(self, source, events=("end",), tag=None, attribute_defaults=False, dtd_validation=False, load_dtd=False, no_network=True, remove_blank_text=False, remove_comments=False, remove_pis=False, encoding=None, html=False, huge_tree=False, schema=None, chunk_size=32768, max_chunk_size=None, discard=None)
 
     Incremental parser.
 
@@ -330,8 +427,12 @@ cdef class iterparse(_BaseParser):
     generated.
 
     The additional ``tag`` argument restricts the 'start' and 'end' events to
-    those elements that match the given tag.  By default, events are generated
-    for all elements.  Note that the 'start-ns' and 'end-ns' events are not
+    those elements that match the given tag.  It can also be a sequence of
+    tags, and each tag may use the wildcards ``{ns}*`` for any element in a
+    namespace and ``{*}name`` for a local name in any (or no) namespace.
+    Elements that do not match are skipped inside of the parser, without
+    creating Python objects for them.  By default, events are generated for
+    all elements.  Note that the 'start-ns' and 'end-ns' events are not
     impacted by this restriction.
 
     The other keyword arguments in the constructor are mainly based on the
@@ -355,12 +456,36 @@ cdef class iterparse(_BaseParser):
     Other keyword arguments:
      - encoding: override the document encoding
      - schema: an XMLSchema to validate against
+     - chunk_size: the number of bytes to read from the source at a time
+     - max_chunk_size: let the chunk size grow up to this limit while
+       the chunks that were read produce only few events
+     - discard: set to "processed" to free the tree behind the parser
+
+    File-like sources that provide a ``readinto()`` method are read into
+    a single reusable buffer instead of creating a new bytes object for
+    each chunk.  Larger chunks reduce the per-read overhead for large or
+    slow sources, such as sockets or compressed streams, at the cost of
+    more memory per parser.  The adaptive mode doubles the chunk size
+    whenever a chunk yields less than a handful of events.
+
+    Passing ``discard="processed"`` keeps the memory usage constant for
+    large documents.  Once the next event is requested after an 'end'
+    event, the children and text of the element are removed, together
+    with all of its preceding siblings and their tails.  Elements that
+    are still referenced from Python stay alive but are no longer part
+    of the tree.  Note that the element of an 'end' event will therefore
+    only contain the (empty) children that were not yet discarded.
     """
     cdef object _tag
     cdef object _events
     cdef readonly object root
     cdef object _source
     cdef object _buffer
+    cdef object _readinto
+    cdef _Element _processed_node
+    cdef bint _discard_processed
+    cdef int _chunk_size
+    cdef int _max_chunk_size
     cdef int (*_parse_chunk)(xmlparser.xmlParserCtxt* ctxt,
                              const_char* chunk, int size, int terminate) nogil
     cdef bint _close_source_after_read
@@ -370,10 +495,29 @@ cdef class iterparse(_BaseParser):
                  load_dtd=False, no_network=True, remove_blank_text=False,
                  compact=True, resolve_entities=True, remove_comments=False,
                  remove_pis=False, strip_cdata=True, encoding=None,
-                 html=False, huge_tree=False, XMLSchema schema=None):
+                 html=False, huge_tree=False, XMLSchema schema=None,
+                 chunk_size=__ITERPARSE_CHUNK_SIZE, max_chunk_size=None,
+                 discard=None):
         cdef _IterparseContext context
         cdef char* c_encoding
         cdef int parse_options
+        if discard is None:
+            self._discard_processed = False
+        elif discard == u'processed':
+            self._discard_processed = True
+        else:
+            raise ValueError, u"invalid discard mode '%s'" % discard
+        self._chunk_size = chunk_size
+        if self._chunk_size < 1:
+            raise ValueError, u"chunk_size must be a positive integer"
+        if max_chunk_size is None:
+            self._max_chunk_size = self._chunk_size
+        else:
+            self._max_chunk_size = max_chunk_size
+            if self._max_chunk_size < self._chunk_size:
+                raise ValueError, \
+                    u"max_chunk_size must not be smaller than chunk_size"
+
         if not hasattr(source, 'read'):
             filename = _encodeFilename(source)
             if not python.IS_PYTHON3:
@@ -383,6 +527,9 @@ cdef class iterparse(_BaseParser):
         else:
             filename = _encodeFilename(_getFilenameForFile(source))
             self._close_source_after_read = False
+            if python.PY_VERSION_HEX >= 0x02060000 and \
+                    python.PyFile_AsFile(source) is NULL:
+                self._readinto = getattr(source, 'readinto', None)
 
         self._source = source
         if html:
@@ -393,27 +540,10 @@ cdef class iterparse(_BaseParser):
         self._events = events
         self._tag = tag
 
-        parse_options = _XML_DEFAULT_PARSE_OPTIONS
-        if load_dtd:
-            parse_options = parse_options | xmlparser.XML_PARSE_DTDLOAD
-        if dtd_validation:
-            parse_options = parse_options | (xmlparser.XML_PARSE_DTDVALID |
-                                             xmlparser.XML_PARSE_DTDLOAD)
-        if attribute_defaults:
-            parse_options = parse_options | (xmlparser.XML_PARSE_DTDATTR |
-                                             xmlparser.XML_PARSE_DTDLOAD)
-        if remove_blank_text:
-            parse_options = parse_options | xmlparser.XML_PARSE_NOBLANKS
-        if huge_tree:
-            parse_options = parse_options | xmlparser.XML_PARSE_HUGE
-        if not no_network:
-            parse_options = parse_options ^ xmlparser.XML_PARSE_NONET
-        if not compact:
-            parse_options = parse_options ^ xmlparser.XML_PARSE_COMPACT
-        if not resolve_entities:
-            parse_options = parse_options ^ xmlparser.XML_PARSE_NOENT
-        if not strip_cdata:
-            parse_options = parse_options ^ xmlparser.XML_PARSE_NOCDATA
+        parse_options = _buildIterparseParseOptions(
+            attribute_defaults, dtd_validation, load_dtd, no_network,
+            remove_blank_text, compact, resolve_entities, strip_cdata,
+            huge_tree)
 
         _BaseParser.__init__(self, parse_options, html, schema,
                              remove_comments, remove_pis, strip_cdata,
@@ -465,6 +595,7 @@ cdef class iterparse(_BaseParser):
             close = None
         finally:
             self._source = None
+            self._readinto = None
         if close is not None:
             close()
 
@@ -476,6 +607,9 @@ cdef class iterparse(_BaseParser):
 
     def __next__(self):
         cdef _IterparseContext context = <_IterparseContext>self._push_parser_context
+        if self._processed_node is not None:
+            _discardProcessedNode(self._processed_node)
+            self._processed_node = None
         events = context._events
         if len(events) <= context._event_index:
             del events[:]
@@ -487,6 +621,8 @@ cdef class iterparse(_BaseParser):
                 raise StopIteration
         item = events[context._event_index]
         context._event_index += 1
+        if self._discard_processed and item[0] == u'end':
+            self._processed_node = item[1]
         return item
 
     cdef _read_more_events(self, _IterparseContext context):
@@ -500,23 +636,40 @@ cdef class iterparse(_BaseParser):
         c_stream = python.PyFile_AsFile(self._source)
         while not events:
             if c_stream is NULL:
-                data = self._source.read(__ITERPARSE_CHUNK_SIZE)
-                if not isinstance(data, bytes):
-                    self._close_source()
-                    raise TypeError("reading file objects must return bytes objects")
-                c_data_len = python.PyBytes_GET_SIZE(data)
-                c_data = _cstr(data)
+                if self._readinto is not None:
+                    if self._buffer is None:
+                        self._buffer = python.PyByteArray_FromStringAndSize(
+                            NULL, self._chunk_size)
+                    data = self._readinto(self._buffer)
+                    if data is None:
+                        self._close_source()
+                        raise TypeError(
+                            "reading file objects in non-blocking mode is not supported")
+                    c_data_len = data
+                    # readinto() may have resized the buffer
+                    if c_data_len < 0 or c_data_len > \
+                            python.PyByteArray_GET_SIZE(self._buffer):
+                        self._close_source()
+                        raise ValueError("readinto() returned an invalid length")
+                    c_data = python.PyByteArray_AS_STRING(self._buffer)
+                else:
+                    data = self._source.read(self._chunk_size)
+                    if not isinstance(data, bytes):
+                        self._close_source()
+                        raise TypeError("reading file objects must return bytes objects")
+                    c_data_len = python.PyBytes_GET_SIZE(data)
+                    c_data = _cstr(data)
                 done = (c_data_len == 0)
                 error = self._parse_chunk(pctxt, c_data, c_data_len, done)
             else:
                 if self._buffer is None:
                     self._buffer = python.PyBytes_FromStringAndSize(
-                        NULL, __ITERPARSE_CHUNK_SIZE)
+                        NULL, self._chunk_size)
                 c_data = _cstr(self._buffer)
                 with nogil:
                     c_data_len = stdio.fread(
-                        c_data, 1, __ITERPARSE_CHUNK_SIZE, c_stream)
-                    if c_data_len < __ITERPARSE_CHUNK_SIZE:
+                        c_data, 1, self._chunk_size, c_stream)
+                    if c_data_len < self._chunk_size:
                         if stdio.ferror(c_stream):
                             error = 1
                         elif stdio.feof(c_stream):
@@ -528,6 +681,9 @@ cdef class iterparse(_BaseParser):
                 self._close_source()
                 self._buffer = None
                 break
+            if len(events) < __ITERPARSE_MIN_CHUNK_EVENTS and \
+                    self._chunk_size < self._max_chunk_size:
+                self._growChunkSize()
 
         if not error and context._validator is not None:
             error = not context._validator.isvalid()
@@ -536,12 +692,195 @@ cdef class iterparse(_BaseParser):
             context._assureDocGetsFreed()
             _raiseParseError(pctxt, self._filename, context._error_log)
 
+    cdef void _growChunkSize(self):
+        if self._chunk_size > self._max_chunk_size // 2:
+            self._chunk_size = self._max_chunk_size
+        else:
+            self._chunk_size *= 2
+        # reallocate the read buffer on next use
+        self._buffer = None
+
+
+@cython.final
+@cython.internal
+cdef class _AsyncResult:
+    u"""An awaitable for a result that is already available.
+    """
+    cdef object _result
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        raise StopIteration(self._result)
+
+cdef _AsyncResult _asyncResult(result):
+    cdef _AsyncResult async_result = _AsyncResult.__new__(_AsyncResult)
+    async_result._result = result
+    return async_result
+
+@cython.final
+@cython.internal
+cdef class _AsyncIterparseEvents:
+    u"""Asynchronous iterator over the events that the parser collected.
+    """
+    cdef _IterparseContext _context
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        item = self._context._popEvent()
+        if item is None:
+            raise _StopAsyncIteration
+        return _asyncResult(item)
+
+@cython.final
+@cython.internal
+cdef class _IterparseEvents:
+    u"""Iterator over the events that the parser collected.
+    """
+    cdef _IterparseContext _context
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = self._context._popEvent()
+        if item is None:
+            raise StopIteration
+        return item
+
+cdef class XMLPullParser(XMLParser):
+    u"""XMLPullParser(self, events=None, *, tag=None, **kwargs)
+
+    XML parser that collects parse events for incremental processing.
+
+    Data is passed in through the ``feed()`` method, as for a normal
+    ``XMLParser``.  The ``read_events()`` method then returns an iterator
+    over the (event, element) tuples that the data fed so far has
+    produced, in the same way as ``iterparse()`` generates them while
+    reading from a file.  The events are collected in C, without calling
+    back into Python code for each of them.
+
+    The ``events`` argument is a sequence of event names (default:
+    ``("end",)``) and ``tag`` restricts the 'start' and 'end' events to
+    matching elements, see ``iterparse()``.  All other keyword arguments
+    are passed to ``XMLParser``, except for ``target``, which is not
+    supported.
+    """
+    def __init__(self, events=None, *, tag=None, **kwargs):
+        if u'target' in kwargs:
+            raise TypeError, u"XMLPullParser does not support parser targets"
+        if events is None:
+            events = (u"end",)
+        _buildIterparseEventFilter(events)
+        self._push_events = events
+        self._push_tag = tag
+        XMLParser.__init__(self, **kwargs)
+
+    def read_events(self):
+        u"""read_events(self)
+
+        Returns an iterator over the events that were collected by the
+        previous calls to ``feed()`` and ``close()``.  Iterating over it
+        removes the events from the parser.
+        """
+        cdef _IterparseEvents iterator
+        iterator = _IterparseEvents.__new__(_IterparseEvents)
+        iterator._context = <_IterparseContext>self._getPushParserContext()
+        return iterator
+
+cdef class AsyncIterParser(_FeedParser):
+    u"""AsyncIterParser(self, events=("end",), tag=None, attribute_defaults=False, dtd_validation=False, load_dtd=False, no_network=True, remove_blank_text=False, remove_comments=False, remove_pis=False, encoding=None, html=False, huge_tree=False, schema=None)
+
+    Incremental parser for asynchronous code.
+
+    Generates the same (event, element) tuples as ``iterparse()``, but
+    instead of reading from a file, it receives its data through the
+    ``feed()`` method, e.g. from an ``asyncio.StreamReader``.  The
+    ``feed()`` and ``close()`` methods return awaitables, and the
+    ``events()`` method returns an asynchronous iterator over the events
+    that the data fed so far has produced::
+
+        parser = AsyncIterParser(events=("start", "end"))
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            await parser.feed(data)
+            async for event, element in parser.events():
+                ...
+        root = await parser.close()
+        async for event, element in parser.events():
+            ...
+
+    Parsing itself happens synchronously inside of ``feed()`` and
+    ``close()``, so each call only blocks for the chunk that is passed.
+    See ``iterparse()`` for the meaning of the keyword arguments.
+    """
+    def __init__(self, events=(u"end",), *, tag=None,
+                 attribute_defaults=False, dtd_validation=False,
+                 load_dtd=False, no_network=True, remove_blank_text=False,
+                 compact=True, resolve_entities=True, remove_comments=False,
+                 remove_pis=False, strip_cdata=True, encoding=None,
+                 html=False, huge_tree=False, XMLSchema schema=None):
+        cdef int parse_options
+        if html:
+            # make sure we're not looking for namespaces
+            events = tuple([ event for event in events
+                             if event != u'start-ns' and event != u'end-ns' ])
+        _buildIterparseEventFilter(events)
+        self._push_events = events
+        self._push_tag = tag
+
+        parse_options = _buildIterparseParseOptions(
+            attribute_defaults, dtd_validation, load_dtd, no_network,
+            remove_blank_text, compact, resolve_entities, strip_cdata,
+            huge_tree)
+        _BaseParser.__init__(self, parse_options, html, schema,
+                             remove_comments, remove_pis, strip_cdata,
+                             None, None, encoding)
+
+    def feed(self, data):
+        u"""feed(self, data)
+
+        Feeds data to the parser and returns an awaitable.  Parse errors
+        are raised immediately.
+        """
+        _FeedParser.feed(self, data)
+        return _asyncResult(None)
+
+    def close(self):
+        u"""close(self)
+
+        Terminates feeding data to this parser.  Returns an awaitable that
+        provides the root element of the parsed document.  Events that the
+        end of the data produced remain available through ``events()``.
+        """
+        return _asyncResult(_FeedParser.close(self))
+
+    def events(self):
+        u"""events(self)
+
+        Returns an asynchronous iterator over the events that were
+        collected by the previous calls to ``feed()`` and ``close()``.
+        Iterating over it removes the events from the parser.
+        """
+        cdef _AsyncIterparseEvents iterator
+        iterator = _AsyncIterparseEvents.__new__(_AsyncIterparseEvents)
+        iterator._context = <_IterparseContext>self._getPushParserContext()
+        return iterator
+
 
 cdef class iterwalk:
     u"""iterwalk(self, element_or_tree, events=("end",), tag=None)
 
     A tree walker that generates events from an existing tree as if it
     was parsing XML data with ``iterparse()``.
+
+    The ``tag`` argument accepts the same tag names, wildcards and
+    sequences of tags as ``iterparse()``.
     """
     cdef _MultiTagMatcher _matcher
     cdef list   _node_stack
@@ -7,7 +7,7 @@ from __future__ import absolute_import
 __docformat__ = u"restructuredtext en"
 
 __all__ = [
-    'AttributeBasedElementClassLookup', 'C14NError', 'CDATA',
+    'AsyncIterParser', 'AttributeBasedElementClassLookup', 'C14NError', 'CDATA',
     'Comment', 'CommentBase', 'CustomElementClassLookup', 'DEBUG',
     'DTD', 'DTDError', 'DTDParseError', 'DTDValidateError',
     'DocumentInvalid', 'ETCompatXMLParser', 'ETXPath', 'Element',
@@ -19,22 +19,28 @@ __all__ = [
     'LIBXSLT_COMPILED_VERSION', 'LIBXSLT_VERSION', 'LXML_VERSION',
     'LxmlError', 'LxmlRegistryError', 'LxmlSyntaxError',
     'NamespaceRegistryError', 'PI', 'PIBase', 'ParseError',
-    'ParserBasedElementClassLookup', 'ParserError', 'ProcessingInstruction',
+    'ParserBasedElementClassLookup', 'ParserError', 'ParserPool',
+    'ProcessingInstruction',
     'PyErrorLog', 'PythonElementClassLookup', 'QName', 'RelaxNG',
     'RelaxNGError', 'RelaxNGErrorTypes', 'RelaxNGParseError',
     'RelaxNGValidateError', 'Resolver', 'Schematron', 'SchematronError',
     'SchematronParseError', 'SchematronValidateError', 'SerialisationError',
     'SubElement', 'TreeBuilder', 'XInclude', 'XIncludeError', 'XML',
-    'XMLDTDID', 'XMLID', 'XMLParser', 'XMLSchema', 'XMLSchemaError',
+    'XMLDTDID', 'XMLID', 'XMLParser', 'XMLPullParser', 'XMLSchema',
+    'XMLSchemaError',
     'XMLSchemaParseError', 'XMLSchemaValidateError', 'XMLSyntaxError',
     'XMLTreeBuilder', 'XPath', 'XPathDocumentEvaluator', 'XPathError',
     'XPathEvalError', 'XPathEvaluator', 'XPathFunctionError', 'XPathResultError',
     'XPathSyntaxError', 'XSLT', 'XSLTAccessControl', 'XSLTApplyError',
     'XSLTError', 'XSLTExtension', 'XSLTExtensionError', 'XSLTParseError',
+    'XSLTProfile',
     'XSLTSaveError', 'cleanup_namespaces', 'clear_error_log', 'dump',
-    'fromstring', 'fromstringlist', 'get_default_parser', 'iselement',
-    'iterparse', 'iterwalk', 'parse', 'parseid', 'register_namespace',
-    'set_default_parser', 'set_element_class_lookup', 'strip_attributes',
+    'fromstring', 'fromstringlist', 'get_default_parser',
+    'get_xpath_cache_info', 'iselement',
+    'iterparse', 'iterwalk', 'parse', 'parse_many', 'parseid',
+    'register_namespace',
+    'set_default_parser', 'set_element_class_lookup',
+    'set_xpath_cache_size', 'strip_attributes',
     'strip_elements', 'strip_tags', 'tostring', 'tostringlist', 'tounicode',
     'use_global_python_log'
     ]
@@ -69,6 +75,13 @@ except AttributeError:
     # Python 3
     _unicode = __builtin__.str
 
+cdef object _StopAsyncIteration
+try:
+    _StopAsyncIteration = __builtin__.StopAsyncIteration
+except AttributeError:
+    # Python < 3.5
+    _StopAsyncIteration = StopIteration
+
 del __builtin__
 
 cdef object os_path_abspath
@@ -1470,10 +1483,20 @@ cdef public class _Element [ type LxmlElementType, object LxmlElement ]:
         u"""xpath(self, _path, namespaces=None, extensions=None, smart_strings=True, **_variables)
 
         Evaluate an xpath expression using the element as context node.
+
+        Compiled expressions are kept in a global cache, see
+        ``set_xpath_cache_size()``.
         """
+        cdef XPath compiled
+        cdef XPathElementEvaluator evaluator
+        compiled = _XPATH_CACHE.get(_path, namespaces, extensions, True,
+                                    smart_strings)
+        if compiled is not None:
+            return compiled(self, **_variables)
         evaluator = XPathElementEvaluator(self, namespaces=namespaces,
                                           extensions=extensions,
                                           smart_strings=smart_strings)
+        evaluator._single_use = True
         return evaluator(_path, **_variables)
 
 
@@ -1746,14 +1769,18 @@ cdef public class _ElementTree [ type LxmlElementTreeType,
         assert self._context_node is not None, \
                u"ElementTree not initialized, missing root"
 
-    def parse(self, source, _BaseParser parser=None, *, base_url=None):
-        u"""parse(self, source, parser=None, base_url=None)
+    def parse(self, source, _BaseParser parser=None, *, base_url=None,
+              bint mmap=False):
+        u"""parse(self, source, parser=None, base_url=None, mmap=False)
 
         Updates self with the content of source and returns its root
         """
         cdef _Document doc = None
         try:
-            doc = _parseDocument(source, parser, base_url)
+            if mmap:
+                doc = _parseMappedDocument(source, parser, base_url)
+            else:
+                doc = _parseDocument(source, parser, base_url)
             self._context_node = doc.getroot()
             if self._context_node is None:
                 self._doc = doc
@@ -2087,10 +2114,12 @@ cdef public class _ElementTree [ type LxmlElementTreeType,
         against the same document, it is more efficient to use
         XPathEvaluator directly.
         """
+        cdef XPathDocumentEvaluator evaluator
         self._assertHasRoot()
         evaluator = XPathDocumentEvaluator(self, namespaces=namespaces,
                                            extensions=extensions,
                                            smart_strings=smart_strings)
+        evaluator._single_use = True
         return evaluator(_path, **_variables)
 
     def xslt(self, _xslt, extensions=None, access_control=None, **_kw):
@@ -3168,8 +3197,8 @@ def tounicode(element_or_tree, *, method=u"xml", bint pretty_print=False,
         raise TypeError, u"Type '%s' cannot be serialized." % \
             type(element_or_tree)
 
-def parse(source, _BaseParser parser=None, *, base_url=None):
-    u"""parse(source, parser=None, base_url=None)
+def parse(source, _BaseParser parser=None, *, base_url=None, bint mmap=False):
+    u"""parse(source, parser=None, base_url=None, mmap=False)
 
     Return an ElementTree object loaded with source elements.  If no parser
     is provided as second argument, the default parser is used.
@@ -3180,6 +3209,8 @@ def parse(source, _BaseParser parser=None, *, base_url=None):
     - a file object
     - a file-like object
     - a URL using the HTTP or FTP protocol
+    - an object that supports the buffer protocol, e.g. a ``bytearray``
+      or an ``mmap``, which is parsed in place without copying it
 
     To parse from a string, use the ``fromstring()`` function instead.
 
@@ -3191,10 +3222,18 @@ def parse(source, _BaseParser parser=None, *, base_url=None):
     The ``base_url`` keyword allows setting a URL for the document
     when parsing from a file-like object.  This is needed when looking
     up external entities (DTD, XInclude, ...) with relative paths.
+
+    Passing ``mmap=True`` maps a local file into memory and parses it
+    from there in one step instead of reading it in small chunks.  This
+    is usually faster for large files.  Sources that cannot be mapped
+    (URLs, file objects, compressed files) are parsed as usual.
     """
     cdef _Document doc
     try:
-        doc = _parseDocument(source, parser, base_url)
+        if mmap:
+            doc = _parseMappedDocument(source, parser, base_url)
+        else:
+            doc = _parseDocument(source, parser, base_url)
         return _elementTreeFactory(doc, None)
     except _TargetParserResult, result_container:
         return result_container.result
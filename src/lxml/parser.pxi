@@ -404,6 +404,21 @@ cdef int _readFilelikeParser(void* ctxt, char* c_buffer, int c_size) with gil:
 cdef int _readFileParser(void* ctxt, char* c_buffer, int c_size) nogil:
     return stdio.fread(c_buffer, 1,  c_size, <stdio.FILE*>ctxt)
 
+# A memory area that libxml2 reads in chunks, used for documents that
+# exceed the size limit of its in-memory parser API.
+cdef struct _MemoryReader:
+    const_char* c_data
+    Py_ssize_t remaining
+
+cdef int _readMemoryParser(void* ctxt, char* c_buffer, int c_size) nogil:
+    cdef _MemoryReader* c_reader = <_MemoryReader*>ctxt
+    if c_size > c_reader.remaining:
+        c_size = <int>c_reader.remaining
+    cstring_h.memcpy(c_buffer, c_reader.c_data, c_size)
+    c_reader.c_data += c_size
+    c_reader.remaining -= c_size
+    return c_size
+
 ############################################################
 ## support for custom document loaders
 ############################################################
@@ -483,14 +498,25 @@ xmlparser.xmlSetExternalEntityLoader(<xmlparser.xmlExternalEntityLoader>_local_r
 ## Parsers
 ############################################################
 
+# A growing array of errors that were reported while parsing without
+# the GIL.  They are converted into log entries after parsing.
+cdef struct _ParserErrorBuffer:
+    xmlerror.xmlError* c_errors
+    int count
+    int size
+
 @cython.internal
 cdef class _ParserContext(_ResolverContext):
     cdef _ErrorLog _error_log
     cdef _ParserSchemaValidationContext _validator
     cdef xmlparser.xmlParserCtxt* _c_ctxt
     cdef python.PyThread_type_lock _lock
+    cdef _ParserErrorBuffer _c_error_buffer
     def __cinit__(self):
         self._c_ctxt = NULL
+        self._c_error_buffer.c_errors = NULL
+        self._c_error_buffer.count = 0
+        self._c_error_buffer.size = 0
         if not config.ENABLE_THREADING:
             self._lock = NULL
         else:
@@ -504,6 +530,9 @@ cdef class _ParserContext(_ResolverContext):
             python.PyThread_free_lock(self._lock)
         if self._c_ctxt is not NULL:
             xmlparser.xmlFreeParserCtxt(self._c_ctxt)
+        if self._c_error_buffer.c_errors is not NULL:
+            _clearErrorBuffer(&self._c_error_buffer)
+            stdlib.free(self._c_error_buffer.c_errors)
 
     cdef _ParserContext _copy(self):
         cdef _ParserContext context
@@ -525,7 +554,7 @@ cdef class _ParserContext(_ResolverContext):
                     _LIBXML_VERSION_INT >= 20629: # work around bug in libxml2
                 xmlparser.xmlClearParserCtxt(self._c_ctxt)
 
-    cdef int prepare(self) except -1:
+    cdef int prepare(self, bint buffer_errors=False) except -1:
         cdef int result
         if config.ENABLE_THREADING and self._lock is not NULL:
             with nogil:
@@ -534,7 +563,13 @@ cdef class _ParserContext(_ResolverContext):
             if result == 0:
                 raise ParserError, u"parser locking failed"
         self._error_log.clear()
-        self._c_ctxt.sax.serror = _receiveParserError
+        if buffer_errors and self._validator is None:
+            # collect errors without acquiring the GIL during parsing,
+            # flushErrorBuffer() passes them on to the error log
+            self._c_ctxt.sax._private = &self._c_error_buffer
+            self._c_ctxt.sax.serror = _bufferParserError
+        else:
+            self._c_ctxt.sax.serror = _receiveParserError
         if self._validator is not None:
             self._validator.connect(self._c_ctxt, self._error_log)
         return 0
@@ -542,13 +577,24 @@ cdef class _ParserContext(_ResolverContext):
     cdef int cleanup(self) except -1:
         if self._validator is not None:
             self._validator.disconnect()
+        self.flushErrorBuffer()
         self._resetParserContext()
         self.clear()
         self._c_ctxt.sax.serror = NULL
+        self._c_ctxt.sax._private = NULL
         if config.ENABLE_THREADING and self._lock is not NULL:
             python.PyThread_release_lock(self._lock)
         return 0
 
+    cdef void flushErrorBuffer(self):
+        u"Pass the errors collected during a GIL-free parser run to the log."
+        cdef int i
+        if not self._c_error_buffer.count:
+            return
+        for i in range(self._c_error_buffer.count):
+            self._error_log._receive(&self._c_error_buffer.c_errors[i])
+        _clearErrorBuffer(&self._c_error_buffer)
+
     cdef object _handleParseResult(self, _BaseParser parser,
                                    xmlDoc* result, filename):
         cdef xmlDoc* c_doc
@@ -582,6 +628,45 @@ cdef void _receiveParserError(void* c_context, xmlerror.xmlError* error) nogil:
         else:
             _forwardParserError(<xmlparser.xmlParserCtxt*>c_context, error)
 
+cdef void _bufferParserError(void* c_context, xmlerror.xmlError* error) nogil:
+    # no Python objects here, called without the GIL during parsing !
+    cdef xmlparser.xmlParserCtxt* c_ctxt = <xmlparser.xmlParserCtxt*>c_context
+    if not __DEBUG:
+        return
+    if c_ctxt is NULL or c_ctxt.sax is NULL or c_ctxt.sax._private is NULL or \
+            _appendToErrorBuffer(<_ParserErrorBuffer*>c_ctxt.sax._private, error) < 0:
+        _receiveParserError(c_context, error)
+
+cdef int _appendToErrorBuffer(_ParserErrorBuffer* c_buffer,
+                              xmlerror.xmlError* error) nogil:
+    cdef xmlerror.xmlError* c_error
+    cdef int size
+    if c_buffer.count >= c_buffer.size:
+        size = c_buffer.size * 2 + 8
+        c_error = <xmlerror.xmlError*>stdlib.realloc(
+            c_buffer.c_errors, size * sizeof(xmlerror.xmlError))
+        if c_error is NULL:
+            return -1
+        c_buffer.c_errors = c_error
+        c_buffer.size = size
+    c_error = &c_buffer.c_errors[c_buffer.count]
+    cstring_h.memcpy(c_error, error, sizeof(xmlerror.xmlError))
+    # keep only what the log entries need, the rest will be freed by libxml2
+    c_error.message = <char*>tree.xmlStrdup(<const_xmlChar*>error.message)
+    c_error.file = <char*>tree.xmlStrdup(<const_xmlChar*>error.file)
+    c_error.str1 = c_error.str2 = c_error.str3 = NULL
+    c_buffer.count += 1
+    return 0
+
+cdef void _clearErrorBuffer(_ParserErrorBuffer* c_buffer) nogil:
+    cdef int i
+    for i in range(c_buffer.count):
+        if c_buffer.c_errors[i].message is not NULL:
+            tree.xmlFree(c_buffer.c_errors[i].message)
+        if c_buffer.c_errors[i].file is not NULL:
+            tree.xmlFree(c_buffer.c_errors[i].file)
+    c_buffer.count = 0
+
 cdef int _raiseParseError(xmlparser.xmlParserCtxt* ctxt, filename,
                           _ErrorLog error_log) except 0:
     if filename is not None and \
@@ -724,7 +809,8 @@ cdef class _BaseParser:
                  filename, encoding):
         cdef tree.xmlCharEncodingHandler* enchandler
         cdef int c_encoding
-        if not isinstance(self, (XMLParser, HTMLParser, iterparse)):
+        if not isinstance(self, (XMLParser, HTMLParser, iterparse,
+                                 AsyncIterParser)):
             raise TypeError, u"This class cannot be instantiated"
 
         self._parse_options = parse_options
@@ -772,7 +858,7 @@ cdef class _BaseParser:
     cdef _ParserContext _getPushParserContext(self):
         cdef xmlparser.xmlParserCtxt* pctxt
         if self._push_parser_context is None:
-            self._push_parser_context = self._createContext(self.target)
+            self._push_parser_context = self._createPushContext(self.target)
             if self._schema is not None:
                 self._push_parser_context._validator = \
                     self._schema._newSaxValidator(
@@ -799,6 +885,10 @@ cdef class _BaseParser:
         context._setTarget(target)
         return context
 
+    cdef _ParserContext _createPushContext(self, target):
+        u"Create the context for the feed parser interface."
+        return self._createContext(target)
+
     cdef int _registerHtmlErrorHandler(self, xmlparser.xmlParserCtxt* c_ctxt) except -1:
         cdef xmlparser.xmlSAXHandler* sax = c_ctxt.sax
         if sax is not NULL and sax.initialized and sax.initialized != xmlparser.XML_SAX2_MAGIC:
@@ -924,7 +1014,7 @@ cdef class _BaseParser:
         buffer_len = py_buffer_len
 
         context = self._getParserContext()
-        context.prepare()
+        context.prepare(buffer_errors=True)
         try:
             pctxt = context._c_ctxt
             __GLOBAL_PARSER_CONTEXT.initParserDict(pctxt)
@@ -944,6 +1034,7 @@ cdef class _BaseParser:
                         pctxt, c_text, buffer_len, c_filename, _UNICODE_ENCODING,
                         self._parse_options)
 
+            context.flushErrorBuffer()
             return context._handleParseResultDoc(self, result, None)
         finally:
             context.cleanup()
@@ -956,11 +1047,12 @@ cdef class _BaseParser:
         cdef xmlDoc* result
         cdef xmlparser.xmlParserCtxt* pctxt
         cdef char* c_encoding
-        if c_len > limits.INT_MAX:
-            raise ParserError, u"string is too long to parse it with libxml2"
+        cdef _MemoryReader c_reader
+        c_reader.c_data = c_text
+        c_reader.remaining = c_len
 
         context = self._getParserContext()
-        context.prepare()
+        context.prepare(buffer_errors=True)
         try:
             pctxt = context._c_ctxt
             __GLOBAL_PARSER_CONTEXT.initParserDict(pctxt)
@@ -972,18 +1064,28 @@ cdef class _BaseParser:
 
             with nogil:
                 if self._for_html:
-                    result = htmlparser.htmlCtxtReadMemory(
-                        pctxt, c_text, c_len, c_filename,
-                        c_encoding, self._parse_options)
+                    if c_len > limits.INT_MAX:
+                        result = htmlparser.htmlCtxtReadIO(
+                            pctxt, _readMemoryParser, NULL, &c_reader,
+                            c_filename, c_encoding, self._parse_options)
+                    else:
+                        result = htmlparser.htmlCtxtReadMemory(
+                            pctxt, c_text, c_len, c_filename,
+                            c_encoding, self._parse_options)
                     if result is not NULL:
                         if _fixHtmlDictNames(pctxt.dict, result) < 0:
                             tree.xmlFreeDoc(result)
                             result = NULL
+                elif c_len > limits.INT_MAX:
+                    result = xmlparser.xmlCtxtReadIO(
+                        pctxt, _readMemoryParser, NULL, &c_reader,
+                        c_filename, c_encoding, self._parse_options)
                 else:
                     result = xmlparser.xmlCtxtReadMemory(
                         pctxt, c_text, c_len, c_filename,
                         c_encoding, self._parse_options)
 
+            context.flushErrorBuffer()
             return context._handleParseResultDoc(self, result, None)
         finally:
             context.cleanup()
@@ -997,7 +1099,7 @@ cdef class _BaseParser:
         result = NULL
 
         context = self._getParserContext()
-        context.prepare()
+        context.prepare(buffer_errors=True)
         try:
             pctxt = context._c_ctxt
             __GLOBAL_PARSER_CONTEXT.initParserDict(pctxt)
@@ -1021,6 +1123,7 @@ cdef class _BaseParser:
                         pctxt, c_filename, c_encoding, self._parse_options)
             pctxt.options = orig_options # work around libxml2 problem
 
+            context.flushErrorBuffer()
             return context._handleParseResultDoc(self, result, c_filename)
         finally:
             context.cleanup()
@@ -1035,7 +1138,7 @@ cdef class _BaseParser:
             filename = None
 
         context = self._getParserContext()
-        context.prepare()
+        context.prepare(buffer_errors=True)
         try:
             pctxt = context._c_ctxt
             __GLOBAL_PARSER_CONTEXT.initParserDict(pctxt)
@@ -1043,6 +1146,7 @@ cdef class _BaseParser:
                 filelike, context, filename, self._default_encoding)
             result = file_context._readDoc(pctxt, self._parse_options)
 
+            context.flushErrorBuffer()
             return context._handleParseResultDoc(
                 self, result, filename)
         finally:
@@ -1054,6 +1158,24 @@ cdef class _BaseParser:
 
 cdef class _FeedParser(_BaseParser):
     cdef bint _feed_parser_running
+    # set by subclasses that collect iterparse events while feeding
+    cdef object _push_events
+    cdef object _push_tag
+
+    cdef _ParserContext _createPushContext(self, target):
+        cdef _IterparseContext context
+        if self._push_events is None:
+            return _BaseParser._createPushContext(self, target)
+        context = _IterparseContext()
+        context._setEventFilter(self._push_events, self._push_tag)
+        return context
+
+    cdef _BaseParser _copy(self):
+        cdef _FeedParser parser
+        parser = <_FeedParser>_BaseParser._copy(self)
+        parser._push_events = self._push_events
+        parser._push_tag = self._push_tag
+        return parser
 
     property feed_error_log:
         u"""The error log of the last (or current) run of the feed parser.
@@ -1071,7 +1193,9 @@ cdef class _FeedParser(_BaseParser):
 
         Feeds data to the parser.  The argument should be an 8-bit string
         buffer containing encoded data, although Unicode is supported as long
-        as both string types are not mixed.
+        as both string types are not mixed.  Objects that support the buffer
+        protocol, like ``bytearray`` or ``memoryview``, are parsed in place
+        without copying their content.
 
         This is the main entry point to the consumer interface of a
         parser.  The parser will parse as much of the XML stream as it
@@ -1084,19 +1208,12 @@ cdef class _FeedParser(_BaseParser):
         usage.  You can use the same parser as a feed parser and in
         the ``parse()`` function concurrently.
         """
-        cdef _ParserContext context
-        cdef xmlparser.xmlParserCtxt* pctxt
         cdef Py_ssize_t py_buffer_len
         cdef const_char* c_data
         cdef const_char* c_encoding
-        cdef int buffer_len
-        cdef int error
-        cdef bint recover = self._parse_options & xmlparser.XML_PARSE_RECOVER
+        cdef Py_buffer c_buffer
         if isinstance(data, bytes):
-            if self._default_encoding is None:
-                c_encoding = NULL
-            else:
-                c_encoding = self._default_encoding
+            c_encoding = NULL
             c_data = _cstr(data)
             py_buffer_len = python.PyBytes_GET_SIZE(data)
         elif isinstance(data, unicode):
@@ -1106,8 +1223,31 @@ cdef class _FeedParser(_BaseParser):
             c_encoding = _UNICODE_ENCODING
             c_data = python.PyUnicode_AS_DATA(data)
             py_buffer_len = python.PyUnicode_GET_DATA_SIZE(data)
+        elif python.PyObject_CheckBuffer(data):
+            # bytearray, mmap, memoryview, ... => parse their memory in place
+            python.PyObject_GetBuffer(data, &c_buffer, python.PyBUF_SIMPLE)
+            try:
+                self._feed(<const_char*>c_buffer.buf, c_buffer.len, NULL)
+            finally:
+                python.PyBuffer_Release(&c_buffer)
+            return
         else:
             raise TypeError, u"Parsing requires string data"
+        self._feed(c_data, py_buffer_len, c_encoding)
+
+    cdef int _feed(self, const_char* c_data, Py_ssize_t py_buffer_len,
+                   const_char* c_encoding) except -1:
+        u"""Feed a chunk of encoded data into the parser.  Uses the default
+        encoding of the parser if no encoding is passed.
+        """
+        cdef _ParserContext context
+        cdef xmlparser.xmlParserCtxt* pctxt
+        cdef int buffer_len
+        cdef int error
+        cdef bint collect_events
+        cdef bint recover = self._parse_options & xmlparser.XML_PARSE_RECOVER
+        if c_encoding is NULL and self._default_encoding is not None:
+            c_encoding = _cstr(self._default_encoding)
 
         context = self._getPushParserContext()
         pctxt = context._c_ctxt
@@ -1126,18 +1266,22 @@ cdef class _FeedParser(_BaseParser):
 
         #print pctxt.charset, 'NONE' if c_encoding is NULL else c_encoding
 
+        # the SAX callbacks that collect iterparse events need the GIL
+        collect_events = isinstance(context, _IterparseContext)
         while py_buffer_len > 0 and (error == 0 or recover):
-            with nogil:
-                if py_buffer_len > limits.INT_MAX:
-                    buffer_len = limits.INT_MAX
-                else:
-                    buffer_len = <int>py_buffer_len
-                if self._for_html:
-                    error = htmlparser.htmlParseChunk(pctxt, c_data, buffer_len, 0)
-                else:
-                    error = xmlparser.xmlParseChunk(pctxt, c_data, buffer_len, 0)
-                py_buffer_len -= buffer_len
-                c_data += buffer_len
+            if py_buffer_len > limits.INT_MAX:
+                buffer_len = limits.INT_MAX
+            else:
+                buffer_len = <int>py_buffer_len
+            if collect_events:
+                error = _parseFeedChunk(pctxt, c_data, buffer_len,
+                                        self._for_html)
+            else:
+                with nogil:
+                    error = _parseFeedChunk(pctxt, c_data, buffer_len,
+                                            self._for_html)
+            py_buffer_len -= buffer_len
+            c_data += buffer_len
 
             if error and not pctxt.replaceEntities and not pctxt.validate:
                 # in this mode, we ignore errors about undefined entities
@@ -1154,6 +1298,7 @@ cdef class _FeedParser(_BaseParser):
                 context._handleParseResult(self, NULL, None)
             finally:
                 context.cleanup()
+        return 0
 
     def close(self):
         u"""close(self)
@@ -1192,6 +1337,14 @@ cdef class _FeedParser(_BaseParser):
         else:
             return result
 
+cdef inline int _parseFeedChunk(xmlparser.xmlParserCtxt* c_ctxt,
+                                const_char* c_data, int buffer_len,
+                                bint for_html) nogil:
+    if for_html:
+        return htmlparser.htmlParseChunk(c_ctxt, c_data, buffer_len, 0)
+    else:
+        return xmlparser.xmlParseChunk(c_ctxt, c_data, buffer_len, 0)
+
 cdef int _htmlCtxtResetPush(xmlparser.xmlParserCtxt* c_ctxt,
                              const_char* c_data, int buffer_len,
                              const_char* c_encoding, int parse_options) except -1:
@@ -1377,6 +1530,289 @@ def get_default_parser():
     u"get_default_parser()"
     return __GLOBAL_PARSER_CONTEXT.getDefaultParser()
 
+############################################################
+## parser pool
+############################################################
+
+cdef object _time
+from time import time as _time
+
+cdef object _ThreadCondition
+from threading import Condition as _ThreadCondition
+
+cdef class ParserPool:
+    u"""ParserPool(self, parser=None, max_size=None, max_idle=None)
+
+    A pool of reusable parsers for multi-threaded applications.
+
+    All parsers in the pool are copies of the ``parser`` passed into
+    the constructor (or of the current default parser).  Each thread
+    calls ``checkout()`` to get exclusive access to one of them and
+    returns it by calling ``checkin()`` when it is done.  Parsers are
+    created lazily and have their parser context set up on creation,
+    so a returned parser can be reused without further setup.  As a
+    thread owns the parser exclusively between the two calls, parsing
+    does not compete for the parser lock with other threads.
+
+    The ``max_size`` keyword argument limits the number of parsers that
+    the pool creates.  If all of them are checked out, ``checkout()``
+    waits until another thread returns one.  Idle parsers that were not
+    used for more than ``max_idle`` seconds are discarded.
+
+    The ``hits``, ``misses``, ``waits`` and ``wait_time`` counters
+    provide statistics about the pool usage.
+    """
+    cdef _BaseParser _parser
+    cdef list _idle_parsers  # stack of (time of return, parser) tuples
+    cdef set _checked_out
+    cdef object _condition
+    cdef Py_ssize_t _max_size
+    cdef double _max_idle
+    cdef Py_ssize_t _size
+    cdef Py_ssize_t _waiting
+    cdef readonly Py_ssize_t hits
+    cdef readonly Py_ssize_t misses
+    cdef readonly Py_ssize_t waits
+    cdef readonly double wait_time
+
+    def __init__(self, _BaseParser parser=None, *, max_size=None, max_idle=None):
+        if parser is None:
+            parser = __GLOBAL_PARSER_CONTEXT.getDefaultParser()
+        if max_size is not None and max_size < 1:
+            raise ValueError, u"max_size must be a positive number"
+        if max_idle is not None and max_idle <= 0:
+            raise ValueError, u"max_idle must be a positive number"
+        self._parser = parser
+        self._max_size = max_size or 0
+        self._max_idle = max_idle or 0.0
+        self._idle_parsers = []
+        self._checked_out = set()
+        self._condition = _ThreadCondition()
+
+    property size:
+        u"The number of parsers currently owned by the pool."
+        def __get__(self):
+            return self._size
+
+    property idle:
+        u"The number of parsers that are currently available for checkout."
+        def __get__(self):
+            return len(self._idle_parsers)
+
+    def checkout(self, timeout=None):
+        u"""checkout(self, timeout=None)
+
+        Returns a parser from the pool for exclusive use by the caller.
+
+        If all parsers are in use and the pool has reached its maximum
+        size, waits until a parser is returned to the pool.  Raises a
+        ParserError if no parser becomes available within ``timeout``
+        seconds.
+        """
+        cdef _BaseParser parser
+        if self._max_idle:
+            self._evictIdleParsers()
+        if self._idle_parsers:
+            self.hits += 1
+            parser = self._idle_parsers.pop()[1]
+        elif not self._max_size or self._size < self._max_size:
+            self.misses += 1
+            parser = self._newParser()
+        else:
+            parser = self._waitForParser(timeout)
+        self._checked_out.add(parser)
+        return parser
+
+    def checkin(self, _BaseParser parser not None):
+        u"""checkin(self, parser)
+
+        Returns a parser to the pool after use.
+        """
+        try:
+            self._checked_out.remove(parser)
+        except KeyError:
+            raise ValueError, u"parser was not checked out from this pool"
+        if isinstance(parser, _FeedParser) and \
+                (<_FeedParser>parser)._feed_parser_running:
+            # an unfinished feed parser run keeps its context locked
+            self._size -= 1
+        else:
+            self._idle_parsers.append(
+                (_time() if self._max_idle else 0.0, parser))
+            if self._max_idle:
+                self._evictIdleParsers()
+        if self._waiting:
+            with self._condition:
+                self._condition.notify()
+
+    def clear(self):
+        u"""clear(self)
+
+        Discards all idle parsers.  Parsers that are currently checked
+        out will be reused when they get returned.
+        """
+        self._size -= len(self._idle_parsers)
+        del self._idle_parsers[:]
+        if self._waiting:
+            with self._condition:
+                self._condition.notify_all()
+
+    cdef _BaseParser _newParser(self):
+        cdef _BaseParser parser
+        parser = self._parser._copy()
+        parser._getParserContext()
+        self._size += 1
+        return parser
+
+    cdef _BaseParser _waitForParser(self, timeout):
+        cdef _BaseParser parser
+        cdef double start = _time()
+        self.waits += 1
+        with self._condition:
+            self._waiting += 1
+            try:
+                while not self._idle_parsers and self._size >= self._max_size:
+                    if timeout is None:
+                        self._condition.wait()
+                    else:
+                        remaining = timeout - (_time() - start)
+                        if remaining <= 0:
+                            raise ParserError, \
+                                u"no parser available in pool after %s seconds" % timeout
+                        self._condition.wait(remaining)
+                if self._idle_parsers:
+                    self.hits += 1
+                    parser = self._idle_parsers.pop()[1]
+                else:
+                    self.misses += 1
+                    parser = self._newParser()
+            finally:
+                self._waiting -= 1
+                self.wait_time += _time() - start
+        return parser
+
+    cdef _evictIdleParsers(self):
+        cdef Py_ssize_t count = 0
+        cdef double oldest = _time() - self._max_idle
+        for returned, parser in self._idle_parsers:
+            if returned >= oldest:
+                break
+            count += 1
+        if count:
+            del self._idle_parsers[:count]
+            self._size -= count
+            if self._waiting:
+                with self._condition:
+                    self._condition.notify_all()
+
+############################################################
+## batch parsing
+############################################################
+
+cdef object _Thread
+from threading import Thread as _Thread
+
+@cython.internal
+cdef class _ThreadedBatch:
+    u"""Processes the items of a sequence in a number of threads and
+    collects the results, or the exceptions raised for them, in the
+    order of the input.  Subclasses override _process() and, to set
+    up per-thread state, _init_worker().
+    """
+    cdef object _tasks
+    cdef list _results
+
+    cdef list run(self, items, workers):
+        items = list(items)
+        self._results = [None] * len(items)
+        if workers is None:
+            try:
+                from multiprocessing import cpu_count
+                workers = cpu_count()
+            except (ImportError, NotImplementedError):
+                workers = 1
+        elif workers < 1:
+            raise ValueError, u"workers must be a positive number"
+        if workers > len(items):
+            workers = len(items)
+
+        # the task iterator is shared, each thread takes the next item
+        self._tasks = iter(enumerate(items))
+        threads = [ _Thread(target=self._work) for _ in range(workers - 1) ]
+        started = []
+        try:
+            for thread in threads:
+                thread.start()
+                started.append(thread)
+            self._work()
+        finally:
+            for thread in started:
+                thread.join()
+            self._tasks = None
+        return self._results
+
+    def _work(self):
+        try:
+            state = self._init_worker()
+        except Exception, e:
+            # fail all items that this thread takes
+            for i, item in self._tasks:
+                self._results[i] = e
+            return
+        for i, item in self._tasks:
+            try:
+                self._results[i] = self._process(state, item)
+            except Exception, e:
+                self._results[i] = e
+
+    cdef _init_worker(self):
+        return None
+
+    cdef _process(self, state, item):
+        return item
+
+@cython.final
+@cython.internal
+cdef class _ParseManyBatch(_ThreadedBatch):
+    cdef _BaseParser _parser
+    cdef object _base_url
+    def __cinit__(self, _BaseParser parser not None, base_url):
+        self._parser = parser
+        self._base_url = base_url
+
+    cdef _init_worker(self):
+        return self._parser._copy()
+
+    cdef _process(self, parser, text):
+        cdef _Document doc
+        try:
+            doc = _parseMemoryDocument(text, self._base_url, parser)
+        except _TargetParserResult, result_container:
+            return result_container.result
+        return doc.getroot()
+
+def parse_many(strings, _BaseParser parser=None, *, workers=None, base_url=None):
+    u"""parse_many(strings, parser=None, workers=None, base_url=None)
+
+    Parses a sequence of XML documents from strings (or buffers) in
+    parallel threads.  Returns a list with the root nodes (or the results
+    returned by a parser target) in the order of the input.
+
+    Errors do not abort the batch.  If a document fails to parse, the
+    exception that was raised for it is stored at its position in the
+    result list instead.
+
+    Each thread uses its own copy of the ``parser``, or of the default
+    parser if none is passed.  The number of threads defaults to the
+    number of CPUs and can be changed with the ``workers`` keyword
+    argument.  Passing ``workers=1`` parses all documents in the
+    calling thread.  Note that a parser target is not copied, so it
+    must be prepared to receive events from several threads.
+    """
+    if parser is None:
+        parser = __GLOBAL_PARSER_CONTEXT.getDefaultParser()
+    return _ParseManyBatch(parser, base_url).run(strings, workers)
+
 ############################################################
 ## HTML parser
 ############################################################
@@ -1450,6 +1886,7 @@ cdef xmlDoc* _parseDoc(text, filename, _BaseParser parser) except NULL:
     cdef char* c_filename
     cdef char* c_text
     cdef Py_ssize_t c_len
+    cdef Py_buffer c_buffer
     if parser is None:
         parser = __GLOBAL_PARSER_CONTEXT.getDefaultParser()
     if not filename:
@@ -1463,13 +1900,18 @@ cdef xmlDoc* _parseDoc(text, filename, _BaseParser parser) except NULL:
             return (<_BaseParser>parser)._parseDocFromFilelike(
                 StringIO(text), filename)
         return (<_BaseParser>parser)._parseUnicodeDoc(text, c_filename)
-    else:
+    elif isinstance(text, bytes):
         c_len = python.PyBytes_GET_SIZE(text)
-        if c_len > limits.INT_MAX:
-            return (<_BaseParser>parser)._parseDocFromFilelike(
-                BytesIO(text), filename)
         c_text = _cstr(text)
         return (<_BaseParser>parser)._parseDoc(c_text, c_len, c_filename)
+    else:
+        # parse the memory of buffer objects (mmap, bytearray, ...) in place
+        python.PyObject_GetBuffer(text, &c_buffer, python.PyBUF_SIMPLE)
+        try:
+            return (<_BaseParser>parser)._parseDoc(
+                <char*>c_buffer.buf, c_buffer.len, c_filename)
+        finally:
+            python.PyBuffer_Release(&c_buffer)
 
 cdef xmlDoc* _parseDocFromFile(filename8, _BaseParser parser) except NULL:
     if parser is None:
@@ -1559,6 +2001,10 @@ cdef _Document _parseDocument(source, _BaseParser parser, base_url):
     else:
         url = _getFilenameForFile(source)
 
+    if python.PyObject_CheckBuffer(source):
+        # bytearray, mmap, memoryview, ... => parse their memory in place
+        return _parseMemoryDocument(source, _encodeFilenameUTF8(url), parser)
+
     if hasattr(source, u'getvalue') and hasattr(source, u'tell'):
         # StringIO - reading from start?
         if source.tell() == 0:
@@ -1572,6 +2018,37 @@ cdef _Document _parseDocument(source, _BaseParser parser, base_url):
 
     raise TypeError, u"cannot parse from '%s'" % python._fqtypename(source).decode('UTF-8')
 
+cdef _Document _parseMappedDocument(source, _BaseParser parser, base_url):
+    u"""Parse a local file in one step from a read-only memory map.
+
+    Falls back to the normal parser input for sources that cannot be
+    mapped, e.g. file-like objects, URLs, empty or compressed files.
+    """
+    if not _isString(source):
+        return _parseDocument(source, parser, base_url)
+    import mmap
+    try:
+        f = open(source, 'rb')
+    except EnvironmentError:
+        return _parseDocument(source, parser, base_url)
+    try:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError):
+            return _parseDocument(source, parser, base_url)
+        try:
+            if data[:2] == b'\x1f\x8b':
+                # gzip compressed, libxml2 decompresses it while reading
+                return _parseDocument(source, parser, base_url)
+            if base_url is None:
+                base_url = source
+            return _parseMemoryDocument(
+                data, _encodeFilenameUTF8(base_url), parser)
+        finally:
+            data.close()
+    finally:
+        f.close()
+
 cdef _Document _parseDocumentFromURL(url, _BaseParser parser):
     cdef xmlDoc* c_doc
     c_doc = _parseDocFromFile(url, parser)
@@ -1587,8 +2064,8 @@ cdef _Document _parseMemoryDocument(text, url, _BaseParser parser):
         # pass native unicode only if libxml2 can handle it
         if _UNICODE_ENCODING is NULL:
             text = (<unicode>text).encode('utf8')
-    elif not isinstance(text, bytes):
-        raise ValueError, u"can only parse strings"
+    elif not isinstance(text, bytes) and not python.PyObject_CheckBuffer(text):
+        raise ValueError, u"can only parse strings or buffers"
     if isinstance(url, unicode):
         url = (<unicode>url).encode('utf8')
     c_doc = _parseDoc(text, url, parser)
@@ -29,6 +29,9 @@ cdef extern from "Python.h":
     cdef bytes PyBytes_FromStringAndSize(char* s, Py_ssize_t size)
     cdef bytes PyBytes_FromFormat(char* format, ...)
     cdef Py_ssize_t PyBytes_GET_SIZE(object s)
+    cdef object PyByteArray_FromStringAndSize(char* s, Py_ssize_t size)
+    cdef char* PyByteArray_AS_STRING(object s)
+    cdef Py_ssize_t PyByteArray_GET_SIZE(object s)
 
     cdef object PyNumber_Int(object value)
     cdef Py_ssize_t PyInt_AsSsize_t(object value)
@@ -94,6 +97,10 @@ cdef extern from "Python.h":
     cdef char* _cstr "PyBytes_AS_STRING" (object s)
     cdef char* __cstr "PyBytes_AS_STRING" (PyObject* s)
 
+    cdef bint PyObject_CheckBuffer(object obj)
+    cdef int PyObject_GetBuffer(object obj, Py_buffer* view, int flags) except -1
+    cdef void PyBuffer_Release(Py_buffer* view)
+
     # Py_buffer related flags
     cdef int PyBUF_SIMPLE
     cdef int PyBUF_WRITABLE
@@ -361,6 +361,17 @@ cdef void _writeNextSiblings(tree.xmlOutputBuffer* c_buffer, xmlNode* c_node,
 ############################################################
 # output to file-like objects
 
+# maximum size of the chunks that are collected without holding the GIL
+# before writing them into a file-like object
+DEF __FILELIKE_WRITE_CHUNK_SIZE = 262144
+
+cdef struct _FilelikeWriteBuffer:
+    python.PyObject* writer
+    char* data
+    size_t size       # maximum size of the collected chunks
+    size_t allocated  # grows with the output, up to 'size'
+    size_t used
+
 @cython.final
 @cython.internal
 cdef class _FilelikeWriter:
@@ -368,7 +379,14 @@ cdef class _FilelikeWriter:
     cdef object _close_filelike
     cdef _ExceptionContext _exc_context
     cdef _ErrorLog error_log
-    def __cinit__(self, filelike, exc_context=None, compression=None):
+    cdef _FilelikeWriteBuffer _write_buffer
+    def __cinit__(self, filelike, exc_context=None, compression=None,
+                  Py_ssize_t buffer_size=0):
+        self._write_buffer.writer = <python.PyObject*>self
+        self._write_buffer.data = NULL
+        self._write_buffer.size = 0
+        self._write_buffer.allocated = 0
+        self._write_buffer.used = 0
         if compression is not None and compression > 0:
             filelike = gzip.GzipFile(
                 fileobj=filelike, mode='wb', compresslevel=compression)
@@ -379,30 +397,43 @@ cdef class _FilelikeWriter:
         else:
             self._exc_context = exc_context
         self.error_log = _ErrorLog()
+        # collect the output chunks of libxml2 into larger writes, the
+        # buffer is allocated when the output needs it
+        if buffer_size > 0:
+            self._write_buffer.size = buffer_size
+
+    def __dealloc__(self):
+        if self._write_buffer.data is not NULL:
+            stdlib.free(self._write_buffer.data)
 
     cdef tree.xmlOutputBuffer* _createOutputBuffer(
         self, tree.xmlCharEncodingHandler* enchandler) except NULL:
         cdef tree.xmlOutputBuffer* c_buffer
         c_buffer = tree.xmlOutputBufferCreateIO(
             <tree.xmlOutputWriteCallback>_writeFilelikeWriter, _closeFilelikeWriter,
-            <python.PyObject*>self, enchandler)
+            <void*>&self._write_buffer, enchandler)
         if c_buffer is NULL:
             raise IOError, u"Could not create I/O writer context."
         return c_buffer
 
-    cdef int write(self, char* c_buffer, int size):
+    cdef int write(self, char* c_buffer, Py_ssize_t size):
         try:
             if self._filelike is None:
                 raise IOError, u"File is already closed"
             py_buffer = <bytes>c_buffer[:size]
             self._filelike.write(py_buffer)
-            return size
+            return 0
         except:
             self._exc_context._store_raised()
             return -1
 
     cdef int close(self):
         try:
+            used, self._write_buffer.used = self._write_buffer.used, 0
+            # after a failed write, keep the original exception
+            if used and self._filelike is not None and \
+                    not self._exc_context._has_raised():
+                self._filelike.write(<bytes>self._write_buffer.data[:used])
             if self._close_filelike is not None:
                 self._close_filelike()
             # we should not close the file here as we didn't open it
@@ -412,17 +443,60 @@ cdef class _FilelikeWriter:
             self._exc_context._store_raised()
             return -1
 
-cdef int _writeFilelikeWriter(void* ctxt, char* c_buffer, int length):
-    return (<_FilelikeWriter>ctxt).write(c_buffer, length)
-
-cdef int _closeFilelikeWriter(void* ctxt):
-    return (<_FilelikeWriter>ctxt).close()
+cdef int _writeFilelikeWriter(void* ctxt, char* c_buffer, int length) nogil:
+    # only acquire the GIL when a chunk is ready for the file-like object
+    cdef _FilelikeWriteBuffer* write_buffer = <_FilelikeWriteBuffer*>ctxt
+    cdef size_t used
+    if write_buffer.used + length > write_buffer.size or \
+            not _growFilelikeWriteBuffer(write_buffer, write_buffer.used + length):
+        if write_buffer.used:
+            # drop the chunk even if writing it fails, so that close()
+            # does not pass it on a second time
+            used = write_buffer.used
+            write_buffer.used = 0
+            if _writeToFilelike(write_buffer.writer, write_buffer.data,
+                                used) < 0:
+                return -1
+        if <size_t>length >= write_buffer.size or \
+                not _growFilelikeWriteBuffer(write_buffer, length):
+            if _writeToFilelike(write_buffer.writer, c_buffer, length) < 0:
+                return -1
+            return length
+    cstring_h.memcpy(write_buffer.data + write_buffer.used, c_buffer, length)
+    write_buffer.used += length
+    return length
+
+cdef bint _growFilelikeWriteBuffer(_FilelikeWriteBuffer* write_buffer,
+                                   size_t needed) nogil:
+    u"""Make room for ``needed`` bytes in the buffer, doubling its size as
+    the output grows.  Returns false if the memory cannot be allocated, in
+    which case the output is written without buffering.
+    """
+    cdef size_t allocated = write_buffer.allocated
+    cdef char* data
+    if needed <= allocated:
+        return 1
+    allocated = allocated * 2 if allocated * 2 > needed else needed
+    if allocated > write_buffer.size:
+        allocated = write_buffer.size
+    data = <char*>stdlib.realloc(write_buffer.data, allocated)
+    if data is NULL:
+        return 0
+    write_buffer.data = data
+    write_buffer.allocated = allocated
+    return 1
+
+cdef int _writeToFilelike(python.PyObject* writer, char* c_buffer,
+                          Py_ssize_t size) with gil:
+    return (<_FilelikeWriter>writer).write(c_buffer, size)
+
+cdef int _closeFilelikeWriter(void* ctxt) with gil:
+    return (<_FilelikeWriter>(<_FilelikeWriteBuffer*>ctxt).writer).close()
 
 cdef _tofilelike(f, _Element element, encoding, doctype, method,
                  bint write_xml_declaration, bint write_doctype,
                  bint pretty_print, bint with_tail, int standalone,
                  int compression):
-    cdef python.PyThreadState* state = NULL
     cdef _FilelikeWriter writer = None
     cdef tree.xmlOutputBuffer* c_buffer
     cdef tree.xmlCharEncodingHandler* enchandler
@@ -462,31 +536,31 @@ cdef _tofilelike(f, _Element element, encoding, doctype, method,
             f.write(data)
         return
 
-    writer = _create_output_buffer(f, c_enc, compression, &c_buffer)
-    if writer is None:
-        state = python.PyEval_SaveThread()
-
-    _writeNodeToBuffer(c_buffer, element._c_node, c_enc, c_doctype, c_method,
-                       write_xml_declaration, write_doctype,
-                       pretty_print, with_tail, standalone)
-    error_result = c_buffer.error
-    if error_result == xmlerror.XML_ERR_OK:
-        error_result = tree.xmlOutputBufferClose(c_buffer)
-        if error_result > 0:
-            error_result = xmlerror.XML_ERR_OK
-    else:
-        tree.xmlOutputBufferClose(c_buffer)
-    if writer is None:
-        python.PyEval_RestoreThread(state)
-    else:
+    writer = _create_output_buffer(f, c_enc, compression, &c_buffer,
+                                   __FILELIKE_WRITE_CHUNK_SIZE)
+    # file-like objects are only called with the GIL for complete chunks
+    with nogil:
+        _writeNodeToBuffer(c_buffer, element._c_node, c_enc, c_doctype, c_method,
+                           write_xml_declaration, write_doctype,
+                           pretty_print, with_tail, standalone)
+        error_result = c_buffer.error
+        if error_result == xmlerror.XML_ERR_OK:
+            error_result = tree.xmlOutputBufferClose(c_buffer)
+            if error_result > 0:
+                error_result = xmlerror.XML_ERR_OK
+        else:
+            tree.xmlOutputBufferClose(c_buffer)
+    if writer is not None:
         writer._exc_context._raise_if_stored()
     if error_result != xmlerror.XML_ERR_OK:
         _raiseSerialisationError(error_result)
 
 cdef _create_output_buffer(f, const_char* c_enc, int compression,
-                           tree.xmlOutputBuffer** c_buffer_ret):
+                           tree.xmlOutputBuffer** c_buffer_ret,
+                           Py_ssize_t buffer_size=0):
     cdef tree.xmlOutputBuffer* c_buffer
     cdef _FilelikeWriter writer
+    cdef char* c_filename
     enchandler = tree.xmlFindCharEncodingHandler(c_enc)
     if enchandler is NULL:
         raise LookupError(u"unknown encoding: '%s'" %
@@ -494,13 +568,16 @@ cdef _create_output_buffer(f, const_char* c_enc, int compression,
     try:
         if _isString(f):
             filename8 = _encodeFilename(f)
-            c_buffer = tree.xmlOutputBufferCreateFilename(
-                _cstr(filename8), enchandler, compression)
+            c_filename = _cstr(filename8)
+            with nogil:
+                c_buffer = tree.xmlOutputBufferCreateFilename(
+                    c_filename, enchandler, compression)
             if c_buffer is NULL:
                 return python.PyErr_SetFromErrno(IOError) # raises IOError
             writer = None
         elif hasattr(f, 'write'):
-            writer = _FilelikeWriter(f, compression=compression)
+            writer = _FilelikeWriter(f, compression=compression,
+                                     buffer_size=buffer_size)
             c_buffer = writer._createOutputBuffer(enchandler)
         else:
             raise TypeError(
@@ -588,7 +665,7 @@ cdef _tofilelikeC14N(f, _Element element, bint exclusive, bint with_comments,
 # incremental serialisation
 
 cdef class xmlfile:
-    """xmlfile(self, output_file, encoding=None, compression=None)
+    """xmlfile(self, output_file, encoding=None, compression=None, buffer_size=None)
 
     A simple mechanism for incremental XML serialisation.
 
@@ -607,21 +684,52 @@ cdef class xmlfile:
                   for element in generate_some_elements():
                       # serialise generated elements into the XML file
                       xf.write(element)
+
+                  # write many records without creating Elements first
+                  xf.write_many(('record', {'id': str(i)}, 'text')
+                                for i in range(1000))
+
+    When writing to a file-like object, the output is passed on in
+    chunks of a few KB.  Pass a ``buffer_size`` in bytes to collect it
+    into larger chunks and call the ``write()`` method of the file less
+    often.
+
+    In asyncio code, ``xmlfile`` can be used with ``async with`` on an
+    output object whose ``write()`` method is a coroutine.  The writer
+    methods are then coroutines as well::
+
+         async with xmlfile(async_writer) as xf:
+             async with xf.element('root'):
+                 for element in generate_some_elements():
+                     await xf.write(element)
+                     # pass the pending output on to the writer
+                     await xf.flush()
+
+    Output is collected in memory and passed into ``write()`` whenever
+    more than ``buffer_size`` bytes (32 KB by default) are pending, and
+    on ``flush()`` and exit.
     """
     cdef object output_file
     cdef object encoding
     cdef int compresslevel
+    cdef Py_ssize_t buffer_size
     cdef _IncrementalFileWriter writer
+    cdef _AsyncIncrementalFileWriter async_writer
 
-    def __init__(self, output_file not None, encoding=None, compression=None):
+    def __init__(self, output_file not None, encoding=None, compression=None,
+                 buffer_size=None):
         self.output_file = output_file
         self.encoding = _utf8orNone(encoding)
         self.compresslevel = compression or 0
+        if buffer_size is not None and buffer_size < 0:
+            raise ValueError, u"buffer_size must not be negative"
+        self.buffer_size = buffer_size or 0
 
     def __enter__(self):
         assert self.output_file is not None
         cdef _IncrementalFileWriter writer = _IncrementalFileWriter(
-            self.output_file, self.encoding, self.compresslevel)
+            self.output_file, self.encoding, self.compresslevel,
+            self.buffer_size)
         self.writer = writer
         return writer
 
@@ -631,6 +739,42 @@ cdef class xmlfile:
             raise_on_error = exc_type is None
             old_writer._close(raise_on_error)
 
+    def __aenter__(self):
+        assert self.output_file is not None
+        if _isString(self.output_file):
+            raise TypeError(
+                u"cannot write asynchronously to a file given by its name")
+        if not _hasAsyncWriteMethod(self.output_file):
+            raise TypeError(
+                u"output file needs an asynchronous write() method, "
+                u"use 'with' instead of 'async with' for synchronous output")
+        self.async_writer = _AsyncIncrementalFileWriter(
+            self.output_file, self.encoding, self.compresslevel,
+            self.buffer_size)
+        return _asyncResult(self.async_writer)
+
+    def __aexit__(self, exc_type, exc_val, exc_tb):
+        cdef _AsyncIncrementalFileWriter old_writer = self.async_writer
+        data = None
+        if old_writer is not None:
+            self.async_writer = None
+            raise_on_error = exc_type is None
+            data = old_writer._close(raise_on_error)
+            if not raise_on_error:
+                data = None
+        return _AsyncFileWrite(old_writer, data)
+
+cdef bint _hasAsyncWriteMethod(output_file) except -1:
+    write = getattr(output_file, 'write', None)
+    if write is None:
+        return False
+    from inspect import iscoroutinefunction
+    if iscoroutinefunction(write):
+        return True
+    # also accept generator based and compiled coroutine functions
+    from asyncio import iscoroutinefunction
+    return iscoroutinefunction(write)
+
 cdef enum _IncrementalFileWriterStatus:
     WRITER_STARTING = 0
     WRITER_DECL_WRITTEN = 1
@@ -648,14 +792,16 @@ cdef class _IncrementalFileWriter:
     cdef list _element_stack
     cdef int _status
 
-    def __cinit__(self, outfile, bytes encoding, int compresslevel):
+    def __cinit__(self, outfile, bytes encoding, int compresslevel,
+                  Py_ssize_t buffer_size=0):
         self._status = WRITER_STARTING
         self._element_stack = []
         if encoding is None:
             encoding = b'ASCII'
         self._encoding = encoding
         self._c_encoding = _cstr(encoding) if encoding is not None else NULL
-        self._target = _create_output_buffer(outfile, self._c_encoding, compresslevel, &self._c_out)
+        self._target = _create_output_buffer(
+            outfile, self._c_encoding, compresslevel, &self._c_out, buffer_size)
 
     def __dealloc__(self):
         if self._c_out is not NULL:
@@ -707,12 +853,16 @@ cdef class _IncrementalFileWriter:
         Returns a context manager that writes an opening and closing tag.
         """
         assert self._c_out is not NULL
+        return _FileWriterElement(
+            self, self._element_config(tag, attrib, nsmap, _extra))
+
+    cdef tuple _element_config(self, tag, attrib, nsmap, dict _extra):
         attributes = []
         if attrib is not None:
             if isinstance(attrib, (dict, _Attrib)):
                 attrib = attrib.items()
             for name, value in attrib:
-                if name not in _extra:
+                if _extra is None or name not in _extra:
                     ns, name = _getNsTag(name)
                     attributes.append((ns, name, _utf8(value)))
         if _extra:
@@ -727,7 +877,7 @@ cdef class _IncrementalFileWriter:
                     _prefixValidOrRaise(prefix)
                 reversed_nsmap[_utf8(ns)] = prefix
         ns, name = _getNsTag(tag)
-        return _FileWriterElement(self, (ns, name, attributes, reversed_nsmap))
+        return (ns, name, attributes, reversed_nsmap)
 
     cdef _write_qname(self, bytes name, bytes prefix):
         if prefix is not None:
@@ -736,6 +886,13 @@ cdef class _IncrementalFileWriter:
         tree.xmlOutputBufferWrite(self._c_out, len(name), _cstr(name))
 
     cdef _write_start_element(self, element_config):
+        self._element_stack.append(self._write_start_tag(element_config, False))
+        self._status = WRITER_IN_ELEMENT
+
+    cdef tuple _write_start_tag(self, element_config, bint empty):
+        u"""Write the start tag of an element, or the complete element as
+        ``<tag/>`` if ``empty`` is true.  Returns its stack entry.
+        """
         if self._status > WRITER_IN_ELEMENT:
             raise LxmlSyntaxError("cannot append trailing element to complete XML document")
         ns, name, attributes, nsmap = element_config
@@ -745,11 +902,12 @@ cdef class _IncrementalFileWriter:
         self._write_qname(name, prefix)
         self._write_attributes_and_namespaces(
             attributes, flat_namespace_map, new_namespaces)
-        tree.xmlOutputBufferWrite(self._c_out, 1, '>')
+        if empty:
+            tree.xmlOutputBufferWrite(self._c_out, 2, '/>')
+        else:
+            tree.xmlOutputBufferWrite(self._c_out, 1, '>')
         self._handle_error(self._c_out.error)
-
-        self._element_stack.append((ns, name, prefix, flat_namespace_map))
-        self._status = WRITER_IN_ELEMENT
+        return (ns, name, prefix, flat_namespace_map)
 
     cdef _write_attributes_and_namespaces(self, list attributes,
                                           dict flat_namespace_map,
@@ -824,28 +982,62 @@ cdef class _IncrementalFileWriter:
     def write(self, *args, bint with_tail=True, bint pretty_print=False):
         """write(self, *args, with_tail=True, pretty_print=False)
 
-        Write subtrees or strings into the file.
+        Write subtrees, strings or ``(tag, attrib, text)`` tuples into
+        the file.  A tuple is written as an element with the given
+        attributes (a dict, a sequence of name-value pairs or None) and
+        text content (or None), without creating an Element first.
         """
         assert self._c_out is not NULL
         for content in args:
-            if _isString(content):
-                if self._status != WRITER_IN_ELEMENT:
-                    if self._status > WRITER_IN_ELEMENT or content.strip():
-                        raise LxmlSyntaxError("not in an element")
-                content = _utf8(content)
-                tree.xmlOutputBufferWriteEscape(self._c_out, _xcstr(content), NULL)
-            elif iselement(content):
-                if self._status > WRITER_IN_ELEMENT:
-                    raise LxmlSyntaxError("cannot append trailing element to complete XML document")
-                _writeNodeToBuffer(self._c_out, (<_Element>content)._c_node,
-                                   self._c_encoding, NULL, OUTPUT_METHOD_XML,
-                                   False, False, pretty_print, with_tail, False)
-                if (<_Element>content)._c_node.type == tree.XML_ELEMENT_NODE:
-                    if not self._element_stack:
-                        self._status = WRITER_FINISHED
-            else:
-                raise TypeError("got invalid input value of type %s, expected string or Element" % type(content))
-            self._handle_error(self._c_out.error)
+            self._write_content(content, with_tail, pretty_print)
+
+    def write_many(self, contents, *, bint with_tail=True, bint pretty_print=False):
+        """write_many(self, contents, with_tail=True, pretty_print=False)
+
+        Write all subtrees, strings or ``(tag, attrib, text)`` tuples of
+        an iterable into the file.  This is the same as calling
+        ``write()`` for each of them, but faster for many small items.
+        """
+        assert self._c_out is not NULL
+        for content in contents:
+            self._write_content(content, with_tail, pretty_print)
+
+    cdef _write_content(self, content, bint with_tail, bint pretty_print):
+        if _isString(content):
+            if self._status != WRITER_IN_ELEMENT:
+                if self._status > WRITER_IN_ELEMENT or content.strip():
+                    raise LxmlSyntaxError("not in an element")
+            content = _utf8(content)
+            tree.xmlOutputBufferWriteEscape(self._c_out, _xcstr(content), NULL)
+        elif iselement(content):
+            if self._status > WRITER_IN_ELEMENT:
+                raise LxmlSyntaxError("cannot append trailing element to complete XML document")
+            _writeNodeToBuffer(self._c_out, (<_Element>content)._c_node,
+                               self._c_encoding, NULL, OUTPUT_METHOD_XML,
+                               False, False, pretty_print, with_tail, False)
+            if (<_Element>content)._c_node.type == tree.XML_ELEMENT_NODE:
+                if not self._element_stack:
+                    self._status = WRITER_FINISHED
+        elif isinstance(content, tuple):
+            self._write_tuple(<tuple>content)
+        else:
+            raise TypeError("got invalid input value of type %s, expected string, Element or tuple" % type(content))
+        self._handle_error(self._c_out.error)
+
+    cdef _write_tuple(self, tuple content):
+        if len(content) != 3:
+            raise TypeError("expected a (tag, attrib, text) tuple, got %d items" % len(content))
+        tag, attrib, text = content
+        element_config = self._element_config(tag, attrib, None, None)
+        if text is None:
+            self._write_start_tag(element_config, True)
+            if not self._element_stack:
+                self._status = WRITER_FINISHED
+        else:
+            self._write_start_element(element_config)
+            text = _utf8(text)
+            tree.xmlOutputBufferWriteEscape(self._c_out, _xcstr(text), NULL)
+            self._write_end_element(element_config)
 
     cdef _close(self, bint raise_on_error):
         if raise_on_error:
@@ -866,8 +1058,8 @@ cdef class _IncrementalFileWriter:
 
     cdef _handle_error(self, int error_result):
         if error_result != xmlerror.XML_ERR_OK:
-            if self._writer is not None:
-                self._writer._exc_context._raise_if_stored()
+            if self._target is not None:
+                (<_FilelikeWriter>self._target)._exc_context._raise_if_stored()
             _raiseSerialisationError(error_result)
 
 @cython.final
@@ -885,3 +1077,229 @@ cdef class _FileWriterElement:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self._writer._write_end_element(self._element)
+
+
+############################################################
+# asynchronous incremental serialisation
+
+@cython.final
+@cython.internal
+cdef class _AsyncDataWriter:
+    """Collects the serialised output in memory until it gets passed
+    into an asynchronous writer.
+    """
+    cdef list _data
+    cdef Py_ssize_t _size
+    def __cinit__(self):
+        self._data = []
+        self._size = 0
+
+    def write(self, data):
+        self._data.append(data)
+        self._size += len(data)
+
+    cdef bytes collect(self):
+        data = b''.join(self._data)
+        del self._data[:]
+        self._size = 0
+        return data
+
+@cython.final
+@cython.internal
+cdef class _AsyncIncrementalFileWriter:
+    cdef _IncrementalFileWriter _writer
+    cdef _AsyncDataWriter _buffer
+    cdef object _async_outfile
+    cdef Py_ssize_t _buffer_size
+
+    def __cinit__(self, async_outfile, bytes encoding, int compresslevel,
+                  Py_ssize_t buffer_size=0):
+        self._async_outfile = async_outfile
+        self._buffer = _AsyncDataWriter()
+        self._buffer_size = buffer_size if buffer_size > 0 else 32768
+        self._writer = _IncrementalFileWriter(
+            self._buffer, encoding, compresslevel)
+
+    cdef bytes _pending_data(self, bint force):
+        if force:
+            tree.xmlOutputBufferFlush(self._writer._c_out)
+            self._writer._handle_error(self._writer._c_out.error)
+        if force or self._buffer._size >= self._buffer_size:
+            return self._buffer.collect()
+        return None
+
+    def flush(self):
+        """flush(self)
+
+        Pass all pending output into the ``write()`` method of the output
+        file.  Returns an awaitable that waits for it to complete.
+        """
+        assert self._writer._c_out is not NULL
+        return _AsyncFileWrite(self, self._pending_data(True))
+
+    def write_declaration(self, version=None, standalone=None, doctype=None):
+        """write_declaration(self, version=None, standalone=None, doctype=None)
+
+        Write an XML declaration and (optionally) a doctype into the file.
+        Returns an awaitable.
+        """
+        self._writer.write_declaration(version, standalone, doctype)
+        return _AsyncFileWrite(self, self._pending_data(False))
+
+    def write_doctype(self, doctype):
+        """write_doctype(self, doctype)
+
+        Writes the given doctype declaration verbatimly into the file.
+        Returns an awaitable.
+        """
+        self._writer.write_doctype(doctype)
+        return _AsyncFileWrite(self, self._pending_data(False))
+
+    def write(self, *args, bint with_tail=True, bint pretty_print=False):
+        """write(self, *args, with_tail=True, pretty_print=False)
+
+        Write subtrees, strings or ``(tag, attrib, text)`` tuples into
+        the file.  Returns an awaitable that serialises them.
+        """
+        assert self._writer._c_out is not NULL
+        return _AsyncFileWrite(self, None, iter(args), with_tail, pretty_print)
+
+    def write_many(self, contents, *, bint with_tail=True,
+                   bint pretty_print=False):
+        """write_many(self, contents, with_tail=True, pretty_print=False)
+
+        Write all subtrees, strings or ``(tag, attrib, text)`` tuples of
+        an iterable into the file.  Returns an awaitable that serialises
+        them, waiting for the output file whenever enough data is pending.
+        """
+        assert self._writer._c_out is not NULL
+        return _AsyncFileWrite(self, None, iter(contents), with_tail,
+                               pretty_print)
+
+    def element(self, tag, attrib=None, nsmap=None, **_extra):
+        """element(self, tag, attrib=None, nsmap=None, **_extra)
+
+        Returns an asynchronous context manager that writes an opening
+        and closing tag.  It also supports the plain ``with`` statement,
+        which does not pass any output on to the output file.
+        """
+        assert self._writer._c_out is not NULL
+        return _AsyncFileWriterElement(
+            self, self._writer._element_config(tag, attrib, nsmap, _extra))
+
+    cdef bytes _close(self, bint raise_on_error):
+        self._writer._close(raise_on_error)
+        return self._buffer.collect()
+
+@cython.final
+@cython.internal
+cdef class _AsyncFileWriterElement:
+    cdef object _element
+    cdef _AsyncIncrementalFileWriter _writer
+
+    def __cinit__(self, _AsyncIncrementalFileWriter writer not None,
+                  element_config):
+        self._writer = writer
+        self._element = element_config
+
+    def __aenter__(self):
+        self._writer._writer._write_start_element(self._element)
+        return _AsyncFileWrite(self._writer, self._writer._pending_data(False))
+
+    def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._writer._writer._write_end_element(self._element)
+        return _AsyncFileWrite(self._writer, self._writer._pending_data(False))
+
+    def __enter__(self):
+        self._writer._writer._write_start_element(self._element)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._writer._writer._write_end_element(self._element)
+
+@cython.final
+@cython.internal
+cdef class _AsyncFileWrite:
+    u"""An awaitable that passes serialised data into the asynchronous
+    ``write()`` method of the output file and waits for it.
+
+    Besides the data that is already pending, it serialises the items
+    of ``contents`` one by one while it is awaited, and passes the
+    output on whenever enough of it has collected.  The await result is
+    always None.
+    """
+    cdef _AsyncIncrementalFileWriter _writer
+    cdef object _data
+    cdef object _contents
+    cdef bint _with_tail
+    cdef bint _pretty_print
+    # iterator of the currently awaited write() call
+    cdef object _waiting
+
+    def __cinit__(self, _AsyncIncrementalFileWriter writer, data,
+                  contents=None, bint with_tail=True,
+                  bint pretty_print=False):
+        self._writer = writer
+        self._data = data
+        self._contents = contents
+        self._with_tail = with_tail
+        self._pretty_print = pretty_print
+
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.send(None)
+
+    def send(self, value):
+        while True:
+            if self._waiting is not None:
+                try:
+                    if value is None:
+                        return next(self._waiting)
+                    return self._waiting.send(value)
+                except StopIteration:
+                    self._waiting = None
+                    value = None
+            data = self._next_data()
+            if not data:
+                raise StopIteration
+            self._startWrite(data)
+
+    def throw(self, exc_type, exc_value=None, traceback=None):
+        if self._waiting is None:
+            raise exc_type, exc_value, traceback
+        try:
+            return self._waiting.throw(exc_type, exc_value, traceback)
+        except StopIteration:
+            self._waiting = None
+        return self.send(None)
+
+    def close(self):
+        waiting, self._waiting = self._waiting, None
+        self._contents = None
+        if waiting is not None and hasattr(waiting, 'close'):
+            waiting.close()
+
+    cdef _next_data(self):
+        data, self._data = self._data, None
+        if data or self._contents is None:
+            return data
+        for content in self._contents:
+            self._writer._writer._write_content(
+                content, self._with_tail, self._pretty_print)
+            data = self._writer._pending_data(False)
+            if data:
+                return data
+        self._contents = None
+        return None
+
+    cdef _startWrite(self, data):
+        awaitable = self._writer._async_outfile.write(data)
+        if hasattr(awaitable, '__await__'):
+            self._waiting = awaitable.__await__()
+        else:
+            # generator based coroutine
+            self._waiting = iter(awaitable)
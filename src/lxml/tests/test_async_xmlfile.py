@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the asynchronous incremental XML serialisation API.
+
+Tests require Python 3.5 or later.
+"""
+
+import unittest
+import asyncio
+import os, sys
+
+this_dir = os.path.dirname(__file__)
+if this_dir not in sys.path:
+    sys.path.insert(0, this_dir) # needed for Py3
+
+from common_imports import etree, BytesIO
+from common_imports import HelperTestCase
+
+
+class AsyncWriter(object):
+    def __init__(self):
+        self.data = []
+
+    async def write(self, data):
+        await asyncio.sleep(0)
+        self.data.append(data)
+
+    def getvalue(self):
+        return b''.join(self.data)
+
+
+def run_async(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class AsyncXmlFileTestCase(HelperTestCase):
+    def setUp(self):
+        self._file = AsyncWriter()
+
+    def assertXml(self, expected):
+        self.assertEqual(expected.encode('ascii'), self._file.getvalue())
+
+    def test_element(self):
+        async def generate():
+            async with etree.xmlfile(self._file) as xf:
+                async with xf.element('test'):
+                    await xf.write('toast')
+        run_async(generate())
+        self.assertXml('<test>toast</test>')
+
+    def test_element_nested(self):
+        async def generate():
+            async with etree.xmlfile(self._file) as xf:
+                async with xf.element('{nsURI}test', nsmap={'ns': 'nsURI'}):
+                    with xf.element('{nsURI}toast', attr='1'):
+                        await xf.write('text')
+                    await xf.write(etree.Element('taste'), ('t', None, None))
+        run_async(generate())
+        self.assertXml('<ns:test xmlns:ns="nsURI"><ns:toast attr="1">text'
+                       '</ns:toast><taste/><t/></ns:test>')
+
+    def test_write_declaration(self):
+        async def generate():
+            async with etree.xmlfile(self._file) as xf:
+                await xf.write_declaration()
+                await xf.write_doctype('<!DOCTYPE test>')
+                async with xf.element('test'):
+                    pass
+        run_async(generate())
+        self.assertXml("<?xml version='1.0' encoding='ASCII'?>\n"
+                       "<!DOCTYPE test>\n<test></test>")
+
+    def test_flush(self):
+        async def generate():
+            async with etree.xmlfile(self._file) as xf:
+                async with xf.element('test'):
+                    await xf.write('toast')
+                    self.assertEqual(b'', self._file.getvalue())
+                    await xf.flush()
+                    self.assertEqual(b'<test>toast', self._file.getvalue())
+                    await xf.write('taste')
+        run_async(generate())
+        self.assertXml('<test>toasttaste</test>')
+
+    def test_buffer_size(self):
+        async def generate():
+            async with etree.xmlfile(self._file, buffer_size=100) as xf:
+                async with xf.element('root'):
+                    await xf.write_many(
+                        ('item', {'id': str(i)}, 'text') for i in range(1000))
+        run_async(generate())
+        data = self._file.getvalue()
+        self.assertTrue(data.startswith(b'<root><item id="0">text</item>'))
+        self.assertTrue(data.endswith(b'<item id="999">text</item></root>'))
+        self.assertTrue(len(self._file.data) > 3)
+        for chunk in self._file.data[:-1]:
+            self.assertTrue(len(chunk) >= 100)
+
+    def test_write_error(self):
+        class FailingWriter(object):
+            async def write(self, data):
+                raise IOError("failed to write")
+
+        async def generate():
+            async with etree.xmlfile(FailingWriter()) as xf:
+                async with xf.element('test'):
+                    await xf.flush()
+        self.assertRaises(IOError, run_async, generate())
+
+    def test_invalid_output(self):
+        async def generate():
+            async with etree.xmlfile('test.xml') as xf:
+                pass
+        self.assertRaises(TypeError, run_async, generate())
+
+    def test_sync_output(self):
+        async def generate():
+            async with etree.xmlfile(BytesIO()) as xf:
+                pass
+        self.assertRaises(TypeError, run_async, generate())
+
+
+def test_suite():
+    suite = unittest.TestSuite()
+    suite.addTests([unittest.makeSuite(AsyncXmlFileTestCase)])
+    return suite
+
+if __name__ == '__main__':
+    print('to test use test.py %s' % __file__)
@@ -731,6 +731,44 @@ class ETreeOnlyTestCase(HelperTestCase):
         events = list(iterator)
         self.assertEqual(8, len(events))
 
+    def test_iterparse_tag_sequence(self):
+        iterparse = self.etree.iterparse
+        f = BytesIO('<a><b><d/></b><c/><d/></a>')
+        iterator = iterparse(f, tag=["c", "d"], events=('start', 'end'))
+        events = list(iterator)
+        root = iterator.root
+        self.assertEqual(
+            [('start', root[0][0]), ('end', root[0][0]),
+             ('start', root[1]), ('end', root[1]),
+             ('start', root[2]), ('end', root[2])],
+            events)
+
+    def test_iterparse_tag_any_ns(self):
+        iterparse = self.etree.iterparse
+        f = BytesIO('<a xmlns:x="urn:x"><b/><x:b/><x:c/></a>')
+        iterator = iterparse(f, tag="{*}b")
+        events = list(iterator)
+        root = iterator.root
+        self.assertEqual([('end', root[0]), ('end', root[1])], events)
+
+    def test_iterparse_tag_sequence_ns_wildcards(self):
+        iterparse = self.etree.iterparse
+        f = BytesIO('<a xmlns:x="urn:x"><b/><x:b/><x:c/><c/></a>')
+        iterator = iterparse(f, tag=("{urn:x}*", "{}c"))
+        events = list(iterator)
+        root = iterator.root
+        self.assertEqual(['{urn:x}b', '{urn:x}c', 'c'],
+                         [el.tag for event, el in events])
+
+    def test_iterparse_tag_ns_events(self):
+        iterparse = self.etree.iterparse
+        f = BytesIO('<a xmlns:x="urn:x"><x:b xmlns:y="urn:y"/></a>')
+        events = list(iterparse(f, tag="c", events=('start-ns', 'end-ns')))
+        self.assertEqual(
+            [('start-ns', ('x', 'urn:x')), ('start-ns', ('y', 'urn:y')),
+             ('end-ns', None), ('end-ns', None)],
+            events)
+
     def test_iterparse_encoding_error(self):
         text = _str('Søk på nettet')
         wrong_declaration = "<?xml version='1.0' encoding='UTF-8'?>"
@@ -763,6 +801,288 @@ class ETreeOnlyTestCase(HelperTestCase):
         self.assertEqual(_bytes('<root><![CDATA[test]]></root>'),
                           tostring(context.root))
 
+    def test_iterparse_chunk_size(self):
+        class ReadFile(object):
+            def __init__(self, data):
+                self.data = data
+                self.sizes = []
+            def read(self, amount):
+                self.sizes.append(amount)
+                data, self.data = self.data[:amount], self.data[amount:]
+                return data
+
+        xml = _bytes('<a>%s</a>' % ('<b/>' * 10))
+        f = ReadFile(xml)
+        events = list(self.etree.iterparse(f, chunk_size=5))
+        self.assertEqual(11, len(events))
+        self.assertEqual(set([5]), set(f.sizes))
+
+    def test_iterparse_chunk_size_readinto(self):
+        class ReadIntoFile(object):
+            def __init__(self, data):
+                self.data = data
+                self.buffers = []
+            def read(self, amount):
+                raise AssertionError("read() should not be called")
+            def readinto(self, buffer):
+                self.buffers.append(buffer)
+                data, self.data = (self.data[:len(buffer)],
+                                   self.data[len(buffer):])
+                buffer[:len(data)] = data
+                return len(data)
+
+        xml = _bytes('<a>%s</a>' % ('<b/>' * 10))
+        f = ReadIntoFile(xml)
+        iterator = self.etree.iterparse(f, chunk_size=7)
+        self.assertEqual(11, len(list(iterator)))
+        self.assertEqual(10, len(iterator.root))
+        self.assertEqual(set([7]), set([len(b) for b in f.buffers]))
+        # the buffer is reused between reads
+        self.assertEqual(1, len(set([id(b) for b in f.buffers])))
+
+    def test_iterparse_readinto_resized_buffer(self):
+        class ShrinkingFile(object):
+            def read(self, amount):
+                raise AssertionError("read() should not be called")
+            def readinto(self, buffer):
+                size = len(buffer)
+                del buffer[1:]
+                return size
+
+        iterator = self.etree.iterparse(ShrinkingFile(), chunk_size=7)
+        self.assertRaises(ValueError, list, iterator)
+
+    def test_iterparse_max_chunk_size(self):
+        class ReadFile(object):
+            def __init__(self, data):
+                self.data = data
+                self.sizes = []
+            def read(self, amount):
+                self.sizes.append(amount)
+                data, self.data = self.data[:amount], self.data[amount:]
+                return data
+
+        xml = _bytes('<a>%s</a>' % ('<b>%s</b>' % ('x' * 50) * 20))
+        f = ReadFile(xml)
+        events = list(self.etree.iterparse(f, chunk_size=4,
+                                           max_chunk_size=64))
+        self.assertEqual(21, len(events))
+        self.assertEqual(4, f.sizes[0])
+        self.assertEqual(64, max(f.sizes))
+        self.assertEqual(sorted(f.sizes), f.sizes)
+
+    def test_iterparse_chunk_size_invalid(self):
+        iterparse = self.etree.iterparse
+        self.assertRaises(ValueError, iterparse, BytesIO('<a/>'),
+                          chunk_size=0)
+        self.assertRaises(ValueError, iterparse, BytesIO('<a/>'),
+                          chunk_size=10, max_chunk_size=5)
+
+    def test_iterparse_discard_processed(self):
+        iterparse = self.etree.iterparse
+        f = BytesIO('<a>A<b>B<c/>C</b>T1<b><d/></b>T2<b/>T3</a>')
+        iterator = iterparse(f, discard="processed")
+        children = []
+        for event, element in iterator:
+            children.append((element.tag, len(element)))
+        self.assertEqual(
+            [('c', 0), ('b', 1), ('d', 0), ('b', 1), ('b', 0), ('a', 1)],
+            children)
+        root = iterator.root
+        self.assertEqual(0, len(root))
+        self.assertEqual(None, root.text)
+
+    def test_iterparse_discard_processed_siblings(self):
+        iterparse = self.etree.iterparse
+        xml = '<a>A%s</a>' % ''.join(['<b>%d</b>%d' % (i, i) for i in range(5)])
+        iterator = iterparse(BytesIO(xml), tag='b', discard="processed")
+        for event, element in iterator:
+            parent = element.getparent()
+            self.assertEqual('A', parent.text)
+            self.assertEqual(element.text, element.tail)
+            # only the last processed element is left before this one
+            previous = element.getprevious()
+            if element.text == '0':
+                self.assertEqual(None, previous)
+            else:
+                self.assertEqual(None, previous.text)
+                self.assertEqual(None, previous.getprevious())
+
+    def test_iterparse_discard_processed_keep_reference(self):
+        iterparse = self.etree.iterparse
+        f = BytesIO('<a><b><c>C</c></b><b><c>C</c></b></a>')
+        kept = []
+        for event, element in iterparse(f, events=('start', 'end'),
+                                        discard="processed"):
+            if event == 'start' and element.tag == 'b':
+                kept.append(element)
+        self.assertEqual(['b', 'b'], [b.tag for b in kept])
+        self.assertEqual([None, None], [b.getparent() for b in kept])
+        self.assertEqual([0, 0], [len(b) for b in kept])
+
+    def test_iterparse_discard_invalid(self):
+        self.assertRaises(ValueError, self.etree.iterparse,
+                          BytesIO('<a/>'), discard="unknown")
+
+    def test_pull_parser(self):
+        parser = self.etree.XMLPullParser(events=('start', 'end'))
+        parser.feed('<a><b>')
+        events = list(parser.read_events())
+        self.assertEqual([('start', 'a'), ('start', 'b')],
+                         [(ev, el.tag) for ev, el in events])
+        self.assertEqual([], list(parser.read_events()))
+
+        parser.feed('B</b><c/>')
+        parser.feed('</a>')
+        iterator = parser.read_events()
+        self.assertEqual(('end', 'b'),
+                         tuple([(ev, el.tag) for ev, el in [next(iterator)]][0]))
+        root = parser.close()
+        self.assertEqual('a', root.tag)
+        self.assertEqual(
+            [('start', 'c'), ('end', 'c'), ('end', 'a')],
+            [(ev, el.tag) for ev, el in iterator])
+        self.assertEqual('B', root[0].text)
+
+    def test_pull_parser_default_events(self):
+        parser = self.etree.XMLPullParser()
+        parser.feed('<a><b/><c>C</c>')
+        self.assertEqual(['b', 'c'],
+                         [el.tag for ev, el in parser.read_events()])
+        parser.feed('</a>')
+        root = parser.close()
+        self.assertEqual([('end', root)], list(parser.read_events()))
+
+    def test_pull_parser_ns_events(self):
+        parser = self.etree.XMLPullParser(
+            events=('start-ns', 'start', 'end-ns'), tag='{urn:x}b')
+        parser.feed('<a xmlns:x="urn:x"><x:b/><b/></a>')
+        root = parser.close()
+        self.assertEqual(
+            [('start-ns', ('x', 'urn:x')), ('start', root[0]),
+             ('end-ns', None)],
+            list(parser.read_events()))
+
+    def test_pull_parser_options(self):
+        parser = self.etree.XMLPullParser(remove_comments=True,
+                                          remove_blank_text=True)
+        parser.feed('<a> <!--c--> <b/> </a>')
+        root = parser.close()
+        self.assertEqual(_bytes('<a><b/></a>'), self.etree.tostring(root))
+        self.assertEqual(['b', 'a'],
+                         [el.tag for ev, el in parser.read_events()])
+
+    def test_pull_parser_error(self):
+        parser = self.etree.XMLPullParser()
+        parser.feed('<a><b/>')
+        self.assertRaises(self.etree.XMLSyntaxError, parser.feed, '</c>')
+
+        self.assertRaises(ValueError, self.etree.XMLPullParser,
+                          events=('unknown',))
+        self.assertRaises(TypeError, self.etree.XMLPullParser,
+                          target=object())
+
+    def test_pull_parser_as_parser(self):
+        parser = self.etree.XMLPullParser()
+        root = self.etree.fromstring('<a><b/></a>', parser)
+        self.assertEqual('b', root[0].tag)
+        self.assertEqual([], list(parser.read_events()))
+
+    def _await(self, awaitable):
+        # run an awaitable that does not suspend
+        try:
+            next(awaitable.__await__())
+        except StopIteration:
+            return sys.exc_info()[1].value
+        self.fail("awaitable did not finish")
+
+    def _async_events(self, parser):
+        iterator = parser.events().__aiter__()
+        events = []
+        while True:
+            try:
+                events.append(self._await(iterator.__anext__()))
+            except StopAsyncIteration:
+                return events
+
+    if sys.version_info >= (3, 5):
+        def test_async_iterparser(self):
+            parser = self.etree.AsyncIterParser(events=('start', 'end'))
+            self.assertEqual(None, self._await(parser.feed(_bytes('<a><b>'))))
+            events = self._async_events(parser)
+            self.assertEqual([('start', 'a'), ('start', 'b')],
+                             [(ev, el.tag) for ev, el in events])
+            self.assertEqual([], self._async_events(parser))
+
+            self._await(parser.feed(_bytes('B</b><c/>')))
+            self._await(parser.feed(bytearray(_bytes('</a>'))))
+            root = self._await(parser.close())
+            self.assertEqual('a', root.tag)
+            events = self._async_events(parser)
+            self.assertEqual(
+                [('end', 'b'), ('start', 'c'), ('end', 'c'), ('end', 'a')],
+                [(ev, el.tag) for ev, el in events])
+            self.assertEqual('B', events[0][1].text)
+            self.assertEqual(root, events[-1][1])
+
+        def test_async_iterparser_tag(self):
+            parser = self.etree.AsyncIterParser(tag='{*}b')
+            self._await(parser.feed('<a xmlns:x="x"><b/><x:b/><c/></a>'))
+            root = self._await(parser.close())
+            self.assertEqual([root[0], root[1]],
+                             [el for ev, el in self._async_events(parser)])
+
+        def test_async_iterparser_error(self):
+            parser = self.etree.AsyncIterParser()
+            self._await(parser.feed('<a><b/>'))
+            self.assertRaises(self.etree.XMLSyntaxError,
+                              parser.feed, '</c>')
+
+            parser = self.etree.AsyncIterParser()
+            self._await(parser.feed('<a><b/>'))
+            self.assertRaises(self.etree.XMLSyntaxError, parser.close)
+
+        def test_async_iterparser_reuse(self):
+            parser = self.etree.AsyncIterParser()
+            for tag in ('a', 'b'):
+                self._await(parser.feed('<%s><c/></%s>' % (tag, tag)))
+                root = self._await(parser.close())
+                self.assertEqual(tag, root.tag)
+                self.assertEqual(['c', tag], [el.tag for ev, el in
+                                              self._async_events(parser)])
+
+        def test_async_iterparser_asyncio(self):
+            import asyncio
+            namespace = {'etree': self.etree, 'asyncio': asyncio}
+            exec("""if True:
+            async def parse(chunks):
+                reader = asyncio.StreamReader()
+                for chunk in chunks:
+                    reader.feed_data(chunk)
+                reader.feed_eof()
+                parser = etree.AsyncIterParser()
+                tags = []
+                while True:
+                    data = await reader.read(3)
+                    if not data:
+                        break
+                    await parser.feed(data)
+                    async for event, element in parser.events():
+                        tags.append(element.tag)
+                root = await parser.close()
+                async for event, element in parser.events():
+                    tags.append(element.tag)
+                return root, tags
+            """, namespace)
+            loop = asyncio.new_event_loop()
+            try:
+                root, tags = loop.run_until_complete(namespace['parse'](
+                    [_bytes('<root><a/>'), _bytes('<b>text</b></root>')]))
+            finally:
+                loop.close()
+            self.assertEqual('root', root.tag)
+            self.assertEqual(['a', 'b', 'root'], tags)
+
     def test_parser_encoding_unknown(self):
         self.assertRaises(
             LookupError, self.etree.XMLParser, encoding="hopefully unknown")
@@ -981,6 +1301,17 @@ class ETreeOnlyTestCase(HelperTestCase):
             [('start', root[0]), ('end', root[0])],
             events)
 
+    def test_iterwalk_tag_sequence(self):
+        iterwalk = self.etree.iterwalk
+        root = self.etree.XML(_bytes(
+            '<a xmlns:x="urn:x"><b><x:d/></b><c/><d/></a>'))
+
+        iterator = iterwalk(root, tag=("c", "{*}d"), events=('end',))
+        events = list(iterator)
+        self.assertEqual(
+            [('end', root[0][0]), ('end', root[1]), ('end', root[2])],
+            events)
+
     def test_iterwalk_tag_all(self):
         iterwalk = self.etree.iterwalk
         root = self.etree.XML(_bytes('<a><b><d/></b><c/></a>'))
@@ -3601,6 +3932,21 @@ class ETreeErrorLogTest(HelperTestCase):
         self.assertTrue([ log for log in logs
                        if 15 == log.column ])
 
+    def test_parse_error_logging_recover(self):
+        # errors are collected during parsing and logged afterwards
+        parser = self.etree.XMLParser(recover=True)
+        xml = '<root>\n' + '<a></b>\n' * 50 + '</root>'
+        self.etree.clear_error_log()
+        root = self.etree.fromstring(xml, parser)
+        self.assertEqual(50, len(root))
+
+        logs = [ log for log in parser.error_log
+                 if 'ERR_TAG_NAME_MISMATCH' in log.type_name ]
+        self.assertEqual(50, len(logs))
+        self.assertEqual(list(range(2, 52)), [ log.line for log in logs ])
+        self.assertTrue([ log for log in logs
+                          if 'mismatch' in log.message ])
+
     def _test_python_error_logging(self):
         """This can't really be tested as long as there isn't a way to
         reset the logging setup ...
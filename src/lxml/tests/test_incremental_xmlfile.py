@@ -15,7 +15,7 @@ this_dir = os.path.dirname(__file__)
 if this_dir not in sys.path:
     sys.path.insert(0, this_dir) # needed for Py3
 
-from common_imports import etree, BytesIO
+from common_imports import etree, BytesIO, _bytes
 from common_imports import HelperTestCase
 
 class _XmlFileTestCaseBase(HelperTestCase):
@@ -175,6 +175,59 @@ class _XmlFileTestCaseBase(HelperTestCase):
             else:
                 self.assertTrue(False)
 
+    def test_write_tuple(self):
+        with etree.xmlfile(self._file) as xf:
+            with xf.element('root'):
+                xf.write(('a', {'id': '1'}, 'text & more'),
+                         ('b', [('x', '1'), ('y', '2')], None),
+                         ('c', None, ''))
+        self.assertXml('<root><a id="1">text &amp; more</a>'
+                       '<b x="1" y="2"/><c></c></root>')
+
+    def test_write_tuple_root(self):
+        with etree.xmlfile(self._file) as xf:
+            xf.write(('root', None, 'text'))
+            self.assertRaises(etree.LxmlSyntaxError,
+                              xf.write, ('a', None, None))
+        self.assertXml('<root>text</root>')
+
+    def test_write_tuple_namespaces(self):
+        with etree.xmlfile(self._file) as xf:
+            with xf.element('{nsURI}root', nsmap={'ns': 'nsURI'}):
+                xf.write(('{nsURI}a', {'{nsURI}id': '1'}, 'A'),
+                         ('{other}b', None, 'B'))
+        self.assertXml('<ns:root xmlns:ns="nsURI"><ns:a ns:id="1">A</ns:a>'
+                       '<ns0:b xmlns:ns0="other">B</ns0:b></ns:root>')
+
+    def test_write_tuple_invalid(self):
+        with etree.xmlfile(self._file) as xf:
+            with xf.element('root'):
+                self.assertRaises(TypeError, xf.write, ('a', None))
+                self.assertRaises(TypeError, xf.write, 5)
+
+    def test_write_many(self):
+        with etree.xmlfile(self._file) as xf:
+            with xf.element('root'):
+                xf.write_many(
+                    ('record', {'id': str(i)}, 'R%d' % i) for i in range(3))
+                el = etree.Element('el')
+                el.tail = 'tail'
+                xf.write_many([el, 'text', ('end', None, None)],
+                              with_tail=False)
+        self.assertXml('<root><record id="0">R0</record>'
+                       '<record id="1">R1</record><record id="2">R2</record>'
+                       '<el/>text<end/></root>')
+
+    def test_buffer_size(self):
+        with etree.xmlfile(self._file, buffer_size=100000) as xf:
+            with xf.element('root'):
+                xf.write_many(('record', None, 'x' * 50) for i in range(1000))
+        root = self._parse_file().getroot()
+        self.assertEqual(1000, len(root))
+        self.assertEqual('x' * 50, root[-1].text)
+        self.assertRaises(ValueError, etree.xmlfile, self._file,
+                          buffer_size=-1)
+
     def _read_file(self):
         self._file.seek(0)
         return self._file.read()
@@ -205,6 +258,36 @@ class SimpleFileLikeXmlFileTestCase(_XmlFileTestCaseBase):
             self.write = target.write
             self.close = target.close
 
+    class CountingFileLike(object):
+        def __init__(self):
+            self.chunks = []
+        def write(self, data):
+            self.chunks.append(data)
+
+    def test_write_error(self):
+        class WriteError(Exception):
+            pass
+        class FailingFileLike(object):
+            def write(self, data):
+                raise WriteError()
+        def write_root():
+            with etree.xmlfile(FailingFileLike()) as xf:
+                xf.write(('root', None, 'x' * 10000))
+        self.assertRaises(WriteError, write_root)
+
+    def test_buffer_size_write_calls(self):
+        unbuffered = self.CountingFileLike()
+        buffered = self.CountingFileLike()
+        for f, buffer_size in ((unbuffered, None), (buffered, 100000)):
+            with etree.xmlfile(f, buffer_size=buffer_size) as xf:
+                with xf.element('root'):
+                    xf.write_many(('record', None, 'x' * 50)
+                                  for i in range(1000))
+        self.assertEqual(_bytes('').join(unbuffered.chunks),
+                         _bytes('').join(buffered.chunks))
+        self.assertTrue(len(unbuffered.chunks) > 5)
+        self.assertEqual(1, len(buffered.chunks))
+
     def setUp(self):
         self._target = BytesIO()
         self._file = self.SimpleFileLike(self._target)
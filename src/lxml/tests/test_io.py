@@ -254,7 +254,130 @@ class _IOTestCaseBase(HelperTestCase):
     
 class ETreeIOTestCase(_IOTestCaseBase):
     etree = etree
-    
+
+    def test_fromstring_bytearray(self):
+        root = self.etree.fromstring(bytearray(_bytes('<a><b>B</b></a>')))
+        self.assertEqual('b', root[0].tag)
+        self.assertEqual('B', root[0].text)
+
+    def test_XML_memoryview_slice(self):
+        data = _bytes('xxx<a><b/></a>yyy')
+        root = self.etree.XML(memoryview(data)[3:-3])
+        self.assertEqual('a', root.tag)
+        self.assertEqual('b', root[0].tag)
+
+    def test_parse_mmap(self):
+        import mmap
+        filename = self.getTestFilePath('test_mmap.xml')
+        write_to_file(filename, _bytes('<a><b>B</b></a>'), 'wb')
+        f = open(filename, 'rb')
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                tree = self.etree.parse(data)
+                self.assertEqual('B', tree.getroot()[0].text)
+                root = self.etree.fromstring(data)
+                self.assertEqual('a', root.tag)
+            finally:
+                data.close()
+        finally:
+            f.close()
+
+    def test_parse_filename_mmap(self):
+        filename = self.getTestFilePath('test_mmap.xml')
+        write_to_file(filename, _bytes('<a><b>B</b></a>'), 'wb')
+        tree = self.etree.parse(filename, mmap=True)
+        self.assertEqual('B', tree.getroot()[0].text)
+        self.assertTrue(tree.docinfo.URL.endswith('test_mmap.xml'))
+
+        tree = self.etree.ElementTree()
+        root = tree.parse(filename, mmap=True)
+        self.assertEqual('B', root[0].text)
+
+    def test_parse_filename_mmap_gzip(self):
+        filename = self.getTestFilePath('test_mmap.xml.gz')
+        f = gzip.open(filename, 'wb')
+        try:
+            f.write(_bytes('<a><b>B</b></a>'))
+        finally:
+            f.close()
+        tree = self.etree.parse(filename, mmap=True)
+        self.assertEqual('B', tree.getroot()[0].text)
+
+    def test_parse_filename_mmap_errors(self):
+        filename = self.getTestFilePath('test_mmap.xml')
+        self.assertRaises(IOError, self.etree.parse, filename, mmap=True)
+
+        write_to_file(filename, _bytes(''), 'wb')
+        self.assertRaises(self.etree.XMLSyntaxError,
+                          self.etree.parse, filename, mmap=True)
+
+        write_to_file(filename, _bytes('<a><b></a>'), 'wb')
+        self.assertRaises(self.etree.XMLSyntaxError,
+                          self.etree.parse, filename, mmap=True)
+
+    def test_feed_buffer(self):
+        parser = self.etree.XMLParser()
+        parser.feed(bytearray(_bytes('<a><b>')))
+        parser.feed(memoryview(_bytes('B</b></a>')))
+        root = parser.close()
+        self.assertEqual('B', root[0].text)
+
+    def test_fromstring_buffer_not_contiguous(self):
+        data = memoryview(_bytes('<a/><a/>'))[::2]
+        self.assertRaises(BufferError, self.etree.fromstring, data)
+
+    def test_write_fileobject_chunks(self):
+        class CountingFileLike(object):
+            def __init__(self):
+                self.chunks = []
+            def write(self, data):
+                self.chunks.append(data)
+
+        root = self.etree.Element('a')
+        for i in range(20000):
+            self.etree.SubElement(root, 'b', id=str(i)).text = 'text'
+        f = CountingFileLike()
+        self.etree.ElementTree(root).write(f)
+        data = _bytes('').join(f.chunks)
+        self.assertEqual(self.etree.tostring(root), data)
+        # libxml2 writes about 4KB at a time, which gets collected
+        self.assertTrue(len(data) > 400000)
+        self.assertTrue(len(f.chunks) < len(data) // 65536)
+
+    def test_write_fileobject_error(self):
+        class FailingFileLike(object):
+            def write(self, data):
+                raise IOError("failed to write")
+
+        root = self.etree.Element('a')
+        for i in range(20000):
+            self.etree.SubElement(root, 'b').text = 'text'
+        tree = self.etree.ElementTree(root)
+        self.assertRaises(IOError, tree.write, FailingFileLike())
+        self.assertRaises(IOError, tree.write, FailingFileLike(),
+                          compression=9)
+
+    def test_write_fileobject_error_once(self):
+        class FailingFileLike(object):
+            def __init__(self):
+                self.calls = 0
+            def write(self, data):
+                self.calls += 1
+                raise IOError("failed to write %d" % self.calls)
+
+        root = self.etree.Element('a')
+        for i in range(20000):
+            self.etree.SubElement(root, 'b').text = 'text'
+        f = FailingFileLike()
+        try:
+            self.etree.ElementTree(root).write(f)
+        except IOError:
+            self.assertEqual("failed to write 1", str(sys.exc_info()[1]))
+        else:
+            self.fail("IOError not raised")
+        self.assertEqual(1, f.calls)
+
 if ElementTree:
     class ElementTreeIOTestCase(_IOTestCaseBase):
         etree = ElementTree
@@ -4,14 +4,14 @@
 Test cases related to ISO-Schematron parsing and validation
 """
 
-import unittest, sys, os.path
+import unittest, sys, os.path, tempfile, shutil
 from lxml import isoschematron
 
 this_dir = os.path.dirname(__file__)
 if this_dir not in sys.path:
     sys.path.insert(0, this_dir) # needed for Py3
 
-from common_imports import etree, HelperTestCase, fileInTestDir
+from common_imports import etree, HelperTestCase, fileInTestDir, BytesIO
 from common_imports import doctest, make_doctest
 
 class ETreeISOSchematronTestCase(HelperTestCase):
@@ -837,6 +837,141 @@ class ETreeISOSchematronTestCase(HelperTestCase):
         self.assertTrue(schema.validate(tree_valid))
         self.assertTrue(not schema.validate(tree_invalid))
 
+    def test_schematron_lazy_resources(self):
+        resource = isoschematron._LazyResource(
+            etree.XSLT, 'xsl', 'iso-schematron-xslt1', 'iso_dsdl_include.xsl')
+        self.assertEqual(None, resource._compiled)
+        result = resource(self.parse('<schema xmlns="%s"/>' %
+                                     isoschematron.SCHEMATRON_NS))
+        self.assertTrue(isinstance(resource._compiled, etree.XSLT))
+        self.assertEqual('{%s}schema' % isoschematron.SCHEMATRON_NS,
+                         result.getroot().tag)
+        compiled = resource._compiled
+        resource(self.parse('<schema xmlns="%s"/>' %
+                            isoschematron.SCHEMATRON_NS))
+        self.assertTrue(compiled is resource._compiled)
+        self.assertEqual(0, len(resource.error_log))
+
+        schema_valid = isoschematron.schematron_schema_valid
+        self.assertFalse(schema_valid(self.parse('<invalid/>')))
+        self.assertTrue(schema_valid.error_log)
+
+    _cache_schema = '''\
+<schema xmlns="http://purl.oclc.org/dsdl/schematron" >
+    <pattern id="OpenModel">
+        <rule context="AAA">
+            <assert test="BBB"> BBB element is not present</assert>
+        </rule>
+    </pattern>
+</schema>
+'''
+
+    def _counting_schematron_class(self):
+        class CountingSchematron(isoschematron.Schematron):
+            compiled = 0
+            def _compile(self, schematron, **kwargs):
+                CountingSchematron.compiled += 1
+                return isoschematron.iso_svrl_for_xslt1(schematron, **kwargs)
+        return CountingSchematron
+
+    def test_schematron_cache(self):
+        isoschematron.clear_validator_cache()
+        tree_valid = self.parse('<AAA><BBB/></AAA>')
+        tree_invalid = self.parse('<AAA><CCC/></AAA>')
+        CountingSchematron = self._counting_schematron_class()
+
+        schema1 = CountingSchematron(self.parse(self._cache_schema), cache=True)
+        schema2 = CountingSchematron(self.parse(self._cache_schema), cache=True)
+        self.assertEqual(1, CountingSchematron.compiled)
+        self.assertTrue(schema1._validator is schema2._validator)
+        self.assertTrue(schema2.validate(tree_valid))
+        self.assertFalse(schema2.validate(tree_invalid))
+        self.assertTrue(schema1.validate(tree_valid))
+        self.assertEqual(0, len(schema1.error_log))
+        self.assertEqual(1, len(schema2.error_log))
+
+        # different arguments or content, or no caching
+        CountingSchematron(self.parse(self._cache_schema), cache=True,
+                           phase='OpenModel')
+        self.assertEqual(2, CountingSchematron.compiled)
+        CountingSchematron(self.parse(self._cache_schema.replace('BBB', 'CCC')),
+                           cache=True)
+        self.assertEqual(3, CountingSchematron.compiled)
+        CountingSchematron(self.parse(self._cache_schema))
+        self.assertEqual(4, CountingSchematron.compiled)
+        class Phase(object):
+            def __str__(self):
+                return "'#ALL'"
+        # arbitrary parameter objects disable the cache
+        CountingSchematron(self.parse(self._cache_schema), cache=True,
+                           compile_params={'phase': Phase()})
+        CountingSchematron(self.parse(self._cache_schema), cache=True,
+                           compile_params={'phase': Phase()})
+        self.assertEqual(6, CountingSchematron.compiled)
+
+        isoschematron.clear_validator_cache()
+        CountingSchematron(self.parse(self._cache_schema), cache=True)
+        self.assertEqual(7, CountingSchematron.compiled)
+
+    def test_schematron_cache_dir(self):
+        isoschematron.clear_validator_cache()
+        tree_valid = self.parse('<AAA><BBB/></AAA>')
+        tree_invalid = self.parse('<AAA><CCC/></AAA>')
+        CountingSchematron = self._counting_schematron_class()
+        cache_dir = tempfile.mkdtemp()
+        try:
+            schema = CountingSchematron(self.parse(self._cache_schema),
+                                        cache_dir=cache_dir, store_xslt=True)
+            self.assertEqual(1, CountingSchematron.compiled)
+            self.assertEqual(1, len(os.listdir(cache_dir)))
+            validator_xslt = etree.tostring(schema.validator_xslt)
+
+            schema = CountingSchematron(self.parse(self._cache_schema),
+                                        cache_dir=cache_dir, store_xslt=True)
+            self.assertEqual(1, CountingSchematron.compiled)
+            self.assertEqual(validator_xslt,
+                             etree.tostring(schema.validator_xslt))
+            self.assertTrue(schema.validate(tree_valid))
+            self.assertFalse(schema.validate(tree_invalid))
+
+            # the schematron tree is not stored in the cache directory
+            CountingSchematron(self.parse(self._cache_schema),
+                               cache_dir=cache_dir, store_schematron=True)
+            self.assertEqual(2, CountingSchematron.compiled)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_schematron_from_validator_xslt(self):
+        tree_valid = self.parse('<AAA><BBB/></AAA>')
+        tree_invalid = self.parse('<AAA><CCC/></AAA>')
+        schema = isoschematron.Schematron(self.parse(self._cache_schema),
+                                          store_xslt=True)
+        handle, filename = tempfile.mkstemp(suffix='.xsl')
+        try:
+            os.close(handle)
+            schema.validator_xslt.write(filename)
+
+            schema = isoschematron.Schematron.from_validator_xslt(
+                file=filename, store_report=True)
+            self.assertTrue(isinstance(schema, isoschematron.Schematron))
+            self.assertEqual(None, schema.validator_xslt)
+            self.assertTrue(schema.validate(tree_valid))
+            self.assertFalse(schema.validate(tree_invalid))
+            self.assertEqual(1, len(schema.error_log))
+            self.assertNotEqual(None, schema.validation_report)
+        finally:
+            os.remove(filename)
+
+        schema = isoschematron.Schematron.from_validator_xslt(
+            etree.parse(BytesIO(etree.tostring(
+                isoschematron.Schematron(self.parse(self._cache_schema),
+                                         store_xslt=True).validator_xslt))),
+            store_xslt=True)
+        self.assertNotEqual(None, schema.validator_xslt)
+        self.assertTrue(schema.validate(tree_valid))
+        self.assertRaises(ValueError,
+                          isoschematron.Schematron.from_validator_xslt)
+
     #TODO: test xslt parameters for inclusion, expand & compile steps (?)
 
 
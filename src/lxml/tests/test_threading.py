@@ -286,6 +286,236 @@ class ThreadingTestCase(HelperTestCase):
         for thread in threads:
             thread.join()
 
+    def test_parser_pool_threads(self):
+        XML = self.etree.XML
+        pool = self.etree.ParserPool(self.etree.XMLParser(remove_comments=True),
+                                     max_size=3)
+        results = []
+
+        def run_thread():
+            for i in range(20):
+                parser = pool.checkout()
+                try:
+                    root = XML(_bytes('<root><!--c-->%d</root>' % i), parser)
+                finally:
+                    pool.checkin(parser)
+                results.append((len(root), root.text))
+
+        threads = [ threading.Thread(target=run_thread)
+                    for _ in range(8) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(8 * 20, len(results))
+        self.assertEqual(sorted([(0, str(i)) for i in range(20)] * 8),
+                         sorted(results))
+        self.assertTrue(pool.size <= 3)
+        self.assertEqual(pool.size, pool.idle)
+        self.assertEqual(8 * 20, pool.hits + pool.misses)
+        self.assertEqual(pool.size, pool.misses)
+
+    def test_parser_pool_wait(self):
+        pool = self.etree.ParserPool(max_size=1)
+        parser = pool.checkout()
+        self.assertRaises(self.etree.ParserError, pool.checkout, 0.01)
+        self.assertEqual(1, pool.waits)
+        self.assertTrue(pool.wait_time > 0)
+
+        result = []
+        def run_thread():
+            result.append(pool.checkout())
+        thread = threading.Thread(target=run_thread)
+        thread.start()
+        pool.checkin(parser)
+        thread.join()
+        self.assertTrue(result[0] is parser)
+        self.assertEqual(1, pool.size)
+
+    def test_parser_pool_max_idle(self):
+        import time
+        pool = self.etree.ParserPool(max_idle=0.01)
+        parser = pool.checkout()
+        pool.checkin(parser)
+        self.assertEqual(1, pool.idle)
+        time.sleep(0.05)
+        self.assertTrue(pool.checkout() is not parser)
+        self.assertEqual(0, pool.idle)
+        self.assertEqual(1, pool.size)
+        self.assertEqual(2, pool.misses)
+
+    def test_parse_many(self):
+        strings = [ _bytes('<root%d><a/></root%d>' % (i, i))
+                    for i in range(100) ]
+        results = self.etree.parse_many(strings, workers=4)
+        self.assertEqual(100, len(results))
+        self.assertEqual([ 'root%d' % i for i in range(100) ],
+                         [ root.tag for root in results ])
+
+    def test_parse_many_errors(self):
+        strings = [_bytes('<a/>'), _bytes('<b>'), _bytes('<c/>'), 5]
+        for workers in (1, 3):
+            results = self.etree.parse_many(
+                iter(strings), self.etree.XMLParser(remove_comments=True),
+                workers=workers)
+            self.assertEqual(4, len(results))
+            self.assertEqual('a', results[0].tag)
+            self.assertTrue(isinstance(results[1], self.etree.XMLSyntaxError))
+            self.assertEqual('c', results[2].tag)
+            self.assertTrue(isinstance(results[3], ValueError))
+
+    def test_parse_many_target(self):
+        class Target(threading.local):
+            # the target is shared between the parser copies
+            def start(self, tag, attrib):
+                self.tag = tag
+            def close(self):
+                return self.tag
+        parser = self.etree.XMLParser(target=Target())
+        results = self.etree.parse_many(
+            [_bytes('<a/>'), _bytes('<b/>')], parser, workers=2)
+        self.assertEqual(['a', 'b'], results)
+
+    def test_parser_pool_checkin_unknown(self):
+        pool = self.etree.ParserPool()
+        self.assertRaises(ValueError, pool.checkin, self.etree.XMLParser())
+        parser = pool.checkout()
+        pool.checkin(parser)
+        self.assertRaises(ValueError, pool.checkin, parser)
+
+
+    def test_xslt_shared_between_threads(self):
+        XML = self.etree.XML
+        style = self.etree.XSLT(XML(_bytes('''\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:param name="p"/>
+  <xsl:template match="/a">
+    <xsl:if test="@fail"><xsl:message terminate="yes">FAIL</xsl:message></xsl:if>
+    <r p="{$p}"><xsl:value-of select="count(b)"/></r>
+  </xsl:template>
+</xsl:stylesheet>''')))
+        results = []
+        errors = []
+
+        def run_thread(n):
+            root = XML(_bytes('<a>%s</a>' % ('<b/>' * n)))
+            failing = XML(_bytes('<a fail="yes"/>'))
+            for i in range(30):
+                result = style(root, p="'%d-%d'" % (n, i)).getroot()
+                results.append((result.get('p'), result.text))
+                try:
+                    style(failing)
+                except self.etree.XSLTApplyError:
+                    errors.append(sys.exc_info()[1].error_log.last_error.message)
+
+        threads = [ threading.Thread(target=run_thread, args=(n,))
+                    for n in range(6) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(
+            sorted([ ('%d-%d' % (n, i), str(n))
+                     for n in range(6) for i in range(30) ]),
+            sorted(results))
+        self.assertEqual(['FAIL'] * (6 * 30), errors)
+
+    def test_xpath_shared_between_threads(self):
+        XML = self.etree.XML
+        find = self.etree.XPath('count(//b[@id = $id]) + f:double(string(@n))',
+                                namespaces={'f': 'testns'},
+                                extensions={('testns', 'double'):
+                                            lambda ctxt, s: 2 * float(s)})
+        results = []
+
+        def run_thread(n):
+            root = XML(_bytes('<a n="%d"><b id="x"/><b id="x"/><b/></a>' % n))
+            for i in range(200):
+                results.append((n, find(root, id='x')))
+
+        threads = [ threading.Thread(target=run_thread, args=(n,))
+                    for n in range(8) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted([(n, 2.0 + 2 * n) for n in range(8)] * 200),
+                         sorted(results))
+
+    def test_xpath_shared_between_threads_errors(self):
+        XML = self.etree.XML
+        find = self.etree.XPath('f:fail()', namespaces={'f': 'testns'},
+                                extensions={('testns', 'fail'): self._fail})
+        results = []
+
+        def run_thread():
+            root = XML(_bytes('<a/>'))
+            for i in range(50):
+                try:
+                    find(root)
+                except ValueError:
+                    results.append(True)
+
+        threads = [ threading.Thread(target=run_thread) for _ in range(4) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(4 * 50, len(results))
+
+    def test_serialise_in_threads(self):
+        root = self.etree.Element('root')
+        for i in range(2000):
+            self.etree.SubElement(root, 'child', id=str(i)).text = 'text'
+        expected = self.etree.tostring(root)
+        results = []
+
+        def run_thread():
+            for i in range(10):
+                results.append(self.etree.tostring(root))
+                f = BytesIO()
+                self.etree.ElementTree(root).write(f)
+                results.append(f.getvalue())
+
+        threads = [ threading.Thread(target=run_thread) for _ in range(4) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([expected] * (4 * 10 * 2), results)
+
+    def test_xpath_shared_between_threads_error_log(self):
+        find = self.etree.XPath('$undefined')
+        root = self.etree.XML(_bytes('<a/>'))
+        try:
+            find(root)
+        except self.etree.XPathEvalError:
+            expected_errors = len(sys.exc_info()[1].error_log)
+        self.assertTrue(expected_errors > 0)
+        error_counts = []
+
+        def run_thread():
+            for i in range(50):
+                try:
+                    find(root)
+                except self.etree.XPathEvalError:
+                    error_counts.append(len(sys.exc_info()[1].error_log))
+
+        threads = [ threading.Thread(target=run_thread) for _ in range(4) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([expected_errors] * (4 * 50), error_counts)
+        self.assertTrue(len(find.error_log) >= expected_errors)
+
+    def _fail(self, ctxt):
+        raise ValueError("failed")
+
 
 class ThreadPipelineTestCase(HelperTestCase):
     """Threading tests based on a thread worker pipeline.
@@ -519,6 +519,100 @@ class ETreeXPathTestCase(HelperTestCase):
         self.assertRaises(LocalException, e, "foo(., 0)")
         self.assertRaises(LocalException, e, "foo(., $value)", value=0)
 
+    def test_xpath_cache(self):
+        root = etree.XML('<a><b id="1"/><b id="2"/></a>')
+        old_info = etree.get_xpath_cache_info()
+        try:
+            etree.set_xpath_cache_size(2)
+            self.assertTrue(etree.get_xpath_cache_info()['size'] <= 2)
+            info = etree.get_xpath_cache_info()
+            self.assertEqual(2, info['max_size'])
+
+            for b in root:
+                self.assertEqual(b.get('id'), b.xpath('string(@id)'))
+            self.assertEqual(info['misses'] + 1,
+                             etree.get_xpath_cache_info()['misses'])
+            self.assertEqual(info['hits'] + 1,
+                             etree.get_xpath_cache_info()['hits'])
+
+            # different arguments use separate entries
+            self.assertEqual(
+                '1', root[0].xpath('string(@id)', smart_strings=False))
+            self.assertEqual(2, etree.get_xpath_cache_info()['size'])
+            root.xpath('count(b)')
+            self.assertEqual(2, etree.get_xpath_cache_info()['size'])
+            self.assertEqual(info['misses'] + 3,
+                             etree.get_xpath_cache_info()['misses'])
+        finally:
+            etree.set_xpath_cache_size(old_info['max_size'])
+
+    def test_xpath_cache_disabled(self):
+        root = etree.XML('<a><b/></a>')
+        old_info = etree.get_xpath_cache_info()
+        try:
+            etree.set_xpath_cache_size(0)
+            self.assertEqual(0, etree.get_xpath_cache_info()['size'])
+            self.assertEqual(1, root.xpath('count(b)'))
+            info = etree.get_xpath_cache_info()
+            self.assertEqual(0, info['size'])
+            self.assertEqual(old_info['hits'], info['hits'])
+            self.assertEqual(old_info['misses'], info['misses'])
+        finally:
+            etree.set_xpath_cache_size(old_info['max_size'])
+        self.assertRaises(ValueError, etree.set_xpath_cache_size, -1)
+
+    def test_xpath_cache_namespaces_extensions(self):
+        root = etree.XML('<a xmlns:x="X" xmlns:y="Y"><x:b/><y:b/><y:b/></a>')
+        self.assertEqual(1, root.xpath('count(p:b)', namespaces={'p': 'X'}))
+        self.assertEqual(2, root.xpath('count(p:b)', namespaces={'p': 'Y'}))
+
+        ext1 = {(None, 'f'): lambda ctxt: 'ext1'}
+        ext2 = {(None, 'f'): lambda ctxt: 'ext2'}
+        self.assertEqual('ext1', root.xpath('f()', extensions=ext1))
+        self.assertEqual('ext2', root.xpath('f()', extensions=ext2))
+        self.assertEqual('ext1', root.xpath('f()', extensions=ext1))
+
+        # modified extensions are used in later calls
+        ext1[(None, 'f')] = lambda ctxt: 'changed'
+        self.assertEqual('changed', root.xpath('f()', extensions=ext1))
+
+    def test_xpath_cache_evaluator(self):
+        root = etree.XML('<a xmlns:x="X"><x:b/></a>')
+        e = etree.XPathEvaluator(root)
+        self.assertRaises(etree.XPathEvalError, e, 'count(p:b)')
+        e.register_namespace('p', 'X')
+        self.assertEqual(1, e('count(p:b)'))
+        info = etree.get_xpath_cache_info()
+        self.assertEqual(1, e('count(p:b)'))
+        new_info = etree.get_xpath_cache_info()
+        self.assertEqual(info['hits'] + 1, new_info['hits'])
+        self.assertEqual(info['misses'], new_info['misses'])
+        e.register_namespace('p', 'Y')
+        self.assertEqual(0, e('count(p:b)'))
+        self.assertRaises(etree.XPathEvalError, e, '\\fad')
+        self.assertRaises(etree.XPathEvalError, e, '\\fad')
+
+        tree = etree.ElementTree(root)
+        e = etree.XPathEvaluator(tree)
+        self.assertEqual('a', e('name(/*)'))
+        self.assertEqual('a', e('name(/*)'))
+
+    def test_xpath_cache_evaluator_lru(self):
+        root = etree.XML('<a/>')
+        e = etree.XPathEvaluator(root)
+        def misses(path):
+            info = etree.get_xpath_cache_info()
+            e(path)
+            return etree.get_xpath_cache_info()['misses'] - info['misses']
+        self.assertEqual(1, misses('1'))
+        for i in range(2, 21):
+            self.assertEqual(1, misses(str(i)))
+        self.assertEqual(0, misses('1'))
+        # discards '2', the least recently used expression
+        self.assertEqual(1, misses('21'))
+        self.assertEqual(0, misses('1'))
+        self.assertEqual(1, misses('2'))
+
 
 class ETreeXPathClassTestCase(HelperTestCase):
     "Tests for the XPath class"
@@ -566,6 +660,68 @@ class ETreeXPathClassTestCase(HelperTestCase):
     def test_xpath_elementtree_error(self):
         self.assertRaises(ValueError, etree.XPath('*'), etree.ElementTree())
 
+    def test_xpath_evaluate_many(self):
+        root = etree.XML('<a><b><p>1</p></b><b><p>2</p></b><b/></a>')
+        expr = etree.XPath("string(p)")
+        self.assertEqual(['1', '2', ''], expr.evaluate_many(root))
+        self.assertEqual(['1', '2'], expr.evaluate_many(iter(root[:2])))
+        self.assertEqual([], expr.evaluate_many([]))
+
+        r = etree.XPath("p").evaluate_many(root)
+        self.assertEqual([1, 1, 0], [len(nodes) for nodes in r])
+        self.assertTrue(r[1][0] is root[1][0])
+
+    def test_xpath_as_text_list(self):
+        root = etree.XML(
+            '<a x="X"><b>B<c>C</c>D</b><![CDATA[E]]><!--F--><?p G?><e/></a>')
+        expr = etree.XPath("*|text()|@*|comment()|processing-instruction()",
+                           as_text_list=True)
+        result = expr(root)
+        self.assertEqual(['X', 'BCD', 'E', 'F', 'G', ''], result)
+        self.assertFalse(hasattr(result[0], 'getparent'))
+        self.assertEqual([], expr(root[1]))
+        self.assertEqual('BCD', etree.XPath("string(b)", as_text_list=True)(root))
+        self.assertEqual([['C'], []], etree.XPath(
+            "c/text()", as_text_list=True).evaluate_many([root[0], root]))
+
+    def test_xpath_as_count(self):
+        root = etree.XML('<a><b/><b><c/></b></a>')
+        self.assertEqual(4, etree.XPath("//*", as_count=True)(root))
+        self.assertEqual(0, etree.XPath("x", as_count=True)(root))
+        self.assertEqual(2, etree.XPath("b", as_count=True)(root))
+        self.assertEqual(2.0, etree.XPath("count(b)", as_count=True)(root))
+        self.assertEqual([2, 0], etree.XPath(
+            "*", as_count=True).evaluate_many([root, root[0]]))
+
+    def test_xpath_result_options_exclusive(self):
+        self.assertRaises(ValueError, etree.XPath, "a",
+                          as_count=True, as_text_list=True)
+
+    def test_xpath_evaluate_many_vars(self):
+        root = etree.XML('<a><b n="1"/><b n="2"/></a>')
+        expr = etree.XPath("@n = $n")
+        self.assertEqual([False, True], expr.evaluate_many(root, n=2))
+
+    def test_xpath_evaluate_many_documents(self):
+        root1 = etree.XML('<a><b>1</b></a>')
+        root2 = etree.XML('<a><b>2</b></a>')
+        expr = etree.XPath("string(/a/b)")
+        self.assertEqual(['1', '2', '1', '2'], expr.evaluate_many(
+            [root1[0], root2, root1, etree.ElementTree(root2)]))
+
+    def test_xpath_evaluate_many_errors(self):
+        root = etree.XML('<a><b/></a>')
+        self.assertRaises(TypeError, etree.XPath('*').evaluate_many, [root, 1])
+        expr = etree.XPath('$var')
+        self.assertRaises(etree.XPathEvalError, expr.evaluate_many, [root])
+        # the evaluation context is still usable
+        self.assertEqual([1.0], expr.evaluate_many([root], var=1))
+
+        def fail(ctxt):
+            raise ValueError("failed")
+        expr = etree.XPath('f()', extensions={(None, 'f'): fail})
+        self.assertRaises(ValueError, expr.evaluate_many, root)
+
 
 class ETreeXPathExsltTestCase(HelperTestCase):
     "Tests for the EXSLT support in XPath (requires libxslt 1.1.25+)"
@@ -4,7 +4,7 @@
 Test cases related to XSLT processing
 """
 
-import unittest, copy, sys, os.path
+import unittest, copy, sys, os.path, tempfile, shutil
 
 this_dir = os.path.dirname(__file__)
 if this_dir not in sys.path:
@@ -430,6 +430,224 @@ class ETreeXSLTTestCase(HelperTestCase):
         self.assertEqual('<html><body>B</body></html>',
                           str(res).strip())
 
+    def test_xslt_transform_to(self):
+        tree = self.parse('<a><b>B</b><c>C</c></a>')
+        style = self.parse('''\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:param name="p" select="'P'"/>
+  <xsl:template match="/">
+    <foo><xsl:value-of select="/a/b/text()" /><xsl:value-of select="$p" /></foo>
+  </xsl:template>
+</xsl:stylesheet>''')
+
+        st = etree.XSLT(style)
+        out = BytesIO()
+        self.assertEqual(None, st.transform_to(out, tree))
+        self.assertEqual(bytes(st(tree)), out.getvalue())
+
+        out = BytesIO()
+        st.transform_to(out, tree.getroot(), p="'X'")
+        self.assertEqual(_bytes('<?xml version="1.0"?>\n<foo>BX</foo>\n'),
+                         out.getvalue())
+
+        self.assertRaises(TypeError, st.transform_to, None, tree)
+
+    def test_xslt_transform_to_encoding(self):
+        tree = self.parse(_bytes('<a><b>\\uF8D2</b></a>'
+                                 ).decode("unicode_escape"))
+        style = self.parse('''\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:output encoding="UTF-16"/>
+  <xsl:template match="/">
+    <foo><xsl:value-of select="/a/b/text()" /></foo>
+  </xsl:template>
+</xsl:stylesheet>''')
+
+        st = etree.XSLT(style)
+        out = BytesIO()
+        st.transform_to(out, tree)
+        self.assertEqual(bytes(st(tree)), out.getvalue())
+
+    def test_xslt_transform_to_text_output(self):
+        tree = self.parse('<a><b>B</b><c>C</c></a>')
+        style = self.parse('''\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:output method="text"/>
+  <xsl:template match="/">
+    <xsl:value-of select="/a/b/text()" />
+  </xsl:template>
+</xsl:stylesheet>''')
+
+        st = etree.XSLT(style)
+        out = BytesIO()
+        st.transform_to(out, tree)
+        self.assertEqual(_bytes('B'), out.getvalue())
+
+    def test_xslt_transform_to_filename(self):
+        tree = self.parse('<a><b>B</b><c>C</c></a>')
+        style = self.parse('''\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:output method="html"/>
+  <xsl:template match="/">
+    <html><body><xsl:value-of select="/a/b/text()" /></body></html>
+  </xsl:template>
+</xsl:stylesheet>''')
+
+        st = etree.XSLT(style)
+        temp_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(temp_dir, 'out.html')
+            st.transform_to(filename, tree)
+            f = open(filename, 'rb')
+            try:
+                data = f.read()
+            finally:
+                f.close()
+            self.assertEqual(_bytes('<html><body>B</body></html>'),
+                             data.strip())
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_xslt_transform_to_error(self):
+        tree = self.parse('<a/>')
+        style = self.parse('''\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:template match="/">
+    <xsl:message terminate="yes">STOP</xsl:message>
+  </xsl:template>
+</xsl:stylesheet>''')
+
+        st = etree.XSLT(style)
+        out = BytesIO()
+        self.assertRaises(etree.XSLTApplyError, st.transform_to, out, tree)
+        self.assertEqual(_bytes(''), out.getvalue())
+
+    def _map_stylesheet(self):
+        return etree.XSLT(self.parse('''\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:param name="p" select="'P'"/>
+  <xsl:template match="/">
+    <xsl:if test="/fail"><xsl:message terminate="yes">FAIL</xsl:message></xsl:if>
+    <foo><xsl:value-of select="/*/text()" /><xsl:value-of select="$p" /></foo>
+  </xsl:template>
+</xsl:stylesheet>'''))
+
+    def test_xslt_map(self):
+        st = self._map_stylesheet()
+        inputs = [ etree.XML('<a>%d</a>' % i) for i in range(20) ]
+        for workers in (None, 1, 3):
+            results = st.map(inputs, workers=workers,
+                             p=etree.XSLT.strparam("X"))
+            self.assertEqual(20, len(results))
+            self.assertEqual(['%dX' % i for i in range(20)],
+                             [ result.getroot().text for result in results ])
+
+        self.assertEqual([], st.map([]))
+        self.assertRaises(ValueError, st.map, inputs, workers=0)
+
+    def test_xslt_map_serialize(self):
+        st = self._map_stylesheet()
+        inputs = [ etree.XML('<a>%d</a>' % i) for i in range(10) ]
+        results = st.map(iter(inputs), workers=2, serialize=True, p="'Y'")
+        self.assertEqual(
+            [ _bytes('<?xml version="1.0"?>\n<foo>%dY</foo>\n' % i)
+              for i in range(10) ],
+            results)
+
+    def test_xslt_map_errors(self):
+        st = self._map_stylesheet()
+        inputs = [ etree.XML('<a>1</a>'), etree.XML('<fail/>'), None,
+                   etree.XML('<a>2</a>') ]
+        for workers in (1, 2):
+            results = st.map(inputs, workers=workers, serialize=True)
+            self.assertEqual(4, len(results))
+            self.assertEqual(_bytes('<?xml version="1.0"?>\n<foo>1P</foo>\n'),
+                             results[0])
+            self.assertTrue(isinstance(results[1], etree.XSLTApplyError))
+            self.assertTrue(isinstance(results[2], TypeError))
+            self.assertEqual(_bytes('<?xml version="1.0"?>\n<foo>2P</foo>\n'),
+                             results[3])
+
+    def _profile_stylesheet(self):
+        return etree.XSLT(etree.XML('''\
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+  <xsl:template match="/"><r><xsl:apply-templates/></r></xsl:template>
+  <xsl:template match="a"><x><xsl:apply-templates/><xsl:call-template name="n"/></x></xsl:template>
+  <xsl:template name="n"><y/></xsl:template>
+</xsl:stylesheet>'''))
+
+    def test_xslt_profile(self):
+        st = self._profile_stylesheet()
+        for i in range(2):
+            result = st(etree.XML('<a><a/><a/></a>'), profile_run=True)
+            profile = result.xslt_profile.getroot()
+            self.assertEqual('profile', profile.tag)
+            self.assertEqual(
+                [('', '3'), ('/', '1'), ('a', '3')],
+                sorted([ (el.get('match'), el.get('calls')) for el in profile ]))
+
+        result = st(etree.XML('<a/>'))
+        self.assertEqual(None, result.xslt_profile)
+
+    def test_xslt_profile_object(self):
+        st = self._profile_stylesheet()
+        profile = etree.XSLTProfile()
+        self.assertEqual(0, profile.runs)
+        self.assertEqual([], profile.templates)
+
+        result = st(etree.XML('<a><a/><a/></a>'), profile_run=profile)
+        self.assertNotEqual(None, result.xslt_profile)
+        st(etree.XML('<a/>'), profile_run=profile)
+        self.assertEqual(2, profile.runs)
+        self.assertTrue(profile.total_time >= 0.0)
+
+        templates = dict([ ((t.match, t.name), t) for t in profile.templates ])
+        self.assertEqual(3, len(templates))
+        self.assertEqual(2, templates[('/', None)].calls)
+        self.assertEqual(4, templates[('a', None)].calls)
+        self.assertEqual(4, templates[(None, 'n')].calls)
+        for template in templates.values():
+            self.assertEqual(None, template.mode)
+            self.assertTrue(template.self_time >= 0.0)
+            self.assertTrue(template.average_time >= 0.0)
+
+        profile.reset()
+        self.assertEqual(0, profile.runs)
+        self.assertEqual([], profile.templates)
+
+    def test_xslt_profile_sampling(self):
+        st = self._profile_stylesheet()
+        self.assertRaises(ValueError, etree.XSLTProfile, sample_interval=0)
+        profile = etree.XSLTProfile(sample_interval=3)
+        profiled = [ st(etree.XML('<a/>'), profile_run=profile).xslt_profile
+                     is not None
+                     for i in range(7) ]
+        self.assertEqual([True, False, False, True, False, False, True],
+                         profiled)
+        self.assertEqual(3, profile.runs)
+        templates = dict([ (t.match, t) for t in profile.templates ])
+        self.assertEqual(3, templates['/'].calls)
+
+    def test_xslt_profile_merge(self):
+        st = self._profile_stylesheet()
+        profile1 = etree.XSLTProfile()
+        profile2 = etree.XSLTProfile()
+        st(etree.XML('<a/>'), profile_run=profile1)
+        st(etree.XML('<a><a/></a>'), profile_run=profile2)
+        profile1.merge(profile2)
+        self.assertEqual(2, profile1.runs)
+        templates = dict([ (t.match, t) for t in profile1.templates ])
+        self.assertEqual(2, templates['/'].calls)
+        self.assertEqual(3, templates['a'].calls)
+        self.assertEqual(1, profile2.runs)
+
     def test_xslt_include(self):
         tree = etree.parse(fileInTestDir('test1.xslt'))
         st = etree.XSLT(tree)
@@ -440,6 +658,128 @@ class ETreeXSLTTestCase(HelperTestCase):
         f.close()
         st = etree.XSLT(tree)
 
+    def test_xslt_from_file(self):
+        st = etree.XSLT.from_file(fileInTestDir('test1.xslt'), cache=False)
+        self.assertTrue(isinstance(st, etree.XSLT))
+        self.assertFalse(st is etree.XSLT.from_file(
+            fileInTestDir('test1.xslt'), cache=False))
+
+    def test_xslt_from_file_cache(self):
+        filename = fileInTestDir('test1.xslt')
+        st = etree.XSLT.from_file(filename)
+        self.assertTrue(st is etree.XSLT.from_file(filename))
+        self.assertTrue(st is etree.XSLT.from_file(
+            os.path.join(os.path.dirname(filename), '.', 'test1.xslt')))
+        self.assertFalse(st is etree.XSLT.from_file(filename, regexp=False))
+
+    def test_xslt_from_file_cache_extensions(self):
+        filename = fileInTestDir('test1.xslt')
+        def ext(context):
+            return 'ext'
+        st = etree.XSLT.from_file(
+            filename, extensions={('testns', 'ext'): ext})
+        self.assertTrue(st is etree.XSLT.from_file(
+            filename, extensions={('testns', 'ext'): ext}))
+        self.assertFalse(st is etree.XSLT.from_file(filename))
+
+    def test_xslt_from_file_cache_filelike(self):
+        f = open(fileInTestDir('test1.xslt'), 'rb')
+        try:
+            st = etree.XSLT.from_file(f)
+        finally:
+            f.close()
+        self.assertTrue(isinstance(st, etree.XSLT))
+
+    def test_xslt_from_file_cache_size(self):
+        filename = fileInTestDir('test1.xslt')
+        st = etree.XSLT.from_file(filename)
+        try:
+            etree.XSLT.set_file_cache_size(0)
+            st2 = etree.XSLT.from_file(filename)
+            self.assertFalse(st is st2)
+            self.assertFalse(st2 is etree.XSLT.from_file(filename))
+        finally:
+            etree.XSLT.set_file_cache_size(50)
+        st = etree.XSLT.from_file(filename)
+        self.assertTrue(st is etree.XSLT.from_file(filename))
+        self.assertRaises(ValueError, etree.XSLT.set_file_cache_size, -1)
+
+    def _write_stylesheet(self, filename, template, mtime):
+        f = open(filename, 'wb')
+        try:
+            f.write(_bytes(
+                '<xsl:stylesheet version="1.0" '
+                'xmlns:xsl="http://www.w3.org/1999/XSL/Transform">'
+                '%s</xsl:stylesheet>' % template))
+        finally:
+            f.close()
+        os.utime(filename, (mtime, mtime))
+
+    def test_xslt_from_file_cache_modified(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(temp_dir, 'style.xsl')
+            self._write_stylesheet(
+                filename, '<xsl:template match="/"><a>A</a></xsl:template>',
+                1000000000)
+            st = etree.XSLT.from_file(filename)
+            self.assertEqual('A', st(etree.XML('<x/>')).getroot().text)
+
+            self._write_stylesheet(
+                filename, '<xsl:template match="/"><a>B</a></xsl:template>',
+                1000000100)
+            st2 = etree.XSLT.from_file(filename)
+            self.assertFalse(st is st2)
+            self.assertEqual('B', st2(etree.XML('<x/>')).getroot().text)
+            self.assertTrue(st2 is etree.XSLT.from_file(filename))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_xslt_from_file_cache_modified_import(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(temp_dir, 'style.xsl')
+            imported = os.path.join(temp_dir, 'imported.xsl')
+            included = os.path.join(temp_dir, 'included.xsl')
+            self._write_stylesheet(
+                filename,
+                '<xsl:import href="imported.xsl"/>'
+                '<xsl:include href="included.xsl"/>'
+                '<xsl:template match="/"><a>'
+                '<xsl:call-template name="imp"/>'
+                '<xsl:call-template name="inc"/>'
+                '</a></xsl:template>',
+                1000000000)
+            self._write_stylesheet(
+                imported, '<xsl:template name="imp"><b>B</b></xsl:template>',
+                1000000000)
+            self._write_stylesheet(
+                included, '<xsl:template name="inc"><c>C</c></xsl:template>',
+                1000000000)
+
+            st = etree.XSLT.from_file(filename)
+            root = st(etree.XML('<x/>')).getroot()
+            self.assertEqual(['B', 'C'], [el.text for el in root])
+            self.assertTrue(st is etree.XSLT.from_file(filename))
+
+            self._write_stylesheet(
+                imported, '<xsl:template name="imp"><b>BB</b></xsl:template>',
+                1000000100)
+            st2 = etree.XSLT.from_file(filename)
+            self.assertFalse(st is st2)
+            root = st2(etree.XML('<x/>')).getroot()
+            self.assertEqual(['BB', 'C'], [el.text for el in root])
+
+            self._write_stylesheet(
+                included, '<xsl:template name="inc"><c>CC</c></xsl:template>',
+                1000000100)
+            st3 = etree.XSLT.from_file(filename)
+            self.assertFalse(st2 is st3)
+            root = st3(etree.XML('<x/>')).getroot()
+            self.assertEqual(['BB', 'CC'], [el.text for el in root])
+        finally:
+            shutil.rmtree(temp_dir)
+
     def test_xslt_multiple_transforms(self):
         xml = '<a/>'
         xslt = '''\
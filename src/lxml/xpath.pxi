@@ -1,5 +1,8 @@
 # XPath evaluation
 
+# number of compiled expressions that an XPath evaluator keeps
+DEF __XPATH_EVALUATOR_CACHE_SIZE = 20
+
 class XPathSyntaxError(LxmlSyntaxError, XPathError):
     pass
 
@@ -28,6 +31,11 @@ _XPATH_EVAL_ERRORS = (
     xmlerror.XML_XPATH_INVALID_CTXT_POSITION
 )
 
+ctypedef enum _XPathResultMode:
+    XPATH_RESULT_DEFAULT   = 0
+    XPATH_RESULT_TEXT_LIST = 1
+    XPATH_RESULT_COUNT     = 2
+
 cdef int _register_xpath_function(void* ctxt, name_utf, ns_utf):
     if ns_utf is None:
         return xpath.xmlXPathRegisterFunc(
@@ -51,12 +59,26 @@ cdef int _unregister_xpath_function(void* ctxt, name_utf, ns_utf):
 @cython.internal
 cdef class _XPathContext(_BaseContext):
     cdef object _variables
+    # compiled expression that is evaluated in this context (XPath only)
+    cdef xpath.xmlXPathCompExpr* _xpath
     def __init__(self, namespaces, extensions, error_log, enable_regexp, variables,
                  build_smart_strings):
         self._variables = variables
         _BaseContext.__init__(self, namespaces, extensions, error_log, enable_regexp,
                               build_smart_strings)
 
+    cdef _BaseContext _copy(self):
+        cdef _XPathContext context
+        if self._namespaces is not None:
+            namespaces = self._namespaces[:]
+        else:
+            namespaces = None
+        context = _XPathContext(namespaces, None, self._error_log, False,
+                                self._variables, self._build_smart_strings)
+        if self._extensions is not None:
+            context._extensions = self._extensions.copy()
+        return context
+
     cdef set_context(self, xpath.xmlXPathContext* xpathCtxt):
         self._set_xpath_context(xpathCtxt)
         self._setupDict(xpathCtxt)
@@ -216,36 +238,52 @@ cdef class _XPathEvaluatorBase:
                 u"Error in xpath expression"),
                                self._error_log)
 
-    cdef _raise_eval_error(self):
+    cdef _raise_eval_error(self, _ErrorLog error_log=None):
         cdef _BaseErrorLog entries
-        entries = self._error_log.filter_types(_XPATH_EVAL_ERRORS)
+        if error_log is None:
+            error_log = self._error_log
+        entries = error_log.filter_types(_XPATH_EVAL_ERRORS)
         if not entries:
-            entries = self._error_log.filter_types(_XPATH_SYNTAX_ERRORS)
+            entries = error_log.filter_types(_XPATH_SYNTAX_ERRORS)
         if entries:
             message = entries._buildExceptionMessage(None)
             if message is not None:
-                raise XPathEvalError(message, self._error_log)
-        raise XPathEvalError(self._error_log._buildExceptionMessage(
+                raise XPathEvalError(message, error_log)
+        raise XPathEvalError(error_log._buildExceptionMessage(
                 u"Error in xpath expression"),
-                             self._error_log)
+                             error_log)
 
     cdef object _handle_result(self, xpath.xmlXPathObject* xpathObj, _Document doc):
-        if self._context._exc._has_raised():
+        return self._handle_context_result(self._context, xpathObj, doc)
+
+    @cython.final
+    cdef object _handle_context_result(
+            self, _XPathContext context, xpath.xmlXPathObject* xpathObj,
+            _Document doc, _XPathResultMode result_mode=XPATH_RESULT_DEFAULT):
+        if context._exc._has_raised():
             if xpathObj is not NULL:
                 _freeXPathObject(xpathObj)
                 xpathObj = NULL
-            self._context._release_temp_refs()
-            self._context._exc._raise_if_stored()
+            context._release_temp_refs()
+            context._exc._raise_if_stored()
 
         if xpathObj is NULL:
-            self._context._release_temp_refs()
-            self._raise_eval_error()
+            context._release_temp_refs()
+            self._raise_eval_error(context._error_log)
 
         try:
-            result = _unwrapXPathObject(xpathObj, doc, self._context)
+            if xpathObj.type != xpath.XPATH_NODESET or \
+                    result_mode == XPATH_RESULT_DEFAULT:
+                result = _unwrapXPathObject(xpathObj, doc, context)
+            elif xpathObj.nodesetval is NULL:
+                result = 0 if result_mode == XPATH_RESULT_COUNT else []
+            elif result_mode == XPATH_RESULT_COUNT:
+                result = xpathObj.nodesetval.nodeNr
+            else:
+                result = _collectNodeSetStrings(xpathObj.nodesetval)
         finally:
             _freeXPathObject(xpathObj)
-            self._context._release_temp_refs()
+            context._release_temp_refs()
 
         return result
 
@@ -264,6 +302,10 @@ cdef class XPathElementEvaluator(_XPathEvaluatorBase):
     you pass ``smart_strings=False``.
     """
     cdef _Element _element
+    cdef dict _compiled_paths
+    cdef list _compiled_order
+    # evaluated only once, do not keep the compiled expression
+    cdef bint _single_use
     def __init__(self, _Element element not None, *, namespaces=None,
                  extensions=None, regexp=True, smart_strings=True):
         cdef xpath.xmlXPathContext* xpathCtxt
@@ -307,7 +349,6 @@ cdef class XPathElementEvaluator(_XPathEvaluatorBase):
         cdef xpath.xmlXPathObject*  xpathObj
         cdef _Document doc
         assert self._xpathCtxt is not NULL, "XPath context not initialised"
-        path = _utf8(_path)
         doc = self._element._doc
 
         self._lock()
@@ -315,10 +356,7 @@ cdef class XPathElementEvaluator(_XPathEvaluatorBase):
         try:
             self._context.register_context(doc)
             self._context.registerVariables(_variables)
-            c_path = _xcstr(path)
-            with nogil:
-                xpathObj = xpath.xmlXPathEvalExpression(
-                    c_path, self._xpathCtxt)
+            xpathObj = self._evalPath(_path)
             result = self._handle_result(xpathObj, doc)
         finally:
             self._context.unregister_context()
@@ -326,6 +364,65 @@ cdef class XPathElementEvaluator(_XPathEvaluatorBase):
 
         return result
 
+    @cython.final
+    cdef xpath.xmlXPathObject* _evalPath(self, _path) except? NULL:
+        u"""Evaluate the expression in the prepared XPath context.
+
+        The most recently used compiled expressions are kept for later
+        calls of this evaluator.  They are not shared with other
+        contexts, because libxml2 caches function lookups of the
+        evaluation context in them.  Lookups are counted in the
+        statistics of the global XPath cache.
+        """
+        cdef xpath.xmlXPathCompExpr* c_comp
+        cdef xpath.xmlXPathObject* xpathObj
+        cdef _CompiledXPathExpression compiled
+        path = _utf8(_path)
+        c_path = _xcstr(path)
+        if self._single_use:
+            with nogil:
+                xpathObj = xpath.xmlXPathEvalExpression(
+                    c_path, self._xpathCtxt)
+            return xpathObj
+
+        if self._compiled_paths is None:
+            self._compiled_paths = {}
+            self._compiled_order = []
+        compiled = self._compiled_paths.get(path)
+        if compiled is not None:
+            _XPATH_CACHE.hits += 1
+            if self._compiled_order[-1] != path:
+                self._compiled_order.remove(path)
+                self._compiled_order.append(path)
+        else:
+            _XPATH_CACHE.misses += 1
+            c_comp = xpath.xmlXPathCtxtCompile(self._xpathCtxt, c_path)
+            if c_comp is NULL:
+                # syntax error, reported from the error log
+                return NULL
+            compiled = _CompiledXPathExpression.__new__(_CompiledXPathExpression)
+            compiled._c_comp = c_comp
+            if len(self._compiled_order) >= __XPATH_EVALUATOR_CACHE_SIZE:
+                # discard the least recently used expression
+                del self._compiled_paths[self._compiled_order.pop(0)]
+            self._compiled_paths[path] = compiled
+            self._compiled_order.append(path)
+        c_comp = compiled._c_comp
+        with nogil:
+            xpathObj = xpath.xmlXPathCompiledEval(c_comp, self._xpathCtxt)
+        return xpathObj
+
+
+@cython.final
+@cython.internal
+cdef class _CompiledXPathExpression:
+    u"""Owner of a compiled XPath expression.
+    """
+    cdef xpath.xmlXPathCompExpr* _c_comp
+    def __dealloc__(self):
+        if self._c_comp is not NULL:
+            xpath.xmlXPathFreeCompExpr(self._c_comp)
+
 
 cdef class XPathDocumentEvaluator(XPathElementEvaluator):
     u"""XPathDocumentEvaluator(self, etree, namespaces=None, extensions=None, regexp=True, smart_strings=True)
@@ -356,7 +453,6 @@ cdef class XPathDocumentEvaluator(XPathElementEvaluator):
         cdef xmlDoc* c_doc
         cdef _Document doc
         assert self._xpathCtxt is not NULL, "XPath context not initialised"
-        path = _utf8(_path)
         doc = self._element._doc
 
         self._lock()
@@ -365,12 +461,9 @@ cdef class XPathDocumentEvaluator(XPathElementEvaluator):
             c_doc = _fakeRootDoc(doc._c_doc, self._element._c_node)
             try:
                 self._context.registerVariables(_variables)
-                c_path = _xcstr(path)
-                with nogil:
-                    self._xpathCtxt.doc  = c_doc
-                    self._xpathCtxt.node = tree.xmlDocGetRootElement(c_doc)
-                    xpathObj = xpath.xmlXPathEvalExpression(
-                        c_path, self._xpathCtxt)
+                self._xpathCtxt.doc  = c_doc
+                self._xpathCtxt.node = tree.xmlDocGetRootElement(c_doc)
+                xpathObj = self._evalPath(_path)
                 result = self._handle_result(xpathObj, doc)
             finally:
                 _destroyFakeDoc(doc._c_doc, c_doc)
@@ -407,7 +500,7 @@ def XPathEvaluator(etree_or_element, *, namespaces=None, extensions=None,
 
 
 cdef class XPath(_XPathEvaluatorBase):
-    u"""XPath(self, path, namespaces=None, extensions=None, regexp=True, smart_strings=True)
+    u"""XPath(self, path, namespaces=None, extensions=None, regexp=True, smart_strings=True, as_text_list=False, as_count=False)
     A compiled XPath expression that can be called on Elements and ElementTrees.
 
     Besides the XPath expression, you can pass prefix-namespace
@@ -417,15 +510,40 @@ cdef class XPath(_XPathEvaluatorBase):
     boolean keyword (defaults to True).  Smart strings will be
     returned for string results unless you pass
     ``smart_strings=False``.
+
+    Node-set results can be reduced without creating any Element
+    objects.  ``as_text_list=True`` returns a list of the plain string
+    values of the nodes (as by the XPath ``string()`` function) and
+    ``as_count=True`` returns the number of nodes.  Other results are
+    not affected by these options.
+
+    A single XPath object can be called from multiple threads at the
+    same time.  Each concurrent call uses its own evaluation context and
+    its own copy of the compiled expression (libxml2 caches lookups in
+    it during evaluation), which are taken from an internal pool and
+    reused afterwards.  Errors are collected per call and then added to
+    the ``error_log``.
     """
     cdef xpath.xmlXPathCompExpr* _xpath
     cdef bytes _path
+    cdef list _idle_contexts
+    cdef _XPathResultMode _result_mode
     def __cinit__(self):
         self._xpath = NULL
 
     def __init__(self, path, *, namespaces=None, extensions=None,
-                 regexp=True, smart_strings=True):
+                 regexp=True, smart_strings=True,
+                 as_text_list=False, as_count=False):
         cdef xpath.xmlXPathContext* xpathCtxt
+        if as_text_list and as_count:
+            raise ValueError, \
+                u"only one of 'as_text_list' and 'as_count' may be used"
+        if as_text_list:
+            self._result_mode = XPATH_RESULT_TEXT_LIST
+        elif as_count:
+            self._result_mode = XPATH_RESULT_COUNT
+        else:
+            self._result_mode = XPATH_RESULT_DEFAULT
         _XPathEvaluatorBase.__init__(self, namespaces, extensions,
                                      regexp, smart_strings)
         self._path = _utf8(path)
@@ -436,10 +554,14 @@ cdef class XPath(_XPathEvaluatorBase):
         self._xpath = xpath.xmlXPathCtxtCompile(xpathCtxt, _xcstr(self._path))
         if self._xpath is NULL:
             self._raise_parse_error()
+        self._context._xpath = self._xpath
+        self._idle_contexts = [self._context]
 
     def __call__(self, _etree_or_element, **_variables):
         u"__call__(self, _etree_or_element, **_variables)"
         cdef xpath.xmlXPathObject*  xpathObj
+        cdef xpath.xmlXPathContext* xpathCtxt
+        cdef _XPathContext context
         cdef _Document document
         cdef _Element element
 
@@ -447,22 +569,109 @@ cdef class XPath(_XPathEvaluatorBase):
         document = _documentOrRaise(_etree_or_element)
         element  = _rootNodeOrRaise(_etree_or_element)
 
-        self._lock()
-        self._xpathCtxt.doc  = document._c_doc
-        self._xpathCtxt.node = element._c_node
+        context = self._acquireContext()
+        xpathCtxt = context._xpathCtxt
+        xpathCtxt.doc  = document._c_doc
+        xpathCtxt.node = element._c_node
 
         try:
-            self._context.register_context(document)
-            self._context.registerVariables(_variables)
+            context.register_context(document)
+            context.registerVariables(_variables)
             with nogil:
-                xpathObj = xpath.xmlXPathCompiledEval(
-                    self._xpath, self._xpathCtxt)
-            result = self._handle_result(xpathObj, document)
+                xpathObj = xpath.xmlXPathCompiledEval(context._xpath, xpathCtxt)
+            result = self._handle_context_result(
+                context, xpathObj, document, self._result_mode)
         finally:
-            self._context.unregister_context()
-            self._unlock()
+            context.unregister_context()
+            self._releaseContext(context)
         return result
 
+    def evaluate_many(self, elements, **_variables):
+        u"""evaluate_many(self, elements, **_variables)
+
+        Evaluate the expression once for each Element (or ElementTree) in
+        the iterable ``elements`` and return a list of the results.
+
+        The evaluation context is set up only once for all elements of the
+        same document, which avoids most of the per-call overhead when
+        extracting values from many nodes.  Variables apply to all
+        evaluations.
+        """
+        cdef xpath.xmlXPathObject*  xpathObj
+        cdef xpath.xmlXPathContext* xpathCtxt
+        cdef _XPathContext context
+        cdef _Document document = None
+        cdef _Element element
+        cdef list results = []
+
+        assert self._xpathCtxt is not NULL, "XPath context not initialised"
+        context = self._acquireContext()
+        xpathCtxt = context._xpathCtxt
+        try:
+            for item in elements:
+                element = _rootNodeOrRaise(item)
+                if element._doc is not document:
+                    if document is not None:
+                        document = None
+                        context.unregister_context()
+                    document = element._doc
+                    xpathCtxt.doc = document._c_doc
+                    context.register_context(document)
+                    context.registerVariables(_variables)
+                xpathCtxt.node = element._c_node
+                with nogil:
+                    xpathObj = xpath.xmlXPathCompiledEval(context._xpath, xpathCtxt)
+                results.append(self._handle_context_result(
+                    context, xpathObj, document, self._result_mode))
+        finally:
+            if document is not None:
+                context.unregister_context()
+            self._releaseContext(context)
+        return results
+
+    @cython.final
+    cdef _XPathContext _acquireContext(self):
+        u"""Take an unused evaluation context from the pool or create a
+        new one with its own compiled expression.  Errors go into a new
+        log for each call.  The list operations are atomic under the GIL.
+        """
+        cdef xpath.xmlXPathContext* xpathCtxt
+        cdef _XPathContext context
+        try:
+            context = self._idle_contexts.pop()
+        except IndexError:
+            context = <_XPathContext>self._context._copy()
+            xpathCtxt = xpath.xmlXPathNewContext(NULL)
+            if xpathCtxt is NULL:
+                raise MemoryError()
+            try:
+                context.set_context(xpathCtxt)
+            except:
+                context._xpathCtxt = NULL
+                xpath.xmlXPathFreeContext(xpathCtxt)
+                raise
+            context._xpath = xpath.xmlXPathCtxtCompile(
+                xpathCtxt, _xcstr(self._path))
+            if context._xpath is NULL:
+                context._xpathCtxt = NULL
+                xpath.xmlXPathFreeContext(xpathCtxt)
+                raise MemoryError()
+        context._error_log = _ErrorLog()
+        return context
+
+    @cython.final
+    cdef _releaseContext(self, _XPathContext context):
+        u"""Pass the errors of a call on to the shared error log and put
+        the context back into the pool.
+        """
+        cdef _ErrorLog error_log = context._error_log
+        context._error_log = self._error_log
+        for entry in error_log:
+            self._error_log.receive(entry)
+        if error_log.last_error is not None:
+            self._error_log.last_error = error_log.last_error
+        self._idle_contexts.append(context)
+
     property path:
         u"""The literal XPath expression.
         """
@@ -470,6 +679,15 @@ cdef class XPath(_XPathEvaluatorBase):
             return self._path.decode(u'UTF-8')
 
     def __dealloc__(self):
+        cdef _XPathContext context
+        if self._idle_contexts is not None:
+            for context in self._idle_contexts:
+                if context is self._context:
+                    continue
+                if context._xpath is not NULL:
+                    xpath.xmlXPathFreeCompExpr(context._xpath)
+                if context._xpathCtxt is not NULL:
+                    xpath.xmlXPathFreeContext(context._xpathCtxt)
         if self._xpath is not NULL:
             xpath.xmlXPathFreeCompExpr(self._xpath)
 
@@ -483,7 +701,7 @@ _replace_strings = re.compile(b'("[^"]*")|(\'[^\']*\')').sub
 _find_namespaces = re.compile(b'({[^}]+})').findall
 
 cdef class ETXPath(XPath):
-    u"""ETXPath(self, path, extensions=None, regexp=True, smart_strings=True)
+    u"""ETXPath(self, path, extensions=None, regexp=True, smart_strings=True, as_text_list=False, as_count=False)
     Special XPath class that supports the ElementTree {uri} notation for namespaces.
 
     Note that this class does not accept the ``namespace`` keyword
@@ -492,11 +710,12 @@ cdef class ETXPath(XPath):
     you pass ``smart_strings=False``.
     """
     def __init__(self, path, *, extensions=None, regexp=True,
-                 smart_strings=True):
+                 smart_strings=True, as_text_list=False, as_count=False):
         path, namespaces = self._nsextract_path(path)
         XPath.__init__(self, path, namespaces=namespaces,
                        extensions=extensions, regexp=regexp,
-                       smart_strings=smart_strings)
+                       smart_strings=smart_strings,
+                       as_text_list=as_text_list, as_count=as_count)
 
     cdef _nsextract_path(self, path):
         # replace {namespaces} by new prefixes
@@ -519,3 +738,174 @@ cdef class ETXPath(XPath):
                 path_utf = path_utf.replace(namespace_def, prefix_str)
         path = path_utf.decode('utf8')
         return path, namespaces
+
+
+cdef list _collectNodeSetStrings(xpath.xmlNodeSet* c_nodeset):
+    u"""Build a list of the XPath string values of all nodes in a node set.
+    """
+    cdef xmlNode* c_node
+    cdef xmlChar* c_text
+    cdef list result = []
+    cdef int i
+    for i in range(c_nodeset.nodeNr):
+        c_node = c_nodeset.nodeTab[i]
+        if c_node.type == tree.XML_TEXT_NODE or \
+                c_node.type == tree.XML_CDATA_SECTION_NODE:
+            result.append(funicode(c_node.content)
+                          if c_node.content is not NULL else u'')
+            continue
+        c_text = tree.xmlNodeGetContent(c_node)
+        if c_text is NULL:
+            result.append(u'')
+            continue
+        try:
+            result.append(funicode(c_text))
+        finally:
+            tree.xmlFree(c_text)
+    return result
+
+
+################################################################################
+# global cache of compiled XPath expressions
+
+@cython.final
+@cython.internal
+cdef class _XPathCacheEntry:
+    cdef object key
+    cdef XPath xpath
+    cdef _XPathCacheEntry prev
+    cdef _XPathCacheEntry next
+
+@cython.final
+@cython.internal
+cdef class _XPathCache:
+    u"""Thread-safe LRU cache of compiled XPath objects.
+
+    The entries are kept in a circular list in the order of their last
+    use.  Lookups and updates never call back into Python code, so the
+    GIL protects them.  Compiling a new expression happens outside of
+    the update, so two threads may compile the same expression at the
+    same time, in which case only the first result is kept.
+    """
+    cdef dict _entries
+    cdef _XPathCacheEntry _root
+    cdef Py_ssize_t _max_size
+    cdef readonly unsigned long hits
+    cdef readonly unsigned long misses
+    def __cinit__(self):
+        self._entries = {}
+        self._root = _XPathCacheEntry()
+        self._root.prev = self._root.next = self._root
+        self._max_size = 100
+        self.hits = self.misses = 0
+
+    cdef XPath get(self, path, namespaces, extensions, bint regexp,
+                   bint smart_strings):
+        u"""Return a compiled XPath object for the arguments, or None if
+        the cache is disabled, extensions are passed, the arguments are
+        not hashable or the expression does not compile.
+
+        Extension mappings can be modified between calls, so expressions
+        that use them are never cached.
+        """
+        cdef _XPathCacheEntry entry
+        cdef XPath compiled
+        if self._max_size <= 0 or extensions is not None:
+            return None
+        try:
+            if namespaces is None:
+                ns_key = None
+            elif isinstance(namespaces, dict):
+                ns_key = frozenset(namespaces.items())
+            else:
+                ns_key = tuple(namespaces)
+            key = (path, ns_key, regexp, smart_strings)
+            entry = self._entries.get(key)
+        except TypeError:
+            return None
+        if entry is not None:
+            self.hits += 1
+            self._moveToFront(entry)
+            return entry.xpath
+
+        self.misses += 1
+        try:
+            compiled = XPath(path, namespaces=namespaces,
+                             regexp=regexp, smart_strings=smart_strings)
+        except XPathSyntaxError:
+            return None
+        entry = self._entries.get(key)
+        if entry is not None:
+            # compiled concurrently by another thread
+            self._moveToFront(entry)
+            return entry.xpath
+        entry = _XPathCacheEntry()
+        entry.key = key
+        entry.xpath = compiled
+        self._entries[key] = entry
+        self._moveToFront(entry)
+        self._shrink()
+        return compiled
+
+    cdef void _moveToFront(self, _XPathCacheEntry entry):
+        if entry.next is not None:
+            entry.prev.next = entry.next
+            entry.next.prev = entry.prev
+        entry.prev = self._root
+        entry.next = self._root.next
+        self._root.next.prev = entry
+        self._root.next = entry
+
+    cdef _shrink(self):
+        cdef _XPathCacheEntry entry
+        cdef list removed = []
+        while python.PyDict_Size(self._entries) > self._max_size:
+            entry = self._root.prev
+            entry.prev.next = self._root
+            self._root.prev = entry.prev
+            del self._entries[entry.key]
+            entry.prev = entry.next = None
+            # delay the deallocation until the cache is consistent
+            removed.append(entry)
+        del removed[:]
+
+    cdef set_max_size(self, Py_ssize_t max_size):
+        if max_size < 0:
+            raise ValueError, u"cache size must not be negative"
+        self._max_size = max_size
+        self._shrink()
+
+    cdef dict info(self):
+        return {
+            u'size': python.PyDict_Size(self._entries),
+            u'max_size': self._max_size,
+            u'hits': self.hits,
+            u'misses': self.misses,
+            }
+
+cdef _XPathCache _XPATH_CACHE = _XPathCache()
+
+def set_xpath_cache_size(size):
+    u"""set_xpath_cache_size(size)
+
+    Set the maximum number of compiled XPath expressions that
+    ``Element.xpath()`` keeps for reuse.  The least recently used
+    expressions are discarded first.  A size of 0 disables the cache.
+    The default size is 100.
+
+    Expressions are cached separately for each combination of namespaces,
+    ``regexp`` and ``smart_strings`` arguments.  Calls that pass
+    ``extensions`` are not cached.  This does not affect the XPath
+    evaluators, which keep their 20 most recently used expressions.
+    """
+    _XPATH_CACHE.set_max_size(size)
+
+def get_xpath_cache_info():
+    u"""get_xpath_cache_info()
+
+    Return a dict with the current ``size``, the ``max_size`` and the
+    number of ``hits`` and ``misses`` of the global XPath expression
+    cache.  The hits and misses include the lookups of the XPath
+    evaluators in their own expressions.
+    """
+    return _XPATH_CACHE.info()
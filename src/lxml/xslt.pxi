@@ -349,19 +349,30 @@ cdef class XSLT:
 
     Keyword arguments of the XSLT call:
 
-    - profile_run: enable XSLT profiling (default: False)
+    - profile_run: enable XSLT profiling (default: False), or an
+      `XSLTProfile` object that collects the profiling data
 
     Other keyword arguments of the call are passed to the stylesheet
     as parameters.
+
+    An XSLT object can be called from multiple threads at the same time.
+    The compiled stylesheet is shared by all calls, which use separate
+    transformation contexts.
     """
     cdef _XSLTContext _context
     cdef xslt.xsltStylesheet* _c_style
     cdef _XSLTResolverContext _xslt_resolver_context
     cdef XSLTAccessControl _access_control
     cdef _ErrorLog _error_log
+    cdef list _idle_contexts
+    cdef python.PyThread_type_lock _profile_lock
 
     def __cinit__(self):
         self._c_style = NULL
+        if config.ENABLE_THREADING:
+            self._profile_lock = python.PyThread_allocate_lock()
+            if self._profile_lock is NULL:
+                raise MemoryError()
 
     def __init__(self, xslt_input, *, extensions=None, regexp=True,
                  access_control=None):
@@ -414,6 +425,7 @@ cdef class XSLT:
         c_doc._private = NULL # no longer used!
         self._c_style = c_style
         self._context = _XSLTContext(None, extensions, self._error_log, regexp, True)
+        self._idle_contexts = []
 
     def __dealloc__(self):
         if self._xslt_resolver_context is not None and \
@@ -422,6 +434,9 @@ cdef class XSLT:
         # this cleans up the doc copy as well
         if self._c_style is not NULL:
             xslt.xsltFreeStylesheet(self._c_style)
+        if config.ENABLE_THREADING:
+            if self._profile_lock is not NULL:
+                python.PyThread_free_lock(self._profile_lock)
 
     property error_log:
         u"The log of errors and warnings of an XSLT execution."
@@ -462,6 +477,48 @@ cdef class XSLT:
             raise ValueError("cannot set a maximum stylesheet traversal depth < 0")
         xslt.xsltMaxDepth = max_depth
 
+    @staticmethod
+    def from_file(filename, *, cache=True, parser=None, extensions=None,
+                  regexp=True, access_control=None):
+        u"""from_file(filename, cache=True, parser=None, extensions=None, regexp=True, access_control=None)
+
+        Parse and compile the stylesheet in a local file.
+
+        With ``cache=True`` (the default), compiled stylesheets are kept
+        in a global cache and returned again for later calls with the
+        same arguments, as long as neither the stylesheet file nor any of
+        the files that it imports or includes was modified.  Their
+        modification times are checked on each call.  Since XSLT objects
+        can be used from multiple threads, the returned object can be
+        shared.
+
+        The ``parser`` and ``access_control`` arguments must be the same
+        objects as before to find a cached stylesheet, whereas the
+        ``extensions`` mapping is compared by its items.  Stylesheets
+        read from file-like objects or with unhashable extensions are
+        not cached.
+
+        The other keyword arguments are passed to the parser and to the
+        XSLT constructor.
+        """
+        if not cache or not _isString(filename):
+            return XSLT(_parseDocument(filename, parser, None),
+                        extensions=extensions, regexp=regexp,
+                        access_control=access_control)
+        return _XSLT_FILE_CACHE.get(
+            filename, parser, extensions, regexp, access_control)
+
+    @staticmethod
+    def set_file_cache_size(size):
+        u"""set_file_cache_size(size)
+
+        Set the maximum number of compiled stylesheets that
+        ``from_file()`` keeps in its cache.  The least recently used
+        stylesheets are discarded first.  A size of 0 empties and
+        disables the cache.  The default size is 50.
+        """
+        _XSLT_FILE_CACHE.set_max_size(size)
+
     def apply(self, _input, *, profile_run=False, **kw):
         u"""apply(self, _input,  profile_run=False, **kw)
         
@@ -490,22 +547,118 @@ cdef class XSLT:
 
         Pass the ``profile_run`` option to get profile information
         about the XSLT.  The result of the XSLT will have a property
-        xslt_profile that holds an XML tree with profiling data.
+        xslt_profile that holds an XML tree with profiling data.  If
+        an `XSLTProfile` object is passed instead of True, the
+        profiling data is also added to it.
+        """
+        cdef _Document input_doc
+        cdef _Document profile_doc = None
+        cdef XSLTProfile profile = None
+        cdef list profile_docs = None
+        cdef xmlDoc* c_result
+
+        assert self._c_style is not NULL, "XSLT stylesheet not initialised"
+        input_doc = _documentOrRaise(_input)
+        if isinstance(profile_run, XSLTProfile):
+            profile = <XSLTProfile>profile_run
+            profile_run = profile._sample()
+        if profile_run:
+            profile_docs = []
+        c_result = self._transform(
+            _input, profile_run, _prepare_xslt_parameters(kw), profile_docs,
+            profile)
+        if profile_docs:
+            profile_doc = profile_docs[0]
+        return self._wrapResult(c_result, input_doc, profile_doc)
+
+    def map(self, inputs, *, workers=None, serialize=False, **kw):
+        u"""map(self, inputs, workers=None, serialize=False, **kw)
+
+        Execute the XSL transformation on each tree or Element in a
+        sequence.  Returns a list with the results in the order of the
+        input.
+
+        Other keyword arguments are passed to the stylesheet as
+        parameters of all transformations.  They are converted only
+        once for the whole batch.  With ``serialize=True``, the result
+        documents are not returned as trees but only as byte strings,
+        serialised as by ``bytes(result_tree)``.
+
+        Errors do not abort the batch.  If a transformation fails, the
+        exception that was raised for it is stored at its position in
+        the result list instead.
+
+        The transformations run in parallel threads.  The number of
+        threads defaults to the number of CPUs and can be changed with
+        the ``workers`` keyword argument.  Passing ``workers=1`` runs
+        all transformations in the calling thread.  Note that the
+        input documents must not be modified while the batch is running.
         """
+        assert self._c_style is not NULL, "XSLT stylesheet not initialised"
+        return _XSLTMapBatch(
+            self, _prepare_xslt_parameters(kw), serialize).run(inputs, workers)
+
+    def transform_to(self, output_file, _input, **kw):
+        u"""transform_to(self, output_file, _input, **kw)
+
+        Execute the XSL transformation on a tree or Element and write
+        the result directly to a file, without creating a result tree
+        object.
+
+        The output file can be a file name or a file-like object.  The
+        output method and encoding are taken from the ``xsl:output``
+        element of the stylesheet, as for ``str(result_tree)``.  Keyword
+        arguments are passed to the stylesheet as parameters.
+        """
+        cdef _FilelikeWriter writer
+        cdef tree.xmlOutputBuffer* c_buffer
+        cdef xmlDoc* c_result
+        cdef const_char* c_enc
+        cdef int error_result, written
+
+        assert self._c_style is not NULL, "XSLT stylesheet not initialised"
+        c_result = self._transform(
+            _input, False, _prepare_xslt_parameters(kw), None)
+        try:
+            c_enc = <const_char*>self._c_style.encoding
+            if c_enc is NULL:
+                c_enc = "UTF-8"
+            writer = _create_output_buffer(output_file, c_enc, 0, &c_buffer,
+                                           __FILELIKE_WRITE_CHUNK_SIZE)
+            with nogil:
+                written = xslt.xsltSaveResultTo(
+                    c_buffer, c_result, self._c_style)
+                error_result = c_buffer.error
+                if error_result == xmlerror.XML_ERR_OK and written < 0:
+                    error_result = xmlerror.XML_ERR_INTERNAL_ERROR
+                if error_result == xmlerror.XML_ERR_OK:
+                    error_result = tree.xmlOutputBufferClose(c_buffer)
+                    if error_result > 0:
+                        error_result = xmlerror.XML_ERR_OK
+                else:
+                    tree.xmlOutputBufferClose(c_buffer)
+            if writer is not None:
+                writer._exc_context._raise_if_stored()
+        finally:
+            tree.xmlFreeDoc(c_result)
+        if error_result != xmlerror.XML_ERR_OK:
+            _raiseSerialisationError(error_result)
+
+    cdef xmlDoc* _transform(self, _input, bint profile_run, list parameters,
+                            list profile_docs,
+                            XSLTProfile profile=None) except NULL:
         cdef _XSLTContext context = None
         cdef _XSLTResolverContext resolver_context
+        cdef _ErrorLog error_log
         cdef _Document input_doc
         cdef _Element root_node
-        cdef _Document result_doc
-        cdef _Document profile_doc = None
         cdef xmlDoc* c_profile_doc
         cdef xslt.xsltTransformContext* transform_ctxt
         cdef xmlDoc* c_result = NULL
         cdef xmlDoc* c_doc
-        cdef tree.xmlDict* c_dict
         cdef const_char** params = NULL
+        cdef double start_time
 
-        assert self._c_style is not NULL, "XSLT stylesheet not initialised"
         input_doc = _documentOrRaise(_input)
         root_node = _rootNodeOrRaise(_input)
 
@@ -519,36 +672,57 @@ cdef class XSLT:
         # using the stylesheet dict is safer than using a possibly
         # unrelated dict from the current thread.  Almost all
         # non-input tag/attr names will come from the stylesheet
-        # anyway.
+        # anyway.  New names (including parameter values) go into a
+        # sub-dict, so that concurrent transformations never write
+        # into the shared stylesheet dict.
         if transform_ctxt.dict is not NULL:
             xmlparser.xmlDictFree(transform_ctxt.dict)
-        if kw:
-            # parameter values are stored in the dict
-            # => avoid unnecessarily cluttering the global dict
-            transform_ctxt.dict = xmlparser.xmlDictCreateSub(self._c_style.doc.dict)
-            if transform_ctxt.dict is NULL:
-                xslt.xsltFreeTransformContext(transform_ctxt)
-                raise MemoryError()
-        else:
-            transform_ctxt.dict = self._c_style.doc.dict
-            xmlparser.xmlDictReference(transform_ctxt.dict)
+        transform_ctxt.dict = xmlparser.xmlDictCreateSub(self._c_style.doc.dict)
+        if transform_ctxt.dict is NULL:
+            _destroyFakeDoc(input_doc._c_doc, c_doc)
+            xslt.xsltFreeTransformContext(transform_ctxt)
+            raise MemoryError()
 
         xslt.xsltSetCtxtParseOptions(
             transform_ctxt, input_doc._parser._parse_options)
 
-        if profile_run:
-            transform_ctxt.profile = 1
-
+        # errors go into a separate log per call and are added to the
+        # shared log afterwards, so that concurrent calls do not mix up
+        # their error messages
+        error_log = _ErrorLog()
         try:
-            context = self._context._copy()
+            try:
+                context = self._idle_contexts.pop()
+            except IndexError:
+                context = <_XSLTContext>self._context._copy()
+            context._error_log = error_log
             context.register_context(transform_ctxt, input_doc)
 
             resolver_context = self._xslt_resolver_context._copy()
             transform_ctxt._private = <python.PyObject*>resolver_context
 
-            _convert_xslt_parameters(transform_ctxt, kw, &params)
-            c_result = self._run_transform(
-                c_doc, params, context, transform_ctxt)
+            _convert_xslt_parameters(transform_ctxt, parameters, &params)
+            if not profile_run:
+                c_result = self._run_transform(
+                    c_doc, params, context, transform_ctxt, error_log)
+            else:
+                # libxslt counts the template calls and times in the
+                # shared stylesheet, so profiled runs must not overlap
+                self._lockProfile()
+                try:
+                    _resetTemplateProfiles(self._c_style)
+                    transform_ctxt.profile = 1
+                    start_time = _time()
+                    c_result = self._run_transform(
+                        c_doc, params, context, transform_ctxt, error_log)
+                    if profile is not None:
+                        profile._addRun(self._c_style, _time() - start_time)
+                    c_profile_doc = xslt.xsltGetProfileInformation(transform_ctxt)
+                    if c_profile_doc is not NULL:
+                        profile_docs.append(_documentFactory(
+                            c_profile_doc, input_doc._parser))
+                finally:
+                    self._unlockProfile()
             if params is not NULL:
                 # deallocate space for parameters
                 python.PyMem_Free(params)
@@ -557,16 +731,16 @@ cdef class XSLT:
                 if c_result is not NULL:
                     tree.xmlFreeDoc(c_result)
                     c_result = NULL
-
-            if transform_ctxt.profile:
-                c_profile_doc = xslt.xsltGetProfileInformation(transform_ctxt)
-                if c_profile_doc is not NULL:
-                    profile_doc = _documentFactory(
-                        c_profile_doc, input_doc._parser)
         finally:
             if context is not None:
                 context.free_context()
+                context._error_log = self._error_log
+                self._idle_contexts.append(context)
             _destroyFakeDoc(input_doc._c_doc, c_doc)
+            for entry in error_log:
+                self._error_log.receive(entry)
+            if error_log.last_error is not None:
+                self._error_log.last_error = error_log.last_error
 
         try:
             if resolver_context is not None and resolver_context._has_raised():
@@ -583,7 +757,7 @@ cdef class XSLT:
 
             if c_result is NULL:
                 # last error seems to be the most accurate here
-                error = self._error_log.last_error
+                error = error_log.last_error
                 if error is not None and error.message:
                     if error.line > 0:
                         message = u"%s, line %d" % (error.message, error.line)
@@ -593,11 +767,17 @@ cdef class XSLT:
                     message = u"Error applying stylesheet, line %d" % error.line
                 else:
                     message = u"Error applying stylesheet"
-                raise XSLTApplyError(message, self._error_log)
+                raise XSLTApplyError(message, error_log)
         finally:
             if resolver_context is not None:
                 resolver_context.clear()
+        return c_result
 
+    cdef _XSLTResultTree _wrapResult(self, xmlDoc* c_result,
+                                     _Document input_doc,
+                                     _Document profile_doc):
+        cdef _Document result_doc
+        cdef tree.xmlDict* c_dict
         result_doc = _documentFactory(c_result, input_doc._parser)
 
         c_dict = c_result.dict
@@ -620,11 +800,28 @@ cdef class XSLT:
 
         return _xsltResultTreeFactory(result_doc, self, profile_doc)
 
+    @cython.final
+    cdef int _lockProfile(self) except -1:
+        cdef int result
+        if config.ENABLE_THREADING and self._profile_lock != NULL:
+            with nogil:
+                result = python.PyThread_acquire_lock(
+                    self._profile_lock, python.WAIT_LOCK)
+            if result == 0:
+                raise XSLTError, u"XSLT profiler locking failed"
+        return 0
+
+    @cython.final
+    cdef void _unlockProfile(self):
+        if config.ENABLE_THREADING and self._profile_lock != NULL:
+            python.PyThread_release_lock(self._profile_lock)
+
     cdef xmlDoc* _run_transform(self, xmlDoc* c_input_doc,
                                 const_char** params, _XSLTContext context,
-                                xslt.xsltTransformContext* transform_ctxt):
+                                xslt.xsltTransformContext* transform_ctxt,
+                                _ErrorLog error_log):
         cdef xmlDoc* c_result
-        xslt.xsltSetTransformErrorFunc(transform_ctxt, <void*>self._error_log,
+        xslt.xsltSetTransformErrorFunc(transform_ctxt, <void*>error_log,
                                        <xmlerror.xmlGenericErrorFunc>_receiveXSLTError)
         if self._access_control is not None:
             self._access_control._register_in_context(transform_ctxt)
@@ -633,8 +830,23 @@ cdef class XSLT:
                 self._c_style, c_input_doc, params, NULL, NULL, transform_ctxt)
         return c_result
 
+cdef list _prepare_xslt_parameters(dict parameters):
+    u"""Encode the stylesheet parameters as (name, value, quoted) tuples
+    that can be passed into multiple transformations.
+    """
+    cdef list prepared = []
+    for key, value in parameters.iteritems():
+        k = _utf8(key)
+        if isinstance(value, _XSLTQuotedStringParam):
+            prepared.append((k, (<_XSLTQuotedStringParam>value).strval, True))
+        elif isinstance(value, XPath):
+            prepared.append((k, (<XPath>value)._path, False))
+        else:
+            prepared.append((k, _utf8(value), False))
+    return prepared
+
 cdef _convert_xslt_parameters(xslt.xsltTransformContext* transform_ctxt,
-                              dict parameters, const_char*** params_ptr):
+                              list parameters, const_char*** params_ptr):
     cdef Py_ssize_t i, parameter_count
     cdef const_char** params
     cdef tree.xmlDict* c_dict = transform_ctxt.dict
@@ -649,17 +861,11 @@ cdef _convert_xslt_parameters(xslt.xsltTransformContext* transform_ctxt,
         sizeof(const_char*) * (parameter_count * 2 + 1))
     try:
         i = 0
-        for key, value in parameters.iteritems():
-            k = _utf8(key)
-            if isinstance(value, _XSLTQuotedStringParam):
-                v = (<_XSLTQuotedStringParam>value).strval
+        for k, v, quoted in parameters:
+            if quoted:
                 xslt.xsltQuoteOneUserParam(
                     transform_ctxt, _xcstr(k), _xcstr(v))
             else:
-                if isinstance(value, XPath):
-                    v = (<XPath>value)._path
-                else:
-                    v = _utf8(value)
                 params[i] = <const_char*>tree.xmlDictLookup(c_dict, _xcstr(k), len(k))
                 i += 1
                 params[i] = <const_char*>tree.xmlDictLookup(c_dict, _xcstr(v), len(v))
@@ -670,6 +876,46 @@ cdef _convert_xslt_parameters(xslt.xsltTransformContext* transform_ctxt,
     params[i] = NULL
     params_ptr[0] = params
 
+@cython.final
+@cython.internal
+cdef class _XSLTMapBatch(_ThreadedBatch):
+    cdef XSLT _stylesheet
+    cdef list _parameters
+    cdef bint _serialize
+    def __cinit__(self, XSLT stylesheet not None, list parameters,
+                  bint serialize):
+        self._stylesheet = stylesheet
+        self._parameters = parameters
+        self._serialize = serialize
+
+    cdef _process(self, state, _input):
+        cdef xmlDoc* c_result
+        c_result = self._stylesheet._transform(
+            _input, False, self._parameters, None)
+        if not self._serialize:
+            return self._stylesheet._wrapResult(
+                c_result, _documentOrRaise(_input), None)
+        try:
+            return _serializeXSLTResult(self._stylesheet, c_result)
+        finally:
+            tree.xmlFreeDoc(c_result)
+
+cdef bytes _serializeXSLTResult(XSLT stylesheet, xmlDoc* c_result):
+    cdef xmlChar* s = NULL
+    cdef int l = 0
+    cdef int r
+    with nogil:
+        r = xslt.xsltSaveResultToString(&s, &l, c_result, stylesheet._c_style)
+    if r == -1:
+        raise MemoryError()
+    if s is NULL:
+        return b''
+    try:
+        result = <bytes>s[:l]
+    finally:
+        tree.xmlFree(s)
+    return result
+
 cdef XSLT _copyXSLT(XSLT stylesheet):
     cdef XSLT new_xslt
     cdef xmlDoc* c_doc
@@ -678,6 +924,8 @@ cdef XSLT _copyXSLT(XSLT stylesheet):
     new_xslt._access_control = stylesheet._access_control
     new_xslt._error_log = _ErrorLog()
     new_xslt._context = stylesheet._context._copy()
+    new_xslt._context._error_log = new_xslt._error_log
+    new_xslt._idle_contexts = []
 
     new_xslt._xslt_resolver_context = stylesheet._xslt_resolver_context._copy()
     new_xslt._xslt_resolver_context._c_style_doc = _copyDoc(
@@ -691,6 +939,209 @@ cdef XSLT _copyXSLT(XSLT stylesheet):
 
     return new_xslt
 
+################################################################################
+# cache of compiled stylesheet files
+
+cdef object _os_stat
+from os import stat as _os_stat
+cdef object _unquote_url
+try:
+    from urllib import unquote as _unquote_url
+except ImportError:
+    from urllib.parse import unquote as _unquote_url # Py3
+
+cdef _collectStylesheetFiles(xslt.xsltStylesheet* c_style, list filenames):
+    u"""Collect the file names of a stylesheet and of all stylesheets that
+    it imports or includes.
+    """
+    cdef xslt.xsltDocument* c_include
+    cdef xslt.xsltStylesheet* c_import
+    if c_style.doc is not NULL and c_style.doc.URL is not NULL:
+        _appendLocalFilename(c_style.doc.URL, filenames)
+    c_include = c_style.docList
+    while c_include is not NULL:
+        if c_include.doc is not NULL and c_include.doc.URL is not NULL:
+            _appendLocalFilename(c_include.doc.URL, filenames)
+        c_include = c_include.next
+    c_import = c_style.imports
+    while c_import is not NULL:
+        _collectStylesheetFiles(c_import, filenames)
+        c_import = c_import.next
+
+cdef _appendLocalFilename(const_xmlChar* c_url, list filenames):
+    if tree.xmlStrncmp(c_url, <const_xmlChar*>"file://", 7) == 0:
+        filename = _unquote_url(_decodeFilename(c_url + 7))
+    elif _isFilePath(c_url):
+        filename = _decodeFilename(c_url)
+    else:
+        # not a local file, cannot check for modifications
+        return
+    if filename not in filenames:
+        filenames.append(filename)
+
+cdef tuple _fileModificationTimes(list filenames, dict known_times=None):
+    u"""Return the modification times of the files, taking the ones in
+    ``known_times`` from there.
+    """
+    modification_times = []
+    for filename in filenames:
+        if known_times is not None and filename in known_times:
+            modification_times.append(known_times[filename])
+            continue
+        try:
+            modification_times.append(_os_stat(filename).st_mtime)
+        except OSError:
+            modification_times.append(None)
+    return tuple(modification_times)
+
+@cython.final
+@cython.internal
+cdef class _XSLTFileCacheEntry:
+    cdef XSLT xslt
+    cdef list filenames
+    cdef tuple modification_times
+    # keep the parser and access control alive while their id() is
+    # part of the key
+    cdef tuple arguments
+
+@cython.final
+@cython.internal
+cdef class _XSLTFileCache:
+    u"""Bounded cache of compiled stylesheet files, validated by the
+    modification times of all files that a stylesheet was built from.
+
+    The least recently used entries are discarded first.  The lock only
+    protects the updates.  Checking the files and compiling happen
+    outside of it, so concurrent calls for the same file may both
+    compile it and only the last result is kept.
+    """
+    cdef dict _entries
+    cdef list _keys
+    cdef Py_ssize_t _max_size
+    cdef python.PyThread_type_lock _cache_lock
+    def __cinit__(self):
+        self._entries = {}
+        self._keys = []
+        self._max_size = 50
+        if config.ENABLE_THREADING:
+            self._cache_lock = python.PyThread_allocate_lock()
+            if self._cache_lock is NULL:
+                raise MemoryError()
+
+    def __dealloc__(self):
+        if config.ENABLE_THREADING:
+            if self._cache_lock is not NULL:
+                python.PyThread_free_lock(self._cache_lock)
+
+    cdef int _lock(self) except -1:
+        cdef int result
+        if config.ENABLE_THREADING and self._cache_lock != NULL:
+            with nogil:
+                result = python.PyThread_acquire_lock(
+                    self._cache_lock, python.WAIT_LOCK)
+            if result == 0:
+                raise XSLTError, u"XSLT file cache locking failed"
+        return 0
+
+    cdef void _unlock(self):
+        if config.ENABLE_THREADING and self._cache_lock != NULL:
+            python.PyThread_release_lock(self._cache_lock)
+
+    cdef XSLT get(self, filename, parser, extensions, regexp, access_control):
+        cdef _XSLTFileCacheEntry entry
+        cdef list filenames
+        cdef list removed
+        filename = os_path_abspath(filename)
+        if extensions is None:
+            extensions_key = None
+        else:
+            try:
+                extensions_key = frozenset(extensions.items())
+            except TypeError:
+                # unhashable extensions, do not cache
+                return XSLT(_parseDocument(filename, parser, None),
+                            extensions=extensions, regexp=regexp,
+                            access_control=access_control)
+        key = (filename, id(parser), extensions_key, bool(regexp),
+               id(access_control))
+        self._lock()
+        try:
+            entry = self._entries.get(key) if self._max_size > 0 else None
+        finally:
+            self._unlock()
+
+        if entry is None:
+            filenames = [filename]
+        else:
+            if _fileModificationTimes(entry.filenames) == entry.modification_times:
+                self._lock()
+                try:
+                    if self._entries.get(key) is entry:
+                        self._keys.remove(key)
+                        self._keys.append(key)
+                finally:
+                    self._unlock()
+                return entry.xslt
+            filenames = entry.filenames
+
+        # Take the modification times before parsing, so that changes
+        # during the compilation are detected on the next call.  Imported
+        # files that were not known before are only checked afterwards.
+        known_times = dict(zip(filenames, _fileModificationTimes(filenames)))
+        xslt = XSLT(_parseDocument(filename, parser, None),
+                    extensions=extensions, regexp=regexp,
+                    access_control=access_control)
+        filenames = []
+        _collectStylesheetFiles(xslt._c_style, filenames)
+        if filename not in filenames:
+            filenames.append(filename)
+
+        entry = _XSLTFileCacheEntry()
+        entry.xslt = xslt
+        entry.filenames = filenames
+        entry.modification_times = _fileModificationTimes(
+            filenames, known_times)
+        entry.arguments = (parser, access_control)
+        self._lock()
+        try:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self._keys.remove(key)
+            if self._max_size > 0:
+                self._entries[key] = entry
+                self._keys.append(key)
+            removed = self._shrink()
+        finally:
+            self._unlock()
+        # deallocate the old entries outside of the lock
+        old_entry = None
+        del removed[:]
+        return xslt
+
+    cdef list _shrink(self):
+        u"""Remove the least recently used entries beyond the maximum size
+        and return them.  Must be called with the lock held.
+        """
+        cdef list removed = []
+        while len(self._keys) > self._max_size:
+            removed.append(self._entries.pop(self._keys.pop(0)))
+        return removed
+
+    cdef set_max_size(self, Py_ssize_t max_size):
+        cdef list removed
+        if max_size < 0:
+            raise ValueError, u"cache size must not be negative"
+        self._lock()
+        try:
+            self._max_size = max_size
+            removed = self._shrink()
+        finally:
+            self._unlock()
+        del removed[:]
+
+cdef _XSLTFileCache _XSLT_FILE_CACHE = _XSLTFileCache()
+
+
 @cython.final
 cdef class _XSLTResultTree(_ElementTree):
     cdef XSLT _xslt
@@ -819,6 +1270,162 @@ cdef _xsltResultTreeFactory(_Document doc, XSLT xslt, _Document profile):
     result._profile = profile
     return result
 
+################################################################################
+# structured profiling data
+
+cdef _resetTemplateProfiles(xslt.xsltStylesheet* c_style):
+    cdef xslt.xsltTemplate* c_template
+    while c_style is not NULL:
+        c_template = c_style.templates
+        while c_template is not NULL:
+            c_template.nbCalls = 0
+            c_template.time = 0
+            c_template = c_template.next
+        _resetTemplateProfiles(c_style.imports)
+        c_style = c_style.next
+
+@cython.final
+@cython.internal
+cdef class _XSLTTemplateProfile:
+    u"""Profiling data of a single XSLT template.
+
+    The ``self_time`` is the time in seconds that was spent in the
+    template itself, excluding the templates that it called.
+    """
+    cdef readonly object match
+    cdef readonly object name
+    cdef readonly object mode
+    cdef readonly long calls
+    cdef readonly double self_time
+
+    property average_time:
+        u"The average self time of a call in seconds."
+        def __get__(self):
+            if not self.calls:
+                return 0.0
+            return self.self_time / self.calls
+
+    def __repr__(self):
+        if self.name is not None:
+            template = u"name=%r" % self.name
+        else:
+            template = u"match=%r" % self.match
+        if self.mode is not None:
+            template += u" mode=%r" % self.mode
+        return u"<XSLT template %s calls=%d self_time=%.6f>" % (
+            template, self.calls, self.self_time)
+
+cdef class XSLTProfile:
+    u"""XSLTProfile(self, sample_interval=1)
+
+    Collects the profiling data of XSLT runs as Python objects.
+
+    Pass it as the ``profile_run`` argument of an XSLT call to profile
+    the run and add the call counts and times of the templates to the
+    profile::
+
+      >>> profile = etree.XSLTProfile()
+      >>> result = transform(doc, profile_run=profile)
+      >>> for template in profile.templates:
+      ...     print(template.match, template.calls, template.self_time)
+
+    The data of all profiled runs is summed up per template.  With a
+    ``sample_interval`` of N, only every N-th call that receives the
+    profile is profiled, which reduces the overhead of profiling a
+    long-running application.
+
+    Profiled runs of the same stylesheet do not run concurrently.
+    """
+    cdef dict _templates
+    cdef readonly long sample_interval
+    cdef readonly long runs
+    cdef readonly double total_time
+    cdef long _sample_countdown
+    def __init__(self, sample_interval=1):
+        if sample_interval < 1:
+            raise ValueError, u"sample_interval must be a positive number"
+        self.sample_interval = sample_interval
+        self.reset()
+
+    property templates:
+        u"""The profiled templates, ordered by the time spent in them.
+        """
+        def __get__(self):
+            templates = list(self._templates.values())
+            templates.sort(key=XSLTProfile._sortKey)
+            return templates
+
+    @staticmethod
+    def _sortKey(_XSLTTemplateProfile template):
+        return -template.self_time, -template.calls
+
+    def reset(self):
+        u"""reset(self)
+
+        Discard the collected profiling data.
+        """
+        self._templates = {}
+        self.runs = 0
+        self.total_time = 0.0
+        self._sample_countdown = 0
+
+    def merge(self, XSLTProfile other not None):
+        u"""merge(self, other)
+
+        Add the profiling data collected by another profile.
+        """
+        cdef _XSLTTemplateProfile template, other_template
+        for key, other_template in other._templates.items():
+            template = self._getTemplate(key)
+            template.calls += other_template.calls
+            template.self_time += other_template.self_time
+        self.runs += other.runs
+        self.total_time += other.total_time
+
+    def __repr__(self):
+        return u"<XSLTProfile runs=%d total_time=%.6f templates=%d>" % (
+            self.runs, self.total_time, len(self._templates))
+
+    cdef bint _sample(self):
+        if self._sample_countdown > 0:
+            self._sample_countdown -= 1
+            return 0
+        self._sample_countdown = self.sample_interval - 1
+        return 1
+
+    cdef _XSLTTemplateProfile _getTemplate(self, tuple key):
+        cdef _XSLTTemplateProfile template
+        template = self._templates.get(key)
+        if template is None:
+            template = _XSLTTemplateProfile.__new__(_XSLTTemplateProfile)
+            template.match, template.name, template.mode = key
+            self._templates[key] = template
+        return template
+
+    cdef _addRun(self, xslt.xsltStylesheet* c_style, double run_time):
+        self._addTemplates(c_style)
+        self.runs += 1
+        self.total_time += run_time
+
+    cdef _addTemplates(self, xslt.xsltStylesheet* c_style):
+        cdef xslt.xsltTemplate* c_template
+        cdef _XSLTTemplateProfile template
+        while c_style is not NULL:
+            c_template = c_style.templates
+            while c_template is not NULL:
+                if c_template.nbCalls > 0:
+                    template = self._getTemplate((
+                        funicodeOrNone(<const_xmlChar*>c_template.match),
+                        funicodeOrNone(c_template.name),
+                        funicodeOrNone(c_template.mode)))
+                    template.calls += c_template.nbCalls
+                    template.self_time += (
+                        <double>c_template.time /
+                        xslt.XSLT_TIMESTAMP_TICS_PER_SEC)
+                c_template = c_template.next
+            self._addTemplates(c_style.imports)
+            c_style = c_style.next
+
 # functions like "output" and "write" are a potential security risk, but we
 # rely on the user to configure XSLTAccessControl as needed
 xslt.xsltRegisterAllExtras()